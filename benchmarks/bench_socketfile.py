@@ -0,0 +1,48 @@
+"""
+Benchmarks reading large payloads with #c4ddev.scripting_server.SocketFile,
+as the Scripting Server does for the `Content-length` of a request:
+
+    python benchmarks/bench_socketfile.py [--size 16] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import threading
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+from c4ddev.scripting_server import SocketFile, socketpair
+
+
+def transfer(payload):
+  a, b = socketpair()
+  def writer():
+    SocketFile(a).write(b'header\n' + payload)
+    a.close()
+  thread = threading.Thread(target=writer)
+  thread.start()
+  reader = SocketFile(b)
+  reader.readline()
+  assert len(reader.read(len(payload))) == len(payload)
+  thread.join()
+  b.close()
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--size', type=int, default=16, help='payload size in MB (default: 16)')
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  payload = os.urandom(args.size * 1024 * 1024)
+  seconds = min(timeit.repeat(lambda: transfer(payload), repeat=args.repeat, number=1))
+  print('SocketFile, {0} MB payload'.format(args.size))
+  print('  {0:<20}{1:>10.3f} ms'.format('transfer', seconds * 1e3))
+  print('  {0:<20}{1:>10.1f} MB/s'.format('throughput', len(payload) / seconds / 1e6))
+
+
+if __name__ == '__main__':
+  main()
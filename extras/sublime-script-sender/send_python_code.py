@@ -24,32 +24,63 @@ __author__ = 'Niklas Rosenstein <rosensteinniklas (at) gmail.com>'
 __version__ = '1.0'
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-#                    Shared Code (SocketFile wrapper class)
+#                      Shared Code (SocketFile wrapper class)
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-import sys
-if sys.version_info[0] < 3:
-    try: from cStringIO import StringIO as BytesIO
-    except ImportError: from StringIO import StringIO as BytesIO
-else:
-    from io import BytesIO
-
 class SocketFile(object):
     """
-    File-like wrapper for reading socket objects.
+    Buffered file-like wrapper for reading from and writing to socket
+    objects. Data is received with `recv_into()` directly into a
+    `bytearray` from which lines and exact-length chunks are sliced, and
+    writes are sent completely with `sendall()`.
     """
 
+    #: The minimum number of bytes to receive from the socket at once.
+    chunk_size = 65536
+
     def __init__(self, socket, encoding=None):
         super(SocketFile, self).__init__()
         self._socket = socket
-        self._buffer = BytesIO()
+        self._buffer = bytearray(self.chunk_size)
+        self._start = 0  # Start of the buffered data.
+        self._end = 0  # End of the buffered data.
+        self._scan = 0  # Where to continue searching for a line-feed.
         self.encoding = encoding
 
-    def _append_buffer(self, data):
-        pos = self._buffer.tell()
-        self._buffer.seek(0, 2)
-        self._buffer.write(data)
-        self._buffer.seek(pos)
+    def _fill(self, size):
+        """
+        Receives at least one and up to *size* bytes (or #chunk_size,
+        whichever is larger) into the buffer. Returns the number of bytes
+        received, zero if the socket is closed.
+        """
+
+        size = max(size, self.chunk_size)
+        if self._end + size > len(self._buffer):
+            # Move the buffered data to the front and grow the buffer if
+            # that is still not enough.
+            length = self._end - self._start
+            if self._start:
+                self._buffer[:length] = self._buffer[self._start:self._end]
+                self._scan -= self._start
+                self._start, self._end = 0, length
+            if length + size > len(self._buffer):
+                self._buffer.extend(bytearray(length + size - len(self._buffer)))
+        view = memoryview(self._buffer)[self._end:self._end + size]
+        count = self._socket.recv_into(view)
+        del view  # Release the buffer so that it can be resized again.
+        self._end += count
+        return count
+
+    def _consume(self, length):
+        data = bytes(self._buffer[self._start:self._start + length])
+        self._start += length
+        if self._start == self._end:
+            self._start = self._end = 0
+            if len(self._buffer) > 4 * self.chunk_size:
+                # Don't hold on to the memory of a large payload.
+                self._buffer = bytearray(self.chunk_size)
+        self._scan = self._start
+        return data
 
     def bind(self, *args, **kwargs):
         return self._socket.bind(*args, **kwargs)
@@ -57,57 +88,39 @@ class SocketFile(object):
     def connect(self, *args, **kwargs):
         return self._socket.connect(*args, **kwargs)
 
-    def read(self, length, blocking=True):
-        data = self._buffer.read(length)
-        delta = length - len(data)
-        if delta > 0:
-            self._socket.setblocking(blocking)
-            try:
-                data += self._socket.recv(delta)
-            except socket.error:
-                pass
-        return data
+    def read(self, length):
+        """
+        Reads exactly *length* bytes. Less data is only returned if the
+        socket is closed before.
+        """
 
-    def readline(self):
-        parts = []
-        while True:
-            # Read the waiting data from the socket.
-            data = self.read(1024, blocking=False)
-
-            # If it contains a line-feed character, we add it
-            # to the result list and append the rest of the data
-            # to the buffer.
-            if b'\n' in data:
-                left, right = data.split(b'\n', 1)
-                parts.append(left + b'\n')
-                self._append_buffer(right)
+        while self._end - self._start < length:
+            if not self._fill(length - (self._end - self._start)):
                 break
+        return self._consume(min(length, self._end - self._start))
 
-            else:
-                if data:
-                    parts.append(data)
-
-                # Read a blocking byte for which we will get an empty
-                # bytes object if the socket is closed-
-                byte = self.read(1, blocking=True)
-                if not byte:
-                    break
-
-                # Add the byte to the buffer. Stop here if it is a
-                # newline character.
-                parts.append(byte)
-                if byte == b'\n':
-                    break
+    def readline(self):
+        """
+        Reads up to and including the next line-feed character. Less data
+        is only returned if the socket is closed before.
+        """
 
-        return b''.join(parts)
+        while True:
+            index = self._buffer.find(b'\n', self._scan, self._end)
+            if index >= 0:
+                return self._consume(index + 1 - self._start)
+            self._scan = self._end
+            if not self._fill(0):
+                return self._consume(self._end - self._start)
 
     def write(self, data):
-        if isinstance(data, str):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             if not self.encoding:
                 raise ValueError('got str object and no encoding specified')
             data = data.encode(self.encoding)
 
-        return self._socket.send(data)
+        self._socket.sendall(data)
+        return len(data)
 
     def close(self):
         return self._socket.close()
@@ -161,22 +174,21 @@ def send_code(filename, code, encoding, password, host, port, origin):
     if isinstance(code, str):
         code = code.encode(encoding)
 
-    client.encoding = 'ascii'
-    client.write("Content-length: {0}\n".format(len(code)))
+    headers = ["Content-length: {0}\n".format(len(code))]
     # The Python instance on the other end will check for a coding
     # declaration or otherwise raise a SyntaxError if an invalid
     # character was found.
-    client.write("Encoding: binary\n")
-    client.write("Filename: {0}\n".format(filename))
-    client.write("Origin: {0}\n".format(origin))
+    headers.append("Encoding: binary\n")
+    headers.append("Filename: {0}\n".format(filename))
+    headers.append("Origin: {0}\n".format(origin))
 
     if password:
         passhash = hashlib.md5(password.encode('utf8')).hexdigest()
-        client.write("Password: {0}\n".format(passhash))
-    client.write('\n') # end headers
+        headers.append("Password: {0}\n".format(passhash))
+    headers.append('\n') # end headers
 
-    client.encoding = None
-    client.write(code)
+    # Send the headers and the code in a single write.
+    client.write(''.join(headers).encode('utf8') + code)
 
     # Read the response from the server.
     result = client.readline().decode('ascii')
@@ -27,6 +27,7 @@ from c4ddev import __version__ as version
 
 import bs4
 import click
+import collections
 import json
 import os
 import re
@@ -34,6 +35,7 @@ import requests
 import subprocess
 import sys
 import textwrap
+import threading
 
 try:
   from urllib.request import urlopen
@@ -414,6 +416,82 @@ def source_protector(ctx, filenames):
   return run(args)
 
 
+def parse_size(size):
+  match = re.match(r'^(\d+)([kKmM]?)$', size.strip())
+  if not match:
+    raise ValueError('invalid size: {!r}'.format(size))
+  factor = {'': 1, 'k': 1024, 'm': 1024 * 1024}[match.group(2).lower()]
+  return int(match.group(1)) * factor
+
+
+@main.command('send-bench')
+@click.option('-H', '--host', default='localhost', help='Defaults to localhost.')
+@click.option('-p', '--port', default=2900, help='Defaults to 2900.')
+@click.option('--password', default='alpine', help='Defaults to alpine.')
+@click.option('-c', '--clients', default=4, help='The number of concurrent '
+  'clients. Defaults to 4.')
+@click.option('-n', '--requests', 'count', default=100, help='The number of scripts '
+  'that every client sends. Defaults to 100.')
+@click.option('-s', '--size', 'sizes', multiple=True, metavar='SIZE',
+  help='The size of the scripts in bytes, with an optional k or M suffix. '
+  'Can be specified multiple times. Defaults to 1k.')
+@click.option('--one-shot', is_flag=True, help='Connect for every script '
+  'instead of sending all scripts of a client over one connection.')
+@click.option('--local', is_flag=True, help='Benchmark an in-process server '
+  'instead of the Scripting Server in Cinema 4D.')
+@click.pass_context
+def send_bench(ctx, host, port, password, clients, count, sizes, one_shot, local):
+  """
+  Benchmark the Scripting Server.
+  """
+
+  from c4ddev import scripting_server
+
+  try:
+    sizes = [parse_size(x) for x in sizes or ['1k']]
+  except ValueError as exc:
+    ctx.fail(str(exc))
+
+  thread = None
+  if local:
+    # Scripts are discarded by the zero-length queue.
+    thread = scripting_server.ServerThread(collections.deque(maxlen=0),
+      threading.Lock(), '127.0.0.1', 0, password)
+    thread.start()
+    addr = thread.address
+  else:
+    addr = (host, port)
+
+  failed = False
+  try:
+    for size in sizes:
+      result = scripting_server.benchmark(addr, password, clients, count,
+        size, keep_alive=not one_shot)
+      ok, elapsed = result['requests'], result['elapsed']
+      print('{} clients x {} scripts of {} bytes ({}): {} ok, {} failed'.format(
+        clients, count, size, 'one-shot' if one_shot else 'keep-alive',
+        ok, clients * count - ok))
+      if ok and elapsed > 0:
+        print('  {:.0f} scripts/s, {:.2f} MB/s in {:.2f}s'.format(
+          ok / elapsed, ok * size / elapsed / 1e6, elapsed))
+      if any(result[phase] for phase in scripting_server.BENCHMARK_PHASES):
+        print('  {:<10} {:>10} {:>10} {:>10}'.format('', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)'))
+      for phase in scripting_server.BENCHMARK_PHASES:
+        if result[phase]:
+          print('  {:<10} {:>10.3f} {:>10.3f} {:>10.3f}'.format(phase, *[
+            scripting_server.percentile(result[phase], p) * 1e3 for p in (50, 95, 99)]))
+      for exc in result['errors'][:5]:
+        print('  error:', exc)
+      failed = failed or bool(result['errors'])
+  finally:
+    if thread:
+      thread.running = False
+      thread.join()
+
+  if failed:
+    sys.exit(1)
+
+
 @main.command()
 @click.argument('titles', nargs=-1)
 @click.option('-u', '--username')
@@ -34,6 +34,11 @@ import subprocess
 import sys
 import zipfile
 
+#: The name of the module index in eggs created with `create_egg()`. Must
+#: match `localimport.EGG_INDEX_NAME`.
+EGG_INDEX_NAME = 'localimport-index.json'
+EGG_INDEX_VERSION = 1
+
 
 # =====================================================================
 #  Resource symbol stuff
@@ -396,9 +401,46 @@ def create_egg(pybin, source, dest, exclude_source=True):
           print("     [+]", arcname)
           egg.write(os.path.join(root, fn), arcname)
 
+  # Write the module index that allows localimport to resolve imports
+  # from the egg without scanning the archive.
+  index = build_egg_index(egg.namelist())
+  print("  [i]", EGG_INDEX_NAME, "({0} modules)".format(len(index)))
+  egg.writestr(EGG_INDEX_NAME, json.dumps(
+    {'version': EGG_INDEX_VERSION, 'modules': index}, sort_keys=True))
+  egg.close()
+
   return 0
 
 
+def build_egg_index(names):
+  ''' Builds the module index that `create_egg()` writes into every egg
+  from a list of archive member *names*. The index maps every module name
+  to a list of its archive path and a boolean that indicates whether the
+  module is a package. Members that are no Python modules are ignored.
+
+  Returns:
+    dict: `{module_name: [arcname, is_package]}` '''
+
+  index = {}
+  for arcname in names:
+    suffix = getsuffix(arcname)
+    if suffix not in ('.py', '.pyc', '.pyo'):
+      continue
+    parts = arcname[:-len(suffix)].split('/')
+    if '__pycache__' in parts:
+      continue
+    is_package = (parts[-1] == '__init__')
+    if is_package:
+      parts.pop()
+    if not parts or not all(re.match(r'^[A-Za-z_]\w*$', x) for x in parts):
+      continue
+    name = '.'.join(parts)
+    # Prefer byte compiled files, they are what zipimport loads.
+    if name not in index or suffix != '.py':
+      index[name] = [arcname, is_package]
+  return index
+
+
 def purge(directories, suffix='.pyc'):
   ''' Purge the specified *directories* and all its subfolders from
   byte-compile python cache folders. *directories* may also be a string
@@ -44,6 +44,9 @@ import string
 import sys
 import textwrap
 
+# Only nr.parse supports declaring the first characters of a Regex rule.
+_regex_starts_with = hasattr(parse.Rule, 'first_chars')
+
 TEMPLATE_CLASS = textwrap.dedent('''
   exec ("""class res(object):
    # Automatically generated with c4ddev v{0}.
@@ -417,7 +420,8 @@ class ResourcePackage(object):
     parse.Charset(Token_Symbol, string.ascii_letters + '_' + string.digits),
     parse.Charset(Token_Indent, string.whitespace, at_column=0),
     parse.Charset(Token_Whitespace, string.whitespace, skip=True),
-    parse.Regex(Token_Comment, '#.*$', re.M, skip=True)
+    parse.Regex(Token_Comment, '#.*$', re.M, skip=True,
+      **({'starts_with': '#'} if _regex_starts_with else {}))
   ]
 
   # Seems like these are the only supported language codes for Cinema 4D.
@@ -437,7 +441,10 @@ class ResourcePackage(object):
 
   @classmethod
   def parse(cls, content, filename):
-    lexer = parse.Lexer(parse.Scanner(content), cls.Rules)
+    # *content* may also be a Scanner, eg. a StreamScanner for large files.
+    if not isinstance(content, parse.Scanner):
+      content = parse.Scanner(content)
+    lexer = parse.Lexer(content, cls.Rules)
     error = cls._error(lexer, filename)
 
     basename = os.path.basename(filename).rpartition('.')[0]
@@ -557,9 +564,13 @@ def build_rpkg(files, res_dir, no_header):
   if not os.path.isdir(res_dir):
     raise OSError('directory "{}" does not exist'.format(res_dir))
   for fname in files:
-    with codecs.open(fname, 'r', encoding='utf8') as fp:
-      content = fp.read().replace('\r\n', '\n')
-    rpkg = ResourcePackage.parse(content, fname)
+    if hasattr(parse, 'StreamScanner'):
+      with open(fname, 'rb') as fp:
+        rpkg = ResourcePackage.parse(parse.StreamScanner(fp, 'utf8'), fname)
+    else:
+      with codecs.open(fname, 'r', encoding='utf8') as fp:
+        content = fp.read().replace('\r\n', '\n')
+      rpkg = ResourcePackage.parse(content, fname)
     if rpkg.name == 'c4d_symbols':
       header = os.path.join(res_dir, 'c4d_symbols.h')
       strings_dir = ''
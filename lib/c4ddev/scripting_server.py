@@ -0,0 +1,931 @@
+# -*- coding: utf8 -*-
+#
+# Copyright (C) 2014  Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+The network side of the C4DDev Scripting Server, which does not depend on
+Cinema 4D and is used by the `c4ddev/plugins/scripting_server.py` plugin.
+
+The #ServerThread accepts source code from any number of clients at once
+(eg. the Sublime Script Sender in `extras/sublime-script-sender`) and
+appends it as #SourceObject#s to a queue, from which the plugin executes
+them in the Cinema 4D main thread.
+
+A request consists of HTTP-like headers, an empty line and as many bytes
+of source code as specified with the `Content-length` header. The server
+answers with a `status: <status>` line and closes the connection. If the
+first request on a connection has a `Connection: keep-alive` header, the
+connection stays open instead and further requests may be sent (and
+pipelined) on it. The password has to be sent only with the first
+request and every status line is terminated with a line-feed, in the
+order that the requests were sent. The connection is still closed after
+an `invalid-password` or `invalid-request` status. The #Client implements
+this for sending many scripts at once.
+"""
+
+from __future__ import print_function
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                      Shared Code (SocketFile wrapper class)
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class SocketFile(object):
+    """
+    Buffered file-like wrapper for reading from and writing to socket
+    objects. Data is received with `recv_into()` directly into a
+    `bytearray` from which lines and exact-length chunks are sliced, and
+    writes are sent completely with `sendall()`.
+    """
+
+    #: The minimum number of bytes to receive from the socket at once.
+    chunk_size = 65536
+
+    def __init__(self, socket, encoding=None):
+        super(SocketFile, self).__init__()
+        self._socket = socket
+        self._buffer = bytearray(self.chunk_size)
+        self._start = 0  # Start of the buffered data.
+        self._end = 0  # End of the buffered data.
+        self._scan = 0  # Where to continue searching for a line-feed.
+        self.encoding = encoding
+
+    def _fill(self, size):
+        """
+        Receives at least one and up to *size* bytes (or #chunk_size,
+        whichever is larger) into the buffer. Returns the number of bytes
+        received, zero if the socket is closed.
+        """
+
+        size = max(size, self.chunk_size)
+        if self._end + size > len(self._buffer):
+            # Move the buffered data to the front and grow the buffer if
+            # that is still not enough.
+            length = self._end - self._start
+            if self._start:
+                self._buffer[:length] = self._buffer[self._start:self._end]
+                self._scan -= self._start
+                self._start, self._end = 0, length
+            if length + size > len(self._buffer):
+                self._buffer.extend(bytearray(length + size - len(self._buffer)))
+        view = memoryview(self._buffer)[self._end:self._end + size]
+        count = self._socket.recv_into(view)
+        del view  # Release the buffer so that it can be resized again.
+        self._end += count
+        return count
+
+    def _consume(self, length):
+        data = bytes(self._buffer[self._start:self._start + length])
+        self._start += length
+        if self._start == self._end:
+            self._start = self._end = 0
+            if len(self._buffer) > 4 * self.chunk_size:
+                # Don't hold on to the memory of a large payload.
+                self._buffer = bytearray(self.chunk_size)
+        self._scan = self._start
+        return data
+
+    def bind(self, *args, **kwargs):
+        return self._socket.bind(*args, **kwargs)
+
+    def connect(self, *args, **kwargs):
+        return self._socket.connect(*args, **kwargs)
+
+    def read(self, length):
+        """
+        Reads exactly *length* bytes. Less data is only returned if the
+        socket is closed before.
+        """
+
+        while self._end - self._start < length:
+            if not self._fill(length - (self._end - self._start)):
+                break
+        return self._consume(min(length, self._end - self._start))
+
+    def readline(self):
+        """
+        Reads up to and including the next line-feed character. Less data
+        is only returned if the socket is closed before.
+        """
+
+        while True:
+            index = self._buffer.find(b'\n', self._scan, self._end)
+            if index >= 0:
+                return self._consume(index + 1 - self._start)
+            self._scan = self._end
+            if not self._fill(0):
+                return self._consume(self._end - self._start)
+
+    def write(self, data):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            if not self.encoding:
+                raise ValueError('got str object and no encoding specified')
+            data = data.encode(self.encoding)
+
+        self._socket.sendall(data)
+        return len(data)
+
+    def close(self):
+        return self._socket.close()
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                    Request Handling and Server thread
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+import codecs, collections, errno, hashlib, math, select, socket, threading, time, traceback
+
+try:
+    import selectors
+except ImportError:
+    selectors = None
+
+#: The maximum size of the headers of a request before it is rejected.
+MAX_HEADER_SIZE = 65536
+
+class CodeCache(object):
+    """
+    A bounded LRU cache of code objects, keyed by the filename and the
+    SHA1 of the source code, so that a script that is sent again unchanged
+    does not need to be compiled again. Not thread-safe, scripts are only
+    compiled in the Cinema 4D main thread.
+
+    :param maxsize: The maximum number of code objects to keep.
+    :attr hits: The number of times a code object was found in the cache.
+    :attr misses: The number of times the source code had to be compiled.
+    """
+
+    def __init__(self, maxsize=64):
+        super(CodeCache, self).__init__()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._codes = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._codes)
+
+    def compile(self, source, filename):
+        """
+        Returns the code object for the *source* code (`bytes` or text),
+        compiling it if it is not in the cache.
+        """
+
+        is_bytes = isinstance(source, bytes)
+        data = source if is_bytes else source.encode('utf8')
+        key = (filename, hashlib.sha1(data).hexdigest(), is_bytes)
+        try:
+            code = self._codes.pop(key)
+        except KeyError:
+            code = compile(source, filename, 'exec')
+            self.misses += 1
+            while self._codes and len(self._codes) >= self.maxsize:
+                self._codes.popitem(last=False)
+        else:
+            self.hits += 1
+        if self.maxsize > 0:
+            self._codes[key] = code
+        return code
+
+    def clear(self):
+        """
+        Removes all code objects from the cache and resets the counters.
+        """
+
+        self._codes.clear()
+        self.hits = self.misses = 0
+
+#: The #CodeCache used by :meth:`SourceObject.execute` by default.
+code_cache = CodeCache()
+
+def percentile(values, p):
+    """
+    Returns the *p*-th percentile (0 to 100) of the sorted list *values*
+    using the nearest-rank method, or None if *values* is empty.
+    """
+
+    if not values:
+        return None
+    rank = int(math.ceil(p / 100.0 * len(values)))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+class LatencyStats(object):
+    """
+    Records latencies (in seconds), eg. from enqueuing a script until it
+    is executed. Percentiles are computed over the last *maxlen* samples.
+    """
+
+    def __init__(self, maxlen=1000):
+        super(LatencyStats, self).__init__()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=maxlen)
+
+    def __repr__(self):
+        if not self.count:
+            return '<LatencyStats count=0>'
+        return '<LatencyStats count={0} mean={1:.2f}ms p95={2:.2f}ms max={3:.2f}ms>'.format(
+            self.count, self.mean * 1e3, self.percentile(95) * 1e3, self.max * 1e3)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def add(self, latency):
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.samples.append(latency)
+
+    def percentile(self, p):
+        return percentile(sorted(self.samples), p)
+
+class SourceObject(object):
+    """
+    Represents source-code sent over from another machine or
+    process which can be executed later.
+    """
+
+    def __init__(self, addr, filename, source, origin):
+        super(SourceObject, self).__init__()
+        self.host, self.port = addr[:2]
+        self.filename = filename
+        self.source = source
+        self.origin = origin
+        self.enqueued_at = None
+
+    def __repr__(self):
+        return '<SourceObject "{0}" sent from "{1}" @ {2}:{3}>'.format(
+            self.filename, self.origin, self.host, self.port)
+
+    def execute(self, scope, cache=None):
+        """
+        Execute the source in the specified scope. The code is compiled
+        through the *cache*, which defaults to the global #code_cache.
+        """
+
+        if cache is None:
+            cache = code_cache
+        scope['__file__'] = self.filename
+        code = cache.compile(self.source, self.filename)
+        exec(code, scope)
+
+def parse_header_line(line, headers):
+    """
+    Parses a single header *line* (without the line-feed) into the
+    *headers* dictionary, see :func:`parse_headers`.
+    """
+
+    if isinstance(line, bytes):
+        line = line.decode('utf8', 'replace')
+    key, _, value = line.strip().partition(':')
+    key = key.rstrip().lower()
+    if key not in headers:
+        headers[key] = value.lstrip()
+
+def parse_headers(fp):
+    """
+    Parses HTTP-like headers into a dictionary until an empty line
+    is found. Invalid headers are ignored and if a header is found
+    twice, it won't overwrite its previous value. Header-keys are
+    converted to lower-case and stripped of whitespace at both ends.
+    """
+
+    headers = {}
+    while True:
+        line = fp.readline().strip()
+        if not line: break
+        parse_header_line(line, headers)
+
+    return headers
+
+def check_headers(headers, required_password):
+    """
+    Validates the *headers* of a request. Returns a tuple of
+    ``(status, content_length, encoding)`` where *status* is None
+    if the content of the request can be read.
+    """
+
+    # Get the password and validate it.
+    if required_password is not None:
+        passhash = hashlib.md5(required_password.encode('utf8')).hexdigest()
+        if passhash != headers.get('password'):
+            return 'invalid-password', None, None
+
+    # Get the content-length of the request.
+    try:
+        content_length = int(headers['content-length'])
+    except (KeyError, ValueError):
+        return 'invalid-request', None, None
+    if content_length < 0:
+        return 'invalid-request', None, None
+
+    # Get the encoding, default to binary.
+    encoding = headers.get('encoding', None)
+    if encoding is None:
+        encoding = 'binary'
+    else:
+        # default to binary if the encoding does not exist.
+        try: codecs.lookup(encoding)
+        except LookupError as exc:
+            encoding = 'binary'
+
+    return None, content_length, encoding
+
+def make_source(addr, headers, encoding, data):
+    """
+    Creates the :class:`SourceObject` for the content *data* of a
+    request. Returns a tuple of ``(status, source)``.
+    """
+
+    # Get the filename, origin and source code.
+    origin = headers.get('origin', 'unknown')
+    filename = headers.get('filename', 'untitled')
+    try:
+        source = data
+        if encoding != 'binary':
+            source = source.decode(encoding)
+    except (UnicodeDecodeError, LookupError) as exc:
+        # LookupError: a codec that exists, but does not decode to text.
+        return 'encoding-error', None
+
+    return 'ok', SourceObject(addr, filename, source, origin)
+
+def parse_request(conn, addr, required_password):
+    """
+    Communicates with the client parsing the headers and source
+    code that is to be queued to be executed any time soon. This
+    is a blocking alternative to the :class:`ServerThread`.
+
+    Writes on of these lines back to the client:
+
+    - status: invalid-password
+    - status: invalid-request
+    - status: encoding-error
+    - status: ok
+
+    :pass conn: The socket to the client.
+    :pass addr: The client address tuple.
+    :pass required_password: The password that must match the
+        password sent with the "Password" header (as encoded
+        utf8 converted to md5). Will be converted to md5 by
+        this function.
+    :return: :class:`SourceObject` or None
+    """
+
+    client = SocketFile(conn, encoding='utf8')
+    headers = parse_headers(client)
+    status, content_length, encoding = check_headers(headers, required_password)
+    if status is None:
+        data = client.read(content_length)
+        status, source = make_source(addr, headers, encoding, data)
+    else:
+        source = None
+    client.write('status: ' + status)
+    return source
+
+def socketpair():
+    """
+    Returns a pair of connected sockets. Falls back to connecting two
+    TCP sockets on the loopback interface where :func:`socket.socketpair`
+    is not available (Python 2 on Windows).
+    """
+
+    if hasattr(socket, 'socketpair'):
+        return socket.socketpair()
+    listener = socket.socket()
+    try:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        a = socket.create_connection(listener.getsockname())
+        b, _ = listener.accept()
+    finally:
+        listener.close()
+    return a, b
+
+EVENT_READ = 1
+EVENT_WRITE = 2
+
+SelectorKey = collections.namedtuple('SelectorKey', 'fileobj fd events data')
+
+class SelectSelector(object):
+    """
+    A minimal replacement for :class:`selectors.DefaultSelector` based
+    on :func:`select.select` for Python versions without the
+    :mod:`selectors` module.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    def register(self, fileobj, events, data=None):
+        key = SelectorKey(fileobj, fileobj.fileno(), events, data)
+        self._keys[fileobj] = key
+        return key
+
+    def modify(self, fileobj, events, data=None):
+        return self.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._keys.pop(fileobj)
+
+    def select(self, timeout=None):
+        rlist = [k.fileobj for k in self._keys.values() if k.events & EVENT_READ]
+        wlist = [k.fileobj for k in self._keys.values() if k.events & EVENT_WRITE]
+        rlist, wlist, _ = select.select(rlist, wlist, [], timeout)
+        ready = {}
+        for fileobj in rlist:
+            ready[fileobj] = EVENT_READ
+        for fileobj in wlist:
+            ready[fileobj] = ready.get(fileobj, 0) | EVENT_WRITE
+        return [(self._keys[f], mask) for f, mask in ready.items()]
+
+    def close(self):
+        self._keys.clear()
+
+if selectors is not None:
+    DefaultSelector = selectors.DefaultSelector
+    EVENT_READ, EVENT_WRITE = selectors.EVENT_READ, selectors.EVENT_WRITE
+else:
+    DefaultSelector = SelectSelector
+
+class Connection(object):
+    """
+    The state of a client connection in the :class:`ServerThread`.
+    Data is received into the :attr:`buffer` until a complete request
+    is available.
+    """
+
+    def __init__(self, sock, addr):
+        super(Connection, self).__init__()
+        self.sock = sock
+        self.addr = addr
+        self.buffer = bytearray()
+        self.scan = 0
+        self.headers = None
+        self.content_length = None
+        self.encoding = None
+        self.output = b''
+        self.close_after_output = False
+        self.keep_alive = False
+        self.authenticated = False
+
+    def __repr__(self):
+        return '<Connection {0}:{1}>'.format(*self.addr[:2])
+
+class ServerThread(threading.Thread):
+    """
+    When the thread is started, the thread binds a server to the
+    specified host and port accepting incoming source code, optionally
+    password protected, and appends it to the specified queue. A lock
+    for synchronization must be passed along with the queue.
+
+    The thread runs an event loop over non-blocking sockets, thus any
+    number of clients can send code at the same time, and a client that
+    is slow or stalls does not block the others. Setting :attr:`running`
+    to False wakes up the event loop immediately.
+
+    If specified, *notify* is called from the server thread whenever the
+    queue changes from empty to non-empty, so that the consumer of the
+    queue does not have to poll it.
+    """
+
+    def __init__(self, queue, queue_lock, host, port, password=None, notify=None):
+        super(ServerThread, self).__init__()
+        self._queue = queue
+        self._queue_lock = queue_lock
+        self._notify = notify
+        self._socket = None
+        self._addr = (host, port)
+        self._running = False
+        self._lock = threading.Lock()
+        self._password = password
+        self._selector = None
+        self._wakeup = None
+        self._connections = {}
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._running
+
+    @running.setter
+    def running(self, value):
+        with self._lock:
+            self._running = value
+        if not value:
+            self.wakeup()
+
+    @property
+    def address(self):
+        """
+        The address that the server is bound to (useful if it was
+        started with port 0).
+        """
+
+        return self._socket.getsockname()
+
+    def wakeup(self):
+        """
+        Wakes up the event loop from another thread.
+        """
+
+        if self._wakeup is not None:
+            try:
+                self._wakeup[1].send(b'\0')
+            except socket.error:
+                pass  # The buffer is full, the loop will wake up anyway.
+
+    def start(self):
+        self._socket = socket.socket()
+        try:
+            self._socket.bind(self._addr)
+            self._socket.listen(64)
+        except socket.error:
+            self._socket.close()
+            raise
+        self._socket.setblocking(False)
+        self._wakeup = socketpair()
+        self._wakeup[0].setblocking(False)
+        self._wakeup[1].setblocking(False)
+        self._selector = DefaultSelector()
+        self._selector.register(self._socket, EVENT_READ, self._accept)
+        self._selector.register(self._wakeup[0], EVENT_READ, self._drain_wakeup)
+        self.running = True
+        return super(ServerThread, self).start()
+
+    def run(self):
+        try:
+            while self.running:
+                for key, mask in self._selector.select():
+                    if isinstance(key.data, Connection):
+                        self._handle(key.data, mask)
+                    else:
+                        key.data()
+        finally:
+            for conn in list(self._connections.values()):
+                self._close(conn)
+            self._selector.close()
+            self._socket.close()
+            for sock in self._wakeup:
+                sock.close()
+
+    def enqueue(self, source):
+        """
+        Appends a :class:`SourceObject` to the queue and records the time
+        in its :attr:`~SourceObject.enqueued_at` attribute.
+        """
+
+        source.enqueued_at = time.time()
+        with self._queue_lock:
+            was_empty = not self._queue
+            self._queue.append(source)
+        if was_empty and self._notify is not None:
+            self._notify()
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup[0].recv(1024):
+                pass
+        except socket.error:
+            pass
+
+    def _accept(self):
+        # Accept all pending connections at once.
+        while True:
+            try:
+                sock, addr = self._socket.accept()
+            except socket.error as exc:
+                if exc.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                if exc.args[0] in (errno.ECONNABORTED, errno.EINTR):
+                    continue
+                raise
+            sock.setblocking(False)
+            conn = Connection(sock, addr)
+            self._connections[sock] = conn
+            self._selector.register(sock, EVENT_READ, conn)
+
+    def _close(self, conn):
+        self._connections.pop(conn.sock, None)
+        try:
+            self._selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+
+    def _handle(self, conn, mask):
+        try:
+            if mask & EVENT_READ:
+                data = conn.sock.recv(65536)
+                if not data:
+                    # The client closed its side of the connection, but it
+                    # may still wait for the statuses that are left to send.
+                    conn.close_after_output = True
+                    self._flush(conn)
+                    return
+                conn.buffer += data
+                self._process(conn)
+            if mask & EVENT_WRITE or conn.output:
+                self._flush(conn)
+        except socket.error as exc:
+            if exc.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                self._close(conn)
+        except Exception:
+            # An error for one connection must not stop the server for all
+            # the other clients.
+            traceback.print_exc()
+            self._close(conn)
+
+    def _process(self, conn):
+        """
+        Processes the requests received for *conn* so far. In keep-alive
+        mode, any number of requests may be waiting in the buffer.
+        """
+
+        buf = conn.buffer
+        start = 0
+        while not conn.close_after_output:
+            if conn.headers is None:
+                scan = max(conn.scan, start)
+                while True:
+                    index = buf.find(b'\n', scan)
+                    if index < 0:
+                        conn.scan = scan - start
+                        if len(buf) - start > MAX_HEADER_SIZE:
+                            self._respond(conn, 'invalid-request', close=True)
+                        break
+                    line = bytes(buf[scan:index]).strip()
+                    scan = index + 1
+                    if not line:
+                        break
+                if index < 0:
+                    break
+                headers = {}
+                for line in bytes(buf[start:scan]).split(b'\n'):
+                    if line.strip():
+                        parse_header_line(line, headers)
+                start = scan
+                conn.scan = 0
+                conn.headers = headers
+                if headers.get('connection', '').lower() == 'keep-alive':
+                    conn.keep_alive = True
+
+                # The password only has to be sent with the first request
+                # of a keep-alive connection.
+                password = None if conn.authenticated else self._password
+                status, conn.content_length, conn.encoding = \
+                    check_headers(headers, password)
+                if status is not None:
+                    self._respond(conn, status, close=True)
+                    break
+                conn.authenticated = True
+
+            if len(buf) - start < conn.content_length:
+                break
+            data = bytes(buf[start:start + conn.content_length])
+            start += conn.content_length
+            status, source = make_source(conn.addr, conn.headers, conn.encoding, data)
+            conn.headers = None
+            if source is not None:
+                self.enqueue(source)
+            self._respond(conn, status, close=not conn.keep_alive)
+
+        del buf[:start]
+
+    def _respond(self, conn, status, close):
+        line = 'status: ' + status
+        if conn.keep_alive:
+            line += '\n'
+        conn.output += line.encode('ascii')
+        if close:
+            conn.close_after_output = True
+
+    def _flush(self, conn):
+        if conn.output:
+            try:
+                sent = conn.sock.send(conn.output)
+            except socket.error as exc:
+                if exc.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                sent = 0
+            conn.output = conn.output[sent:]
+        if conn.output:
+            # Nothing is read anymore once the connection is to be closed.
+            events = EVENT_WRITE if conn.close_after_output else EVENT_READ | EVENT_WRITE
+            self._selector.modify(conn.sock, events, conn)
+        elif conn.close_after_output:
+            self._close(conn)
+        else:
+            self._selector.modify(conn.sock, EVENT_READ, conn)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                 Client
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def make_request(code, filename, origin, password=None, keep_alive=False):
+    """
+    Returns the bytes of a request that sends the source *code* (`bytes`
+    are sent as is, text is encoded as UTF-8) to the server.
+    """
+
+    if isinstance(code, bytes):
+        encoding = 'binary'
+    else:
+        encoding = 'utf8'
+        code = code.encode(encoding)
+    headers = ['Content-length: {0}'.format(len(code)),
+               'Encoding: {0}'.format(encoding),
+               'Filename: {0}'.format(filename),
+               'Origin: {0}'.format(origin)]
+    if keep_alive:
+        headers.append('Connection: keep-alive')
+    if password is not None:
+        passhash = hashlib.md5(password.encode('utf8')).hexdigest()
+        headers.append('Password: {0}'.format(passhash))
+    return ('\n'.join(headers) + '\n\n').encode('utf8') + code
+
+class Client(object):
+    """
+    A client for the Scripting Server that keeps its connection open, so
+    that any number of scripts can be sent without connecting and
+    authenticating again for every one of them. The connection is opened
+    with the first request.
+
+    :param host: The host of the server.
+    :param port: The port of the server.
+    :param password: The password of the server, or None.
+    :param origin: The origin that is reported to the server.
+    """
+
+    def __init__(self, host='localhost', port=2900, password=None, origin='c4ddev'):
+        super(Client, self).__init__()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.origin = origin
+        self._file = None
+        self._authenticated = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def connect(self):
+        if self._file is not None:
+            raise RuntimeError('already connected')
+        sock = socket.create_connection((self.host, self.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = SocketFile(sock)
+        self._authenticated = False
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _request(self, code, filename):
+        request = make_request(code, filename, self.origin,
+            None if self._authenticated else self.password,
+            keep_alive=not self._authenticated)
+        self._authenticated = True
+        return request
+
+    def _read_status(self):
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise socket.error('connection closed by the server')
+        status = line.decode('ascii').partition(':')[2].strip()
+        if status in ('invalid-password', 'invalid-request'):
+            self.close()  # The server closes the connection.
+        return status
+
+    def send(self, code, filename='untitled'):
+        """
+        Sends the source *code* (`bytes` are sent as is, text is encoded
+        as UTF-8) and returns the status, eg. `'ok'`.
+        """
+
+        return self.send_many([(code, filename)])[0]
+
+    def send_many(self, scripts, window=64):
+        """
+        Sends `(code, filename)` pairs from the iterable *scripts* with up
+        to *window* requests in flight before the status of the first of
+        them is read. Returns the list of statuses, which is shorter than
+        *scripts* if the server closed the connection.
+        """
+
+        if self._file is None:
+            self.connect()
+        statuses = []
+        pending = 0
+        for code, filename in scripts:
+            if self._file is None:
+                break
+            self._file.write(self._request(code, filename))
+            pending += 1
+            if pending >= window:
+                statuses.append(self._read_status())
+                pending -= 1
+        while pending and self._file is not None:
+            statuses.append(self._read_status())
+            pending -= 1
+        return statuses
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+#                                Benchmark
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+#: The phases of a request that are timed by #benchmark().
+BENCHMARK_PHASES = ('connect', 'auth', 'transfer', 'ack', 'total')
+
+def _benchmark_client(addr, password, requests, payload, keep_alive, times):
+    client = None
+    try:
+        for i in range(requests):
+            if client is None:
+                tstart = time.time()
+                sock = socket.create_connection(addr)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client = SocketFile(sock)
+                times['connect'].append(time.time() - tstart)
+                if keep_alive:
+                    # Authenticate the connection with an empty script.
+                    tstart = time.time()
+                    client.write(make_request(b'', 'send-bench', 'c4ddev send-bench',
+                        password, keep_alive=True))
+                    status = client.readline().partition(b':')[2].strip()
+                    if status != b'ok':
+                        raise RuntimeError(status.decode('ascii') or 'no status')
+                    times['auth'].append(time.time() - tstart)
+            tstart = time.time()
+            client.write(make_request(payload, 'send-bench.py', 'c4ddev send-bench',
+                None if keep_alive else password))
+            tsent = time.time()
+            status = client.readline().partition(b':')[2].strip()
+            tend = time.time()
+            if status != b'ok':
+                raise RuntimeError(status.decode('ascii') or 'no status')
+            times['transfer'].append(tsent - tstart)
+            times['ack'].append(tend - tsent)
+            times['total'].append(tend - tstart)
+            if not keep_alive:
+                client.close()
+                client = None
+    except (socket.error, RuntimeError) as exc:
+        times['errors'].append(exc)
+    finally:
+        if client is not None:
+            client.close()
+
+def benchmark(addr, password=None, clients=4, requests=100, size=1024, keep_alive=True):
+    """
+    Sends *requests* scripts of *size* bytes from each of *clients*
+    concurrent connections to the server at *addr*. With *keep_alive*,
+    every client connects and authenticates once, otherwise it connects
+    for every script.
+
+    Returns a dictionary with the number of `requests` that succeeded, the
+    `elapsed` wall time, a list of `errors` and the sorted list of times
+    (in seconds) for every phase in #BENCHMARK_PHASES. The `total` time
+    of a script is the time to `transfer` it plus the time until the
+    `ack`nowledgement was received.
+    """
+
+    # A Python comment, so the server can execute it if it wants to.
+    payload = b'#' * (size - 1) + b'\n' if size > 0 else b''
+    times = [collections.defaultdict(list) for i in range(clients)]
+    threads = [threading.Thread(target=_benchmark_client,
+        args=(addr, password, requests, payload, keep_alive, t)) for t in times]
+    tstart = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = {'elapsed': time.time() - tstart}
+    result['errors'] = [exc for t in times for exc in t['errors']]
+    for phase in BENCHMARK_PHASES:
+        result[phase] = sorted(x for t in times for x in t[phase])
+    result['requests'] = len(result['total'])
+    return result
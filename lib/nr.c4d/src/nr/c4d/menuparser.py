@@ -34,10 +34,10 @@ except ImportError:
 
 
 lexer_rules = [
-    nr.parse.Regex('comment', '#.*$', re.M, skip=True),
+    nr.parse.Regex('comment', '#.*$', re.M, skip=True, starts_with='#'),
     nr.parse.Regex('ws', '\s+', re.M, skip=True),
-    nr.parse.Regex('menu', 'MENU\\b'),
-    nr.parse.Regex('command', 'COMMAND\\b'),
+    nr.parse.Regex('menu', 'MENU\\b', starts_with='M'),
+    nr.parse.Regex('command', 'COMMAND\\b', starts_with='C'),
     nr.parse.Keyword('bopen', '{'),
     nr.parse.Keyword('bclose', '}'),
     nr.parse.Keyword('end', ';'),
@@ -341,7 +341,7 @@ def parse_string(data):
 def parse_fileobject(fl):
   ''' Parse a file-like object. Returns a #MenuContainer. '''
 
-  scanner = nr.parse.Scanner(fl.read())
+  scanner = nr.parse.StreamScanner(fl, encoding=None)
   lexer = nr.parse.Lexer(scanner, lexer_rules)
   parser = MenuParser()
   return parser.parse(lexer)
@@ -0,0 +1,97 @@
+"""
+Compares the throughput of the #nr.parse.Lexer in the normal and in the
+compiled mode, with and without the first character dispatch table, and
+#nr.parse.Lexer.tokenize_all() over the resource package and menu grammars.
+It also compares the memory that is held by a list of the #nr.parse.Token#s
+and by the #nr.parse.TokenArray of the same input.
+
+    python benchmarks/bench_lexer.py [--size 2000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import timeit
+import tracemalloc
+
+from grammars import GRAMMARS, parse
+
+
+def lex(text, rules, dispatch=True, tokenize_all=False, **kwargs):
+  lexer = parse.Lexer(parse.Scanner(text), rules, **kwargs)
+  if not dispatch:
+    # Try every rule at every position, like before the dispatch table.
+    lexer.dispatch = {}
+    lexer.dispatch_default = lexer.rules
+  if tokenize_all:
+    return len(lexer.tokenize_all())
+  return sum(1 for __ in lexer)
+
+
+def token_memory(text, rules, tokenize_all=False):
+  """
+  Returns the number of bytes that are allocated for the tokens of *text*
+  and still held once the tokenization is complete.
+  """
+
+  tracemalloc.start()
+  try:
+    lexer = parse.Lexer(parse.Scanner(text), rules)
+    if tokenize_all:
+      tokens = lexer.tokenize_all()
+    else:
+      tokens = [t for t in lexer if t.type != parse.eof]
+    del lexer
+    return tracemalloc.get_traced_memory()[0]
+  finally:
+    tracemalloc.stop()
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--size', type=int, default=2000,
+    help='number of symbols/commands in the generated input (default: 2000)')
+  parser.add_argument('--repeat', type=int, default=5,
+    help='number of repetitions, the best one is reported (default: 5)')
+  parser.add_argument('--stats', action='store_true',
+    help='print the per-rule statistics of the normal mode for every grammar')
+  args = parser.parse_args(argv)
+
+  for name, make_rules, make_text in GRAMMARS:
+    text = make_text(args.size)
+    rules = make_rules()
+    print('{0} grammar ({1} rules, {2} bytes)'.format(name, len(rules), len(text)))
+    baseline = None
+    modes = [
+      ('normal (no dispatch)', {'dispatch': False}),
+      ('normal', {}),
+      ('compiled (no dispatch)', {'compiled': True, 'dispatch': False}),
+      ('compiled', {'compiled': True}),
+      ('tokenize_all()', {'tokenize_all': True}),
+      ('compiled tokenize_all()', {'compiled': True, 'tokenize_all': True}),
+    ]
+    for label, kwargs in modes:
+      count = lex(text, rules, **kwargs)
+      seconds = min(timeit.repeat(lambda: lex(text, rules, **kwargs),
+        repeat=args.repeat, number=1))
+      baseline = baseline or seconds
+      print('  {0:<24} {1:>8} tokens {2:>10.2f} ms {3:>10.3f} us/token {4:>6.2f}x'.format(
+        label, count, seconds * 1e3, seconds / count * 1e6, baseline / seconds))
+    tokens_size = token_memory(text, rules)
+    array_size = token_memory(text, rules, tokenize_all=True)
+    print('  {0:<24} {1:>10.1f} KiB held by the list of Tokens'.format(
+      'memory', tokens_size / 1024.0))
+    print('  {0:<24} {1:>10.1f} KiB held by the TokenArray {2:>6.1f}x'.format(
+      '', array_size / 1024.0, tokens_size / float(array_size)))
+    if args.stats:
+      lexer = parse.Lexer(parse.Scanner(text), rules, stats=True)
+      for __ in lexer:
+        pass
+      print()
+      print(lexer.stats.report())
+      print()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,56 @@
+"""
+Compares re-tokenizing a whole resource package file with
+#nr.parse.Lexer.tokenize_all() against updating its tokens with
+#nr.parse.Lexer.relex() after single character edits.
+
+    python benchmarks/bench_relex.py [--size 3333] [--edits 200]
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import timeit
+
+from grammars import parse, resource_rules, resource_text
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--size', type=int, default=3333,
+    help='number of symbols in the generated input (default: 3333, ~10k lines)')
+  parser.add_argument('--edits', type=int, default=200,
+    help='number of single character edits (default: 200)')
+  args = parser.parse_args(argv)
+
+  text = resource_text(args.size)
+  rules = resource_rules()
+  lexer = parse.Lexer(parse.Scanner(text), rules, compiled=True)
+  tokens = lexer.tokenize_all()
+  full = min(timeit.repeat(
+    lambda: parse.Lexer(parse.Scanner(text), rules, compiled=True).tokenize_all(),
+    repeat=3, number=1))
+
+  # Type a character into a symbol and delete it again.
+  rnd = random.Random(42)
+  symbols = [i for i in range(len(tokens)) if tokens.type(i) == 'symbol']
+  offsets = [tokens.starts[rnd.choice(symbols)] + 1 for __ in range(args.edits)]
+  relexed = [0]
+  def edit():
+    for offset in offsets:
+      for removed, inserted in ((0, 'x'), (1, '')):
+        start, __, new_stop = lexer.relex(tokens, offset, removed, inserted)
+        relexed[0] += new_stop - start
+  seconds = timeit.timeit(edit, number=1) / (2 * len(offsets))
+  assert tokens.text == text
+
+  print('{0} lines, {1} tokens'.format(text.count('\n'), len(tokens)))
+  print('  tokenize_all()    {0:>10.2f} ms'.format(full * 1e3))
+  print('  relex() per edit  {0:>10.3f} ms ({1:.1f} tokens re-lexed on average)'.format(
+    seconds * 1e3, relexed[0] / (2.0 * len(offsets))))
+  print('  speedup           {0:>10.0f}x'.format(full / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmarks for the #nr.parse.Charset and #nr.parse.Keyword rules on
+long runs of matching characters, compared with the previous character by
+character implementations.
+
+    python benchmarks/bench_rules.py [--length 10000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import string
+import timeit
+
+from grammars import parse
+
+
+def legacy_charset_tokenize(rule, scanner):
+  if rule.at_column >= 0 and rule.at_column != scanner.colno:
+    return None
+  char = scanner.char
+  result = type(char)()
+  while char and char in rule.charset:
+    result += char
+    char = scanner.next()
+  return result
+
+
+def legacy_keyword_tokenize(rule, scanner):
+  string = rule.string if rule.case_sensitive else rule.string.lower()
+  char = scanner.char
+  result = type(char)()
+  for other_char in string:
+    if not rule.case_sensitive:
+      char = char.lower()
+    if char != other_char:
+      return None
+    result += char
+    char = scanner.next()
+  return result
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--length', type=int, default=10000,
+    help='length of the matched runs (default: 10000)')
+  parser.add_argument('--repeat', type=int, default=5,
+    help='number of repetitions, the best one is reported (default: 5)')
+  args = parser.parse_args(argv)
+
+  whitespace = parse.Charset('ws', string.whitespace)
+  symbol = parse.Charset('symbol', string.ascii_letters + '_' + string.digits)
+  keyword = parse.Keyword('kw', 'x' * min(args.length, 1000))
+  keyword_i = parse.Keyword('kw', 'X' * min(args.length, 1000), case_sensitive=False)
+  cases = [
+    ('Charset, whitespace block', whitespace, legacy_charset_tokenize,
+      (' ' * 79 + '\n') * (args.length // 80) + ';'),
+    ('Charset, long identifier', symbol, legacy_charset_tokenize,
+      'identifier_' * (args.length // 11) + ';'),
+    ('Keyword, case-sensitive', keyword, legacy_keyword_tokenize,
+      keyword.string + ';'),
+    ('Keyword, case-insensitive', keyword_i, legacy_keyword_tokenize,
+      keyword.string + ';'),
+  ]
+
+  for label, rule, legacy, text in cases:
+    print('{0} ({1} characters)'.format(label, len(text) - 1))
+    timings = []
+    for impl_label, tokenize in [('legacy', legacy), ('current', type(rule).tokenize)]:
+      def run():
+        scanner = parse.Scanner(text)
+        return tokenize(rule, scanner), scanner.cursor
+      result = run()
+      seconds = min(timeit.repeat(run, repeat=args.repeat, number=10)) / 10
+      timings.append((impl_label, seconds, result))
+    assert timings[0][2] == timings[1][2], 'implementations differ'
+    for impl_label, seconds, __ in timings:
+      print('  {0:<8} {1:>12.2f} us {2:>8.1f}x'.format(
+        impl_label, seconds * 1e6, timings[0][1] / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,46 @@
+"""
+Benchmarks random #nr.parse.Scanner.seek() calls on a large input with and
+without the line start index.
+
+    python benchmarks/bench_seek.py [--symbols 10000] [--seeks 2000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import timeit
+
+from grammars import parse, resource_text
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--symbols', type=int, default=10000)
+  parser.add_argument('--seeks', type=int, default=2000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  text = resource_text(args.symbols)
+  rnd = random.Random(42)
+  offsets = [rnd.randint(0, len(text)) for __ in range(args.seeks)]
+
+  def run(line_index):
+    scanner = parse.Scanner(text, line_index=line_index)
+    for offset in offsets:
+      scanner.seek(offset)
+    return scanner
+
+  assert run(True).cursor == run(False).cursor
+
+  print('{0} random seeks in {1} characters'.format(args.seeks, len(text)))
+  times = {}
+  for label, line_index in [('counting', False), ('line index', True)]:
+    times[label] = min(timeit.repeat(lambda: run(line_index),
+      repeat=args.repeat, number=1))
+    print('  {0:<12} {1:>10.2f} ms'.format(label, times[label] * 1e3))
+  print('  speedup      {0:>10.2f}x'.format(times['counting'] / times['line index']))
+
+
+if __name__ == '__main__':
+  main()
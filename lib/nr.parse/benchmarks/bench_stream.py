@@ -0,0 +1,64 @@
+"""
+Compares the time and peak memory of tokenizing a generated resource package
+file with a #nr.parse.Scanner over the file's contents and with a
+#nr.parse.StreamScanner over the file itself.
+
+    python benchmarks/bench_stream.py [--size 2000]
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from grammars import parse, resource_rules, resource_text
+
+
+def lex_scanner(filename, rules):
+  with io.open(filename, 'r', encoding='utf8') as fp:
+    scanner = parse.Scanner(fp.read())
+  return sum(1 for __ in parse.Lexer(scanner, rules, compiled=True))
+
+
+def lex_stream(filename, rules):
+  with open(filename, 'rb') as fp:
+    scanner = parse.StreamScanner(fp, 'utf8')
+    return sum(1 for __ in parse.Lexer(scanner, rules, compiled=True))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--size', type=int, default=2000,
+    help='number of symbols in the generated input (default: 2000)')
+  args = parser.parse_args(argv)
+
+  tempdir = tempfile.mkdtemp(prefix='bench_stream_')
+  try:
+    filename = os.path.join(tempdir, 'bench.rpkg')
+    with io.open(filename, 'w', encoding='utf8') as fp:
+      fp.write(resource_text(args.size))
+    rules = resource_rules()
+    print('{0} ({1} bytes)'.format(os.path.basename(filename), os.path.getsize(filename)))
+    for label, func in [('Scanner', lex_scanner), ('StreamScanner', lex_stream)]:
+      start = time.perf_counter()
+      count = func(filename, rules)
+      seconds = time.perf_counter() - start
+      # Measure the memory separately, tracing slows down the lexer.
+      tracemalloc.start()
+      func(filename, rules)
+      peak = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      print('  {0:<14} {1:>8} tokens {2:>10.2f} ms {3:>10.1f} KiB peak'.format(
+        label, count, seconds * 1e3, peak / 1024.0))
+  finally:
+    shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+  main()
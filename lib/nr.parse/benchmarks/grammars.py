@@ -0,0 +1,88 @@
+"""
+Grammars and input generators for the #nr.parse benchmarks. The rules are
+copies of `c4ddev.resource.ResourcePackage.Rules` and
+`nr.c4d.menuparser.lexer_rules`, the two main consumers of #nr.parse.
+"""
+
+import os
+import re
+import string
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr import parse
+
+
+def resource_rules():
+  return [
+    parse.Keyword('\n', '\n'),
+    parse.Keyword(':', ':'),
+    parse.Keyword('(', '('),
+    parse.Keyword(')', ')'),
+    parse.Keyword('SetPrefix', 'SetPrefix'),
+    parse.Charset('number', string.digits),
+    parse.Charset('symbol', string.ascii_letters + '_' + string.digits),
+    parse.Charset('indent', string.whitespace, at_column=0),
+    parse.Charset('ws', string.whitespace, skip=True),
+    parse.Regex('comment', '#.*$', re.M, skip=True, starts_with='#')
+  ]
+
+
+def menu_rules():
+  return [
+    parse.Regex('comment', '#.*$', re.M, skip=True, starts_with='#'),
+    parse.Regex('ws', '\\s+', re.M, skip=True),
+    parse.Regex('menu', 'MENU\\b', starts_with='M'),
+    parse.Regex('command', 'COMMAND\\b', starts_with='C'),
+    parse.Keyword('bopen', '{'),
+    parse.Keyword('bclose', '}'),
+    parse.Keyword('end', ';'),
+    parse.Charset('sep', '-'),
+    parse.Charset('symbol', string.ascii_letters + '_' + string.digits),
+    parse.Charset('number', string.digits)
+  ]
+
+
+def resource_text(num_symbols):
+  """
+  Generates a `.rpkg` file with *num_symbols* symbols and localizations.
+  """
+
+  lines = ['ResourcePackage(Obench)', '']
+  for i in range(num_symbols):
+    if i % 50 == 0:
+      lines.append('# Group {0}'.format(i // 50))
+      lines.append('SetPrefix(BENCH_GROUP_{0}_)'.format(i // 50))
+    lines.append('SYMBOL_{0}: {1}'.format(i, 1000 + i))
+    lines.append('  us: Symbol number {0}'.format(i))
+    lines.append('  de: Symbol Nummer {0}'.format(i))
+  return '\n'.join(lines) + '\n'
+
+
+def menu_text(num_commands):
+  """
+  Generates a `.menu` file with *num_commands* commands in nested menus.
+  """
+
+  lines = ['MENU M_ROOT {']
+  for i in range(num_commands):
+    if i % 20 == 0:
+      if i:
+        lines.append('  }')
+      lines.append('  # Sub menu {0}'.format(i // 20))
+      lines.append('  MENU M_SUB_{0} {{'.format(i // 20))
+    if i % 7 == 6:
+      lines.append('    --------;')
+    if i % 2:
+      lines.append('    COMMAND {0};'.format(1000000 + i))
+    else:
+      lines.append('    COMMAND IDM_COMMAND_{0};'.format(i))
+  lines.append('  }')
+  lines.append('}')
+  return '\n'.join(lines) + '\n'
+
+
+GRAMMARS = [
+  ('resource', resource_rules, resource_text),
+  ('menu', menu_rules, menu_text),
+]
@@ -39,14 +39,21 @@ stream of #Token#s using a set of #Rule#s.
 __author__ = 'Niklas Rosenstein <rosensteinniklas@gmail.com>'
 __version__ = '1.0.0'
 
+import array
+import bisect
+import codecs
+import io
 import string
 import nr.types
 import os
 import re
 import sys
+import time
 
 eof = 'eof'
 string_types = (str,) if sys.version_info[0] == 3 else (str, unicode)
+integer_types = (int,) if sys.version_info[0] == 3 else (int, long)
+_clock = getattr(time, 'perf_counter', time.time)
 
 Cursor = nr.types.Record.new('Cursor', 'index lineno colno')
 Token = nr.types.Record.new('Token', 'type cursor value string_repr')
@@ -61,6 +68,12 @@ class Scanner(object):
   # Parameters
   text (str): The text to parse. Must be a `str` in Python 3 and may also be
     a `unicode` object in Python 2.
+  line_index (bool): Whether to use an index of line start offsets to
+    compute line and column numbers in #seek() and #cursor_at(). The index
+    is built lazily on first use and turns these operations into a binary
+    search. If #None, the index is used only if the *text* is at least
+    #LINE_INDEX_THRESHOLD characters long. If #False, the line and column
+    numbers are always counted from the nearest known position.
 
   # Attributes
 
@@ -73,13 +86,19 @@ class Scanner(object):
     an empty string at the end of the #text.
   """
 
-  def __init__(self, text):
+  #: The minimum length of the text for which the line index is used
+  #: when the *line_index* parameter is #None.
+  LINE_INDEX_THRESHOLD = 4096
+
+  def __init__(self, text, line_index=None):
     if not isinstance(text, string_types):
       raise TypeError('expected str or unicode', type(text))
     self.text = text
     self.index = 0
     self.lineno = 1
     self.colno = 0
+    self.line_index = line_index
+    self._line_starts = (None, None)
 
   def __repr__(self):
     return '<Scanner at {0}:{0}>'.format(self.lineno, self.colno)
@@ -116,6 +135,10 @@ class Scanner(object):
 
     Otherwise, if *renew* is set to False, it will be decided if counting from
     the start is shorter than counting from the current cursor position.
+
+    If the line index is enabled (see the *line_index* parameter), the line
+    and column numbers are looked up in the index instead and the *renew*
+    parameter has no effect.
     """
 
     mapping = {os.SEEK_SET: 'set', os.SEEK_CUR: 'cur', os.SEEK_END: 'end'}
@@ -140,6 +163,12 @@ class Scanner(object):
     if self.index == offset:
       return
 
+    line_starts = self._get_line_starts()
+    if line_starts is not None:
+      self.index = offset
+      self.lineno, self.colno = self._lookup_line(line_starts, offset)
+      return
+
     # Figure which path is shorter:
     # 1) Start counting from the beginning of the file,
     if offset <= abs(self.index - offset):
@@ -161,19 +190,9 @@ class Scanner(object):
       text, index, lineno, colno = self.text, self.index, self.lineno, self.colno
 
       if offset < index:  # backwards
-        while index != offset:
-          nli = text.rfind('\n', 0, index)
-          if nli < 0 or nli <= offset:
-            if text[offset] == '\n':
-              assert (offset - nli) == 0, (offset, nli)
-              nli = text.rfind('\n', 0, index-1)
-              lineno -= 1
-            colno = offset - nli - 1
-            index = offset
-            break
-          else:
-            lineno -= 1
-            index = nli - 1
+        lineno -= text.count('\n', offset, index)
+        colno = offset - text.rfind('\n', 0, offset) - 1
+        index = offset
       else:  # forwards
         while index != offset:
           nli = text.find('\n', index)
@@ -181,6 +200,7 @@ class Scanner(object):
             colno = offset - index
             index = offset
           else:
+            colno = 0
             lineno += 1
             index = nli + 1
 
@@ -189,6 +209,45 @@ class Scanner(object):
     assert index == offset
     self.index, self.lineno, self.colno = index, lineno, colno
 
+  def _get_line_starts(self):
+    """
+    Returns an array of the offsets at which the lines in the #text start,
+    or #None if the line index is not used for this Scanner.
+    """
+
+    use_index = self.line_index
+    if use_index is None:
+      use_index = len(self.text) >= self.LINE_INDEX_THRESHOLD
+    if not use_index:
+      return None
+    text, line_starts = self._line_starts
+    if text is not self.text:
+      line_starts = array.array('l', [0])
+      line_starts.extend(m.end() for m in re.finditer('\n', self.text))
+      self._line_starts = (self.text, line_starts)
+    return line_starts
+
+  @staticmethod
+  def _lookup_line(line_starts, offset):
+    lineno = bisect.bisect_right(line_starts, offset)
+    return lineno, offset - line_starts[lineno - 1]
+
+  def cursor_at(self, index):
+    """
+    Returns the #Cursor for the absolute *index* in the #text without moving
+    the Scanner. The *index* is clipped to the bounds of the text. Uses the
+    line index if available, otherwise the lines up to *index* are counted.
+    """
+
+    index = max(0, min(index, len(self.text)))
+    line_starts = self._get_line_starts()
+    if line_starts is not None:
+      lineno, colno = self._lookup_line(line_starts, index)
+      return Cursor(index, lineno, colno)
+    lineno = self.text.count('\n', 0, index) + 1
+    colno = index - self.text.rfind('\n', 0, index) - 1
+    return Cursor(index, lineno, colno)
+
   def next(self):
     " Move on to the next character in the text. "
 
@@ -201,6 +260,11 @@ class Scanner(object):
     self.index += 1
     return self.char
 
+  def peek(self, count):
+    " Returns up to *count* characters from the current position. "
+
+    return self.text[self.index:self.index + count]
+
   def readline(self):
     " Reads a full line from the scanner and returns it. "
 
@@ -235,7 +299,16 @@ class Scanner(object):
     match = regex.match(self.text, self.index)
     if not match:
       return None
-    start, end = match.start(), match.end()
+    self._forward(match.end())
+    return match
+
+  def _forward(self, end):
+    """
+    Moves the cursor forward to the index *end*, counting the passed lines
+    at once rather than character by character.
+    """
+
+    start = self.index
     lines = self.text.count('\n', start, end)
     self.index = end
     if lines:
@@ -243,7 +316,6 @@ class Scanner(object):
       self.lineno += lines
     else:
       self.colno += end - start
-    return match
 
   def getmatch(self, regex, group=0, flags=0):
     """
@@ -257,13 +329,254 @@ class Scanner(object):
     return None
 
   def restore(self, cursor):
-    " Moves the scanner back (or forward) to the specified cursor location. "
+    """
+    Moves the scanner back (or forward) to the specified cursor location.
+    *cursor* may also be an absolute index in the text, in which case the
+    line and column numbers are determined with #seek().
+    """
 
+    if isinstance(cursor, integer_types) and not isinstance(cursor, bool):
+      self.seek(cursor)
+      return
     if not isinstance(cursor, Cursor):
       raise TypeError('expected Cursor object', type(cursor))
     self.index, self.lineno, self.colno = cursor
 
 
+class StreamScanner(Scanner):
+  """
+  A #Scanner that reads its input incrementally from a file-like object
+  (anything with a `read(size)` method, including `mmap.mmap` objects) and
+  only keeps a bounded window of the input in memory. This allows large
+  inputs to be tokenized with constant memory.
+
+  Every match is guaranteed to see at least *lookahead* characters from the
+  current position (or the rest of the input). Matches that reach the end of
+  the buffered window are retried with more input, thus tokens may be longer
+  than that, but patterns can not look further ahead than *lookahead*
+  characters to decide whether they match.
+
+  When more input is read, everything up to *backtrack* characters before
+  the current position is kept. #restore() and #seek() raise a #ValueError
+  for positions that have already been discarded. Seeking relative to the
+  end of the input is not supported.
+
+  Rules must access the input through #match(), #peek(), #readline() and
+  #char since there is no #Scanner.text attribute. Note that the positions
+  of match objects returned by #match() are relative to the #buffer.
+
+  # Parameters
+  fp (file-like): The file to read from. If it returns bytes, they are
+    decoded with the *encoding* and `\r\n` and `\r` are translated to `\n`.
+  encoding (str): The encoding of binary input. If #None, binary input is
+    not decoded (which is only supported in Python 2).
+  chunk_size (int): The number of characters or bytes to read at once.
+  lookahead (int): The minimum number of characters available for a match.
+    Defaults to the *chunk_size*.
+  backtrack (int): The number of characters before the current position
+    that are kept when the buffer is refilled.
+
+  # Attributes
+  buffer (str): The currently buffered window of the input.
+  offset (int): The absolute index of the first character in the #buffer.
+  eof (bool): #True if the end of the input has been read into the buffer.
+  """
+
+  def __init__(self, fp, encoding='utf8', chunk_size=65536, lookahead=None,
+               backtrack=65536):
+    if chunk_size <= 0:
+      raise ValueError('chunk_size must be positive', chunk_size)
+    self.fp = fp
+    self.encoding = encoding
+    self.chunk_size = chunk_size
+    self.lookahead = chunk_size if lookahead is None else lookahead
+    self.backtrack = backtrack
+    self.buffer = None
+    self.offset = 0
+    self.eof = False
+    self.index = 0
+    self.lineno = 1
+    self.colno = 0
+    # Line and column number of the first character in the buffer.
+    self._base = (1, 0)
+    self._decoder = None
+    if encoding:
+      self._decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(encoding)(), translate=True)
+    self._fill(self.lookahead)
+
+  def __bool__(self):
+    self._fill(1)
+    return self.index - self.offset < len(self.buffer)
+
+  __nonzero__ = __bool__  # Python 2
+
+  @property
+  def char(self):
+    self._fill(1)
+    return self.buffer[self.index - self.offset:self.index - self.offset + 1]
+
+  def _read(self):
+    """
+    Reads the next chunk from the file and returns it decoded. Sets #eof
+    when the end of the file is reached.
+    """
+
+    data = self.fp.read(self.chunk_size)
+    if not data:
+      self.eof = True
+    if isinstance(data, bytes) and self._decoder is not None:
+      data = self._decoder.decode(data, final=self.eof)
+    return data
+
+  def _fill(self, count):
+    """
+    Ensures that at least *count* characters from the current position are
+    in the #buffer, unless the end of the input is reached. Characters more
+    than #backtrack characters before the current position are discarded.
+    """
+
+    if self.buffer is None:
+      self.buffer = self._read()
+    pos = self.index - self.offset
+    if self.eof or len(self.buffer) - pos >= count:
+      return
+
+    discard = max(0, pos - self.backtrack)
+    if discard:
+      lineno, colno = self._base
+      lines = self.buffer.count('\n', 0, discard)
+      if lines:
+        colno = discard - self.buffer.rfind('\n', 0, discard) - 1
+        lineno += lines
+      else:
+        colno += discard
+      self._base = (lineno, colno)
+
+    parts = [self.buffer[discard:]]
+    available = len(parts[0]) - (pos - discard)
+    while available < count and not self.eof:
+      data = self._read()
+      parts.append(data)
+      available += len(data)
+    self.buffer = parts[0][0:0].join(parts)
+    self.offset += discard
+
+  def seek(self, offset, mode='set', renew=False):
+    """
+    Moves the cursor to or by *offset* like #Scanner.seek(). Only positions
+    within the backtrack window can be reached backwards, and the `'end'`
+    mode is not supported.
+
+    # Raises
+    ValueError: If the position is not available anymore.
+    """
+
+    mapping = {os.SEEK_SET: 'set', os.SEEK_CUR: 'cur', os.SEEK_END: 'end'}
+    mode = mapping.get(mode, mode)
+    if mode not in ('set', 'cur'):
+      raise ValueError('invalid mode: "{}"'.format(mode))
+    if mode == 'cur':
+      offset = self.index + offset
+    self.index, self.lineno, self.colno = self.cursor_at(max(0, offset))
+
+  def cursor_at(self, index):
+    """
+    Returns the #Cursor for the absolute *index* without moving the scanner.
+    The *index* is clipped to the end of the input.
+
+    # Raises
+    ValueError: If the *index* is not available anymore.
+    """
+
+    if index < self.offset:
+      raise ValueError('position is outside of the backtrack window', index)
+    if index > self.index:
+      self._fill(index - self.index)
+    pos = min(index - self.offset, len(self.buffer))
+    lineno, colno = self._base
+    lines = self.buffer.count('\n', 0, pos)
+    if lines:
+      colno = pos - self.buffer.rfind('\n', 0, pos) - 1
+      lineno += lines
+    else:
+      colno += pos
+    return Cursor(self.offset + pos, lineno, colno)
+
+  def peek(self, count):
+    " Returns up to *count* characters from the current position. "
+
+    self._fill(count)
+    pos = self.index - self.offset
+    return self.buffer[pos:pos + count]
+
+  def readline(self):
+    " Reads a full line from the scanner and returns it. "
+
+    count = self.lookahead
+    while True:
+      self._fill(count)
+      pos = self.index - self.offset
+      end = self.buffer.find('\n', pos)
+      if end >= 0 or self.eof:
+        break
+      count = 2 * max(count, len(self.buffer) - pos)
+    end = len(self.buffer) if end < 0 else end + 1
+    result = self.buffer[pos:end]
+    self._forward(self.offset + end)
+    return result
+
+  def match(self, regex, flags=0):
+    """
+    Matches the specified *regex* from the current position like
+    #Scanner.match(). The match object refers to the #buffer.
+    """
+
+    if isinstance(regex, str):
+      regex = re.compile(regex, flags)
+    count = self.lookahead
+    while True:
+      self._fill(count)
+      pos = self.index - self.offset
+      match = regex.match(self.buffer, pos)
+      if match is None or self.eof or match.end() < len(self.buffer):
+        break
+      # The match may continue with more input.
+      count = 2 * max(count, len(self.buffer) - pos)
+    if not match:
+      return None
+    self._forward(self.offset + match.end())
+    return match
+
+  def _forward(self, end):
+    start = self.index - self.offset
+    stop = end - self.offset
+    lines = self.buffer.count('\n', start, stop)
+    self.index = end
+    if lines:
+      self.colno = stop - self.buffer.rfind('\n', start, stop) - 1
+      self.lineno += lines
+    else:
+      self.colno += stop - start
+
+  def restore(self, cursor):
+    """
+    Moves the scanner to the specified cursor location or absolute index.
+
+    # Raises
+    ValueError: If the position is not available anymore.
+    """
+
+    if isinstance(cursor, integer_types) and not isinstance(cursor, bool):
+      self.seek(cursor)
+      return
+    if not isinstance(cursor, Cursor):
+      raise TypeError('expected Cursor object', type(cursor))
+    if cursor.index < self.offset:
+      raise ValueError('cursor is outside of the backtrack window', cursor)
+    self.index, self.lineno, self.colno = cursor
+
+
 class Lexer(object):
   """
   This class is used to split text into #Token#s using a #Scanner and a list
@@ -273,10 +586,36 @@ class Lexer(object):
   scanner (Scanner): The scanner to read from.
   rules (list of Rule): A list of rules to match. The order in the list
     determines the order in which the rules are matched.
+  compiled (bool): Enable the compiled mode. See #compiled.
+  stats (bool): Collect statistics about the rules. See #stats.
 
   # Attributes
   scanner (Scanner):
   rules (list of Rule):
+  compiled (bool):
+    If #True, consecutive #Regex, #Keyword and #Charset rules are combined
+    into a single regular expression with one alternative per rule, so that
+    finding the next token requires only one match instead of one
+    #Rule.tokenize() call per rule. The generated tokens are identical to
+    the ones produced in the normal mode. Rules that can not be combined
+    (eg. custom #Rule subclasses or regular expressions with named groups or
+    backreferences) are still matched individually in their place. Weighted
+    expectations (see #next()) always use the normal mode. Note that the
+    compiled mode is not necessarily faster: the normal mode only tries the
+    rules in #dispatch for the current character, which is often cheaper
+    than the combined expression (see `benchmarks/bench_lexer.py`, the
+    normal mode is faster for the resource package grammar).
+  stats (LexerStats):
+    If not #None, the Lexer records how often each rule is attempted, hits,
+    fails and how much time it takes. While statistics are collected, the
+    rules are always matched individually (ie. not in the #compiled mode),
+    since a combined match can not be attributed to the single rules.
+  dispatch (dict of (str, list of Rule)):
+    Maps a character to the subsequence of #rules that can match at that
+    character, based on #Rule.first_chars(). Built by #update().
+  dispatch_default (list of Rule):
+    The rules that are tried at characters not in #dispatch, ie. the rules
+    that don't know their first characters. Built by #update().
   rules_map (dict of (object, Rule)):
     A dictionary mapping the rule name to the rule object. This is
     automatically built when the Lexer is created. If the #rules
@@ -290,9 +629,11 @@ class Lexer(object):
     the token is type #eof.
   """
 
-  def __init__(self, scanner, rules=None):
+  def __init__(self, scanner, rules=None, compiled=False, stats=False):
     self.scanner = scanner
     self.rules = list(rules) if rules else []
+    self.compiled = compiled
+    self.stats = LexerStats() if stats else None
     self.update()
     self.token = None
 
@@ -326,12 +667,296 @@ class Lexer(object):
 
     self.rules_map = {}
     self.skippable_rules = []
+    self._compiled_segments = {}
+    self._compiled_columns = set()
+    first_chars = []
     for rule in self.rules:
       if not isinstance(rule, Rule):
         raise TypeError('item must be Rule instance', type(rule))
       self.rules_map.setdefault(rule.name, []).append(rule)
       if rule.skip:
         self.skippable_rules.append(rule)
+      if isinstance(rule, Charset) and rule.at_column >= 0:
+        self._compiled_columns.add(rule.at_column)
+      first_chars.append(rule.first_chars())
+
+    # Map every character that a rule declares as its first character to
+    # the rules that can match at that character, keeping their order.
+    # Rules that don't declare their first characters are always included.
+    pairs = list(zip(self.rules, first_chars))
+    self.dispatch_default = [r for r, chars in pairs if chars is None]
+    self.dispatch = {}
+    for char in set().union(*[c for c in first_chars if c]):
+      self.dispatch[char] = [r for r, chars in pairs if chars is None or char in chars]
+
+  def _get_compiled_segments(self, colno, char):
+    """
+    Returns a list of the segments for the compiled mode that apply at the
+    column *colno* and the character *char*. A segment is either a single
+    #Rule that needs to be matched individually or a tuple of a compiled
+    pattern and a dictionary that maps group indices to the #Rule of the
+    alternative. The segments are built once per distinct set of active
+    #Charset.at_column rules and entry in the #dispatch table.
+    """
+
+    column = colno if colno in self._compiled_columns else -1
+    if char not in self.dispatch:
+      char = None
+    try:
+      return self._compiled_segments[(column, char)]
+    except KeyError:
+      pass
+
+    segments = []
+    pieces = []
+    piece_rules = []
+    num_groups = [0]
+
+    def flush():
+      if pieces:
+        try:
+          regex = re.compile('|'.join(pieces))
+        except re.error:
+          # Match the rules individually if they can't be combined after all.
+          segments.extend(piece_rules)
+        else:
+          groups = dict((regex.groupindex['_r{0}'.format(i)], r) for i, r in enumerate(piece_rules))
+          segments.append((regex, groups))
+      del pieces[:]
+      del piece_rules[:]
+      num_groups[0] = 0
+
+    rules = self.dispatch_default if char is None else self.dispatch[char]
+    for rule in rules:
+      try:
+        pattern, groups = _rule_to_pattern(rule, column)
+      except _NotCombinable:
+        flush()
+        segments.append(rule)
+        continue
+      if pattern is None:
+        continue  # The rule can never match here.
+      if _max_groups is not None and num_groups[0] + groups + 1 > _max_groups:
+        flush()
+      pieces.append('(?P<_r{0}>{1})'.format(len(pieces), pattern))
+      piece_rules.append(rule)
+      num_groups[0] += groups + 1
+    flush()
+
+    self._compiled_segments[(column, char)] = segments
+    return segments
+
+  def _tokenize_any(self, cursor):
+    """
+    Matches the #rules from the current position of the scanner, like
+    #next() without weighted expectations. Returns a tuple of the matched
+    #Rule and the value returned by its #Rule.tokenize() method, or
+    `(None, None)`.
+    """
+
+    stats = self.stats
+    if self.compiled and stats is None:
+      return self._tokenize_compiled(cursor)
+    scanner = self.scanner
+    for rule in self.dispatch.get(scanner.char, self.dispatch_default):
+      if stats is None:
+        value = rule.tokenize(scanner)
+      else:
+        value = stats.tokenize(rule, scanner, cursor)
+      if value:
+        return rule, value
+      scanner.restore(cursor)
+    return None, None
+
+  def _tokenize_compiled(self, cursor):
+    """
+    Matches the #rules in compiled mode from the current position of the
+    scanner. Returns a tuple of the matched #Rule and the value that its
+    #Rule.tokenize() method would have returned, or `(None, None)`.
+    """
+
+    scanner = self.scanner
+    for segment in self._get_compiled_segments(cursor.colno, scanner.char):
+      if isinstance(segment, Rule):
+        value = segment.tokenize(scanner)
+        if value:
+          return segment, value
+        scanner.restore(cursor)
+        continue
+
+      regex, groups = segment
+      match = scanner.match(regex)
+      if match is None:
+        continue
+      rule = groups[match.lastindex]
+      if match.end() == match.start():
+        # The generic mode would skip the empty match and try the next
+        # rules, so do the same for the remainder of this segment.
+        scanner.restore(cursor)
+        rules = [groups[k] for k in sorted(groups)]
+        for rule in rules[rules.index(rule):]:
+          value = rule.tokenize(scanner)
+          if value:
+            return rule, value
+          scanner.restore(cursor)
+        continue
+      if isinstance(rule, Regex):
+        result = rule.regex.match(match.string, match.start())
+        return rule, (result, result.group())
+      elif isinstance(rule, Keyword) and not rule.case_sensitive:
+        return rule, match.group().lower()
+      return rule, match.group()
+
+    return None, None
+
+  def tokenize_all(self):
+    """
+    Tokenizes the remaining input of the scanner at once and returns a
+    #TokenArray. Skippable tokens are dropped. This is considerably cheaper
+    than iterating over the Lexer since no #Token objects are created until
+    they are accessed in the returned array. Afterwards, the #token is the
+    #eof token.
+
+    The scanner must hold the whole input in memory (ie. it can not be a
+    #StreamScanner), since the tokens are materialized from its text.
+
+    # Raises
+    TokenizationError: if a token could not be generated from the current
+      position of the Scanner.
+    """
+
+    try:
+      text = self.scanner.text
+    except AttributeError:
+      raise TypeError('tokenize_all() requires the whole input in the scanner')
+
+    tokens = TokenArray(text, self.rules)
+    for rule_id, cursor, end, value in self._scan_tokens():
+      tokens._append(rule_id, cursor, end, value)
+    self.token = Token(eof, self.scanner.cursor, None, None)
+    return tokens
+
+  def _scan_tokens(self):
+    """
+    Generates the non-skippable tokens from the current position of the
+    scanner until the end of the input as tuples of the rule's index in
+    #rules, the start #Cursor, the end offset and the value of the token
+    (as a tuple of value and string representation), or #None if the value
+    can be derived from the text (see #TokenArray.value()).
+    """
+
+    rule_ids = dict((id(rule), i) for i, rule in enumerate(self.rules))
+    derivable = set(id(rule) for rule in self.rules if _derivable_value(rule))
+    scanner = self.scanner
+    while scanner:
+      cursor = scanner.cursor
+      rule, value = self._tokenize_any(cursor)
+      if not value:
+        self.token = Token(None, cursor, scanner.char, None)
+        raise TokenizationError(self.token)
+      if rule.skip:
+        continue
+      if type(value) is Token:
+        value = (value.value, value.string_repr)
+      elif id(rule) in derivable:
+        value = None
+      elif not isinstance(value, tuple):
+        value = (value, None)
+      yield rule_ids[id(rule)], cursor, scanner.index, value
+
+  def relex(self, tokens, offset, removed, inserted):
+    """
+    Updates the #TokenArray *tokens* that was created by #tokenize_all()
+    (or a previous call to this method) with the same #rules after an edit
+    to its text, replacing *removed* characters at *offset* by the string
+    *inserted*. Only the tokens around the edit are lexed again: from the
+    token before the first token touched by the edit until a new token
+    coincides with an old token behind the edit (at the same offset, line
+    and column number relative to the edit). The remaining old tokens are
+    reused and only moved.
+
+    This assumes that no rule looks ahead beyond the end of the token that
+    follows the token it matches.
+
+    Afterwards the #scanner is a #Scanner over the edited text at the end of
+    the re-lexed range and the #token is the #eof token.
+
+    # Returns
+    A tuple `(start, old_stop, new_stop)` that describes the changed range:
+    the old tokens `start` to `old_stop` were replaced by the new tokens
+    `start` to `new_stop`.
+
+    # Raises
+    ValueError: if the edit is not within the text or the *tokens* were
+      created with other rules.
+    TokenizationError: if the edited text can not be tokenized.
+    """
+
+    text = tokens.text
+    if offset < 0 or removed < 0 or offset + removed > len(text):
+      raise ValueError('edit is outside of the text', offset, removed)
+    if tokens.rules is not self.rules and list(tokens.rules) != self.rules:
+      raise ValueError('tokens were created with other rules')
+
+    new_text = text[:offset] + inserted + text[offset + removed:]
+    delta = len(inserted) - removed
+    line_delta = inserted.count('\n') - text.count('\n', offset, offset + removed)
+    edit_end = offset + removed  # End of the edit in the old text.
+
+    # Restart from the token before the first token that ends at or after
+    # the edit. Before the first token, the text contains only skippable
+    # tokens, so we start from the beginning.
+    start = tokens._bisect_ends(offset) - 1
+    scanner = Scanner(new_text)
+    if start > 0:
+      scanner.restore(Cursor(tokens._start(start), tokens._lineno(start), tokens.colnos[start]))
+    else:
+      start = 0
+    self.scanner = scanner
+
+    # From here on, the old tokens from the start index on are shifted.
+    tokens._move_gap(start)
+    old_delta, old_line_delta = tokens._shift
+    old_starts, old_ends, old_linenos = tokens._starts, tokens._ends, tokens._linenos
+    delta += old_delta
+    line_delta += old_line_delta
+
+    new = TokenArray(new_text, self.rules)
+    old_index = bisect.bisect_left(old_starts, edit_end - old_delta, start)
+    old_stop = len(tokens)
+    for rule_id, cursor, end, value in self._scan_tokens():
+      if cursor.index >= offset + len(inserted):
+        # Find the first old token behind the edit that could be the same.
+        while old_index < old_stop and old_starts[old_index] + delta < cursor.index:
+          old_index += 1
+        if old_index < old_stop and old_starts[old_index] + delta == cursor.index \
+            and tokens.types[old_index] == rule_id \
+            and old_ends[old_index] + delta == end \
+            and old_linenos[old_index] + line_delta == cursor.lineno \
+            and tokens.colnos[old_index] == cursor.colno \
+            and tokens.values.get(old_index) == value:
+          old_stop = old_index
+          break
+      new._append(rule_id, cursor, end, value)
+
+    # Splice the new tokens in, the old tokens behind them are shifted.
+    new_stop = start + len(new)
+    tokens.types[start:old_stop] = new.types
+    tokens.colnos[start:old_stop] = new.colnos
+    old_starts[start:old_stop] = new._starts
+    old_ends[start:old_stop] = new._ends
+    old_linenos[start:old_stop] = new._linenos
+    tokens._gap = new_stop
+    tokens._shift = (delta, line_delta)
+    if tokens.values or new.values:
+      values = dict((k, v) for k, v in tokens.values.items() if k < start)
+      values.update((start + k, v) for k, v in new.values.items())
+      values.update((k - old_stop + new_stop, v) for k, v in tokens.values.items() if k >= old_stop)
+      tokens.values = values
+    tokens.text = new_text
+
+    self.token = Token(eof, scanner.cursor, None, None)
+    return start, old_stop, new_stop
 
   def expect(self, *names):
     """
@@ -432,7 +1057,10 @@ class Lexer(object):
           if rules is None:
             raise ValueError('unknown rule', rule_name)
           for rule in rules:
-            value = rule.tokenize(self.scanner)
+            if self.stats is None:
+              value = rule.tokenize(self.scanner)
+            else:
+              value = self.stats.tokenize(rule, self.scanner, cursor)
             if value:
               break
           if value:
@@ -450,14 +1078,22 @@ class Lexer(object):
           check_rules = self.skippable_rules
         else:
           check_rules = self.rules
-        for rule in check_rules:
-          if weighted and expectation and rule.name in expectation:
-            # Skip rules that we already tried.
-            continue
-          value = rule.tokenize(self.scanner)
-          if value:
-            break
-          self.scanner.restore(cursor)
+        if not weighted:
+          rule, value = self._tokenize_any(cursor)
+        else:
+          if check_rules is self.rules:
+            check_rules = self.dispatch.get(self.scanner.char, self.dispatch_default)
+          for rule in check_rules:
+            if weighted and expectation and rule.name in expectation:
+              # Skip rules that we already tried.
+              continue
+            if self.stats is None:
+              value = rule.tokenize(self.scanner)
+            else:
+              value = self.stats.tokenize(rule, self.scanner, cursor)
+            if value:
+              break
+            self.scanner.restore(cursor)
 
       if not value:
         if as_accept:
@@ -482,6 +1118,8 @@ class Lexer(object):
           # If we didn't expect this rule to match but are just accepting
           # instead of expecting, restore to the original location and stop.
           self.scanner.restore(cursor)
+          if self.stats is not None:
+            self.stats.get(rule.name).restores += 1
           return None
 
     self.token = token
@@ -498,6 +1136,102 @@ class Lexer(object):
     return token
 
 
+class RuleStats(object):
+  """
+  Statistics about a rule name, collected by #LexerStats.
+
+  # Attributes
+  attempts (int): The number of times the rule was tried.
+  hits (int): The number of times the rule matched.
+  failures (int): The number of times the rule did not match.
+  restores (int): The number of times the scanner had to be restored after
+    the rule consumed input, ie. after failures that moved the scanner and
+    after matches that were rejected by #Lexer.accept().
+  time (float): The cumulative time spent in #Rule.tokenize() in seconds.
+  """
+
+  __slots__ = ('attempts', 'hits', 'failures', 'restores', 'time')
+
+  def __init__(self):
+    self.attempts = 0
+    self.hits = 0
+    self.failures = 0
+    self.restores = 0
+    self.time = 0.0
+
+  def __repr__(self):
+    return '<RuleStats attempts={0} hits={1} failures={2} restores={3} time={4:.6f}>'\
+      .format(self.attempts, self.hits, self.failures, self.restores, self.time)
+
+
+class LexerStats(object):
+  """
+  Collects #RuleStats per rule name for a #Lexer. Rules with the same name
+  are accumulated.
+
+  # Attributes
+  rules (dict of (str, RuleStats)): The statistics per rule name.
+  """
+
+  def __init__(self):
+    self.rules = {}
+
+  def __repr__(self):
+    return '<LexerStats for {0} rules>'.format(len(self.rules))
+
+  def get(self, name):
+    " Returns the #RuleStats for the rule *name*, creating it if necessary. "
+
+    try:
+      return self.rules[name]
+    except KeyError:
+      self.rules[name] = stats = RuleStats()
+      return stats
+
+  def reset(self):
+    " Discards all statistics. "
+
+    self.rules.clear()
+
+  def tokenize(self, rule, scanner, cursor):
+    """
+    Calls #Rule.tokenize() and records the attempt. *cursor* must be the
+    position of the *scanner* before the call.
+    """
+
+    start = _clock()
+    value = rule.tokenize(scanner)
+    elapsed = _clock() - start
+    stats = self.get(rule.name)
+    stats.attempts += 1
+    stats.time += elapsed
+    if value:
+      stats.hits += 1
+    else:
+      stats.failures += 1
+      if scanner.index != cursor.index:
+        stats.restores += 1
+    return value
+
+  def report(self):
+    """
+    Returns a table of the statistics as a string, sorted by the time spent
+    in every rule.
+    """
+
+    lines = ['{0:<20} {1:>10} {2:>10} {3:>10} {4:>10} {5:>12} {6:>12}'.format(
+      'rule', 'attempts', 'hits', 'failures', 'restores', 'time (ms)', 'us/attempt')]
+    items = sorted(self.rules.items(), key=lambda x: (-x[1].time, str(x[0])))
+    for name, stats in items:
+      if not isinstance(name, string_types) or name.split() != [name]:
+        name = repr(name)
+      per_attempt = stats.time / stats.attempts * 1e6 if stats.attempts else 0.0
+      lines.append('{0:<20} {1:>10} {2:>10} {3:>10} {4:>10} {5:>12.3f} {6:>12.3f}'.format(
+        name, stats.attempts, stats.hits, stats.failures, stats.restores,
+        stats.time * 1e3, per_attempt))
+    return '\n'.join(lines)
+
+
 class Rule(object):
   """
   Base class for rule objects that are capable of extracting a #Token from
@@ -515,6 +1249,16 @@ class Rule(object):
     self.name = name
     self.skip = skip
 
+  def first_chars(self):
+    """
+    Returns a set of the characters that a token matched by this rule can
+    start with, or #None if the rule can start with any character. The
+    #Lexer uses this to skip rules that can not match at the current
+    character.
+    """
+
+    return None
+
   def tokenize(self, scanner):
     """
     Attempt to extract a token from the position of the *scanner* and return it.
@@ -537,13 +1281,20 @@ class Regex(Rule):
 
   # Attributes
   regex (Pattern): A compiled regular expression.
+  starts_with (frozenset of str): The characters that a match of the #regex
+    can start with, if declared. Allows the #Lexer to skip the rule at all
+    other characters. If #None, the rule is tried at every position.
   """
 
-  def __init__(self, name, regex, flags=0, skip=False):
+  def __init__(self, name, regex, flags=0, skip=False, starts_with=None):
     super(Regex, self).__init__(name, skip)
     if isinstance(regex, string_types):
       regex = re.compile(regex, flags)
     self.regex = regex
+    self.starts_with = None if starts_with is None else frozenset(starts_with)
+
+  def first_chars(self):
+    return self.starts_with
 
   def tokenize(self, scanner):
     result = scanner.match(self.regex)
@@ -567,17 +1318,36 @@ class Keyword(Rule):
     self.string = string
     self.case_sensitive = case_sensitive
 
+  def pattern(self):
+    """
+    Returns a regular expression pattern string that matches the same input
+    as this rule, or #None if the rule can never match.
+    """
+
+    if not self.string:
+      return None
+    if not self.case_sensitive:
+      return '(?i:{0})'.format(re.escape(self.string.lower()))
+    return re.escape(self.string)
+
+  def first_chars(self):
+    if not self.string:
+      return frozenset()
+    char = self.string[0]
+    if self.case_sensitive:
+      return frozenset([char])
+    if ord(char) < 128:
+      return frozenset([char.lower(), char.upper()])
+    return None  # Case folding of non-ASCII characters is not 1:1.
+
   def tokenize(self, scanner):
     string = self.string if self.case_sensitive else self.string.lower()
-    char = scanner.char
-    result = type(char)()
-    for other_char in string:
-      if not self.case_sensitive:
-        char = char.lower()
-      if char != other_char:
-        return None
-      result += char
-      char = scanner.next()
+    result = scanner.peek(len(string))
+    if not self.case_sensitive:
+      result = result.lower()
+    if result != string:
+      return None
+    scanner._forward(scanner.index + len(result))
     return result
 
 
@@ -597,16 +1367,264 @@ class Charset(Rule):
     super(Charset, self).__init__(name, skip)
     self.charset = frozenset(charset)
     self.at_column = at_column
+    self._regex = (None, None)
+
+  def pattern(self):
+    """
+    Returns a regular expression pattern string that matches the same input
+    as this rule (ignoring #at_column), or #None if the rule can never match.
+    """
+
+    # Only single characters can ever be matched by the Charset.
+    chars = ''.join(re.escape(c) for c in sorted(self.charset) if len(c) == 1)
+    if not chars:
+      return None
+    return '[{0}]+'.format(chars)
+
+  def first_chars(self):
+    return frozenset(c for c in self.charset if len(c) == 1)
 
   def tokenize(self, scanner):
     if self.at_column >= 0 and self.at_column != scanner.colno:
       return None
-    char = scanner.char
-    result = type(char)()
-    while char and char in self.charset:
-      result += char
-      char = scanner.next()
-    return result
+    charset, regex = self._regex
+    if charset is not self.charset:
+      pattern = self.pattern()
+      regex = re.compile(pattern) if pattern else None
+      self._regex = (self.charset, regex)
+    match = scanner.match(regex) if regex else None
+    if not match:
+      return scanner.peek(0)
+    return match.group()
+
+
+class TokenArray(object):
+  """
+  A compact sequence of tokens as returned by #Lexer.tokenize_all(). The
+  tokens are stored in parallel arrays and #Token objects are only created
+  when they are accessed by index or iteration.
+
+  After #Lexer.relex(), the offsets and line numbers of the tokens behind
+  the edit are not updated in the arrays immediately but shifted on access
+  (like the gap in a gap buffer), so that consecutive edits close to each
+  other don't need to touch all tokens. Accessing the #starts, #ends or
+  #linenos arrays applies the pending shift.
+
+  # Attributes
+  text (str): The tokenized text.
+  rules (list of Rule): The rules of the #Lexer. The type id of a token is
+    the index of the rule that matched it in this list.
+  types (array of int): The type id of every token.
+  starts (array of int): The start offset of every token in the #text.
+  ends (array of int): The end offset of every token in the #text.
+  linenos (array of int): The line number at the start of every token.
+  colnos (array of int): The column number at the start of every token.
+  values (dict of (int, tuple)): Maps the index of tokens whose value can
+    not be derived from the #text (eg. tokens of custom rules) to a tuple
+    of their value and string representation.
+  """
+
+  def __init__(self, text, rules):
+    self.text = text
+    self.rules = rules
+    self.types = array.array('i')
+    self.colnos = array.array('l')
+    self.values = {}
+    self._starts = array.array('l')
+    self._ends = array.array('l')
+    self._linenos = array.array('l')
+    # The offset and line shift pending for the tokens from index _gap on.
+    self._gap = 0
+    self._shift = (0, 0)
+
+  def __repr__(self):
+    return '<TokenArray of {0} tokens>'.format(len(self.types))
+
+  def _append(self, rule_id, cursor, end, value):
+    if value is not None:
+      self.values[len(self.types)] = value
+    self.types.append(rule_id)
+    self._starts.append(cursor.index)
+    self._ends.append(end)
+    self._linenos.append(cursor.lineno)
+    self.colnos.append(cursor.colno)
+    if self._shift == (0, 0):
+      self._gap = len(self.types)
+
+  def _move_gap(self, index):
+    """
+    Moves the start of the pending shift to *index*, applying it to or
+    removing it from the tokens in between.
+    """
+
+    gap, (delta, line_delta) = self._gap, self._shift
+    if index == gap:
+      return
+    if (delta, line_delta) != (0, 0):
+      lo, hi = min(index, gap), max(index, gap)
+      if index < gap:
+        delta, line_delta = -delta, -line_delta
+      for arr, value in ((self._starts, delta), (self._ends, delta), (self._linenos, line_delta)):
+        if value:
+          arr[lo:hi] = array.array('l', [x + value for x in arr[lo:hi]])
+    self._gap = index
+
+  @property
+  def starts(self):
+    self._move_gap(len(self.types))
+    return self._starts
+
+  @property
+  def ends(self):
+    self._move_gap(len(self.types))
+    return self._ends
+
+  @property
+  def linenos(self):
+    self._move_gap(len(self.types))
+    return self._linenos
+
+  def _get(self, arr, index, shift):
+    if index >= self._gap:
+      return arr[index] + shift
+    return arr[index]
+
+  def _start(self, index):
+    return self._get(self._starts, index, self._shift[0])
+
+  def _end(self, index):
+    return self._get(self._ends, index, self._shift[0])
+
+  def _lineno(self, index):
+    return self._get(self._linenos, index, self._shift[1])
+
+  def _bisect_ends(self, offset):
+    " Returns the index of the first token that ends at or after *offset*. "
+
+    gap = self._gap
+    index = bisect.bisect_left(self._ends, offset, 0, gap)
+    if index < gap:
+      return index
+    return bisect.bisect_left(self._ends, offset - self._shift[0], gap, len(self.types))
+
+  def __len__(self):
+    return len(self.types)
+
+  def __iter__(self):
+    for index in range(len(self.types)):
+      yield self[index]
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(*index.indices(len(self.types)))]
+    if index < 0:
+      index += len(self.types)
+    rule = self.rules[self.types[index]]
+    cursor = Cursor(self._start(index), self._lineno(index), self.colnos[index])
+    try:
+      value, string_repr = self.values[index]
+    except KeyError:
+      value, string_repr = self.value(index), None
+      if isinstance(rule, Regex):
+        string_repr = value.group()
+    return Token(rule.name, cursor, value, string_repr)
+
+  def type(self, index):
+    " Returns the type (ie. rule name) of the token at *index*. "
+
+    return self.rules[self.types[index]].name
+
+  def string(self, index):
+    " Returns the text of the token at *index*. "
+
+    return self.text[self._start(index):self._end(index)]
+
+  def value(self, index):
+    " Returns the #Token.value of the token at *index*. "
+
+    try:
+      return self.values[index][0]
+    except KeyError:
+      pass
+    rule = self.rules[self.types[index]]
+    if isinstance(rule, Regex):
+      return rule.regex.match(self.text, self._start(index))
+    string = self.string(index)
+    if isinstance(rule, Keyword) and not rule.case_sensitive:
+      string = string.lower()
+    return string
+
+
+def _derivable_value(rule):
+  """
+  Returns #True if the value that *rule* produces for a token can be
+  derived from the text of the token.
+  """
+
+  for cls in (Regex, Keyword, Charset):
+    if isinstance(rule, cls):
+      return not _overrides(rule, cls, 'tokenize')
+  return False
+
+
+class _NotCombinable(Exception):
+  pass
+
+
+# Python versions before 3.5 only support 100 groups in a pattern.
+_max_groups = 99 if sys.version_info < (3, 5) else None
+
+# Flags that can be applied to a part of a pattern with (?flags:...).
+_scoped_flags = [(re.I, 'i'), (re.M, 'm'), (re.S, 's'), (re.X, 'x')]
+
+
+def _overrides(rule, cls, name):
+  " Returns #True if the type of *rule* overrides the method *name* of *cls*. "
+
+  func = getattr(type(rule), name)
+  base = getattr(cls, name)
+  return getattr(func, '__func__', func) is not getattr(base, '__func__', base)
+
+
+def _rule_to_pattern(rule, colno):
+  """
+  Converts a #Regex, #Keyword or #Charset *rule* to a pattern string that
+  matches the same input as the rule would at the column *colno* (which
+  is -1 if no #Charset.at_column rule applies). Returns a tuple of the
+  pattern and the number of groups in it. The pattern is #None if the rule
+  can never match. Raises #_NotCombinable for all other rules.
+  """
+
+  if isinstance(rule, Regex) and not _overrides(rule, Regex, 'tokenize'):
+    regex = rule.regex
+    if not isinstance(regex.pattern, string_types) or regex.groupindex \
+        or re.search(r'\\[1-9]|\(\?P=', regex.pattern) \
+        or re.match(r'\(\?[aiLmsux]+\)', regex.pattern):
+      # Global inline flags are only allowed at the start of the pattern.
+      raise _NotCombinable
+    flags = regex.flags & ~re.U
+    letters = ''
+    for flag, letter in _scoped_flags:
+      if flags & flag:
+        letters += letter
+        flags &= ~flag
+    if flags or (letters and sys.version_info < (3, 6)):
+      raise _NotCombinable
+    if letters:
+      return '(?{0}:{1})'.format(letters, regex.pattern), regex.groups
+    return regex.pattern, regex.groups
+
+  elif isinstance(rule, Keyword) and not _overrides(rule, Keyword, 'tokenize'):
+    if rule.string and not rule.case_sensitive and sys.version_info < (3, 6):
+      raise _NotCombinable
+    return rule.pattern(), 0
+
+  elif isinstance(rule, Charset) and not _overrides(rule, Charset, 'tokenize'):
+    if rule.at_column >= 0 and rule.at_column != colno:
+      return None, 0
+    return rule.pattern(), 0
+
+  raise _NotCombinable
 
 
 class TokenizationError(Exception):
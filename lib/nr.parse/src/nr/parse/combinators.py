@@ -0,0 +1,372 @@
+# -*- coding: utf8 -*-
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""
+Parser combinators with packrat memoization over a #TokenArray as returned
+by #Lexer.tokenize_all(). Since the input is lexed up front and the result
+of every parser is memoized per token index, backtracking never lexes or
+parses the same region twice and parsing is linear in the number of tokens
+(for grammars without left recursion, which is not supported).
+
+```python
+from nr import parse
+from nr.parse.combinators import token, sequence, choice, repeat, optional
+
+rules = [parse.Charset('symbol', string.ascii_letters),
+         parse.Keyword('=', '='), parse.Charset('ws', ' \\n', skip=True)]
+assignment = sequence(token('symbol'), token('='), token('symbol'))
+program = repeat(assignment.map(lambda x: (x[0].value, x[2].value)))
+
+tokens = parse.Lexer(parse.Scanner('a = b c = d'), rules).tokenize_all()
+program.parse(tokens)  # [('a', 'b'), ('c', 'd')]
+```
+
+When parsing fails, a #ParseError is raised for the farthest token index
+that any parser got to, along with the names of the tokens (or named
+parsers, see #Parser.named()) that were expected there.
+"""
+
+from . import Scanner, Token, eof
+
+__all__ = ['ParseError', 'Parser', 'token', 'end', 'sequence', 'choice',
+           'repeat', 'optional', 'Forward']
+
+
+class ParseError(Exception):
+  """
+  Raised by #Parser.parse() if the tokens do not match the grammar.
+
+  # Attributes
+  index (int): The index of the token at which parsing failed. This is the
+    farthest index that was reached by any parser.
+  expected (list of str): The names of the tokens or parsers that were
+    expected at the #index, sorted.
+  token (Token): The token at the #index. At the end of the tokens, this is
+    an #eof token.
+  """
+
+  def __init__(self, index, expected, token):
+    self.index = index
+    self.expected = sorted(expected, key=str)
+    self.token = token
+
+  def __str__(self):
+    cursor = self.token.cursor
+    if self.token.type == eof:
+      got = 'end of input'
+    else:
+      got = '{0!r} ({1!r})'.format(self.token.type, self.token.string_repr or self.token.value)
+    return 'at {0}:{1}: expected {2}, got {3}'.format(
+      cursor.lineno, cursor.colno, ' or '.join(map(repr, self.expected)), got)
+
+
+class _State(object):
+  " The state of a single #Parser.parse() call. "
+
+  def __init__(self, tokens):
+    self.tokens = tokens
+    self.types = tokens.types
+    self.length = len(tokens)
+    self.memo = {}
+    self.type_ids = {}
+    self.farthest = 0
+    self.expected = set()
+
+  def get_type_ids(self, name):
+    " Returns the set of rule indices in the #TokenArray for the token *name*. "
+
+    try:
+      return self.type_ids[name]
+    except KeyError:
+      ids = frozenset(i for i, rule in enumerate(self.tokens.rules) if rule.name == name)
+      self.type_ids[name] = ids
+      return ids
+
+  def fail(self, index, name):
+    " Records that *name* was expected at the token *index*. "
+
+    if index > self.farthest:
+      self.farthest = index
+      self.expected = set([name])
+    elif index == self.farthest:
+      self.expected.add(name)
+
+  def error(self):
+    tokens, index = self.tokens, self.farthest
+    if index < self.length:
+      token = tokens[index]
+    else:
+      token = Token(eof, Scanner(tokens.text).cursor_at(len(tokens.text)), None, None)
+    return ParseError(index, self.expected, token)
+
+
+class Parser(object):
+  """
+  Base class for parsers. A parser matches the tokens from a given index
+  and produces a value. Subclasses implement #_match().
+
+  # Attributes
+  name (str): A name for the parser that is reported in a #ParseError
+    instead of the tokens it expects, if set with #named().
+  """
+
+  name = None
+
+  def __repr__(self):
+    if self.name is not None:
+      return '<{0} {1!r}>'.format(type(self).__name__, self.name)
+    return '<{0}>'.format(type(self).__name__)
+
+  def _match(self, state, index):
+    """
+    Matches the tokens from *index* on. Returns a tuple of the value and the
+    index after the matched tokens, or #None if the parser does not match.
+    Must not be called directly, use #_apply() for memoization.
+    """
+
+    raise NotImplementedError
+
+  def _apply(self, state, index):
+    key = (id(self), index)
+    try:
+      return state.memo[key]
+    except KeyError:
+      pass
+    if self.name is None:
+      result = self._match(state, index)
+    else:
+      # Report the name instead of what the parser expected internally if
+      # it failed without getting past its first token.
+      farthest, expected = state.farthest, set(state.expected)
+      result = self._match(state, index)
+      if result is None and state.farthest == index:
+        state.expected = (expected if farthest == index else set()) | set([self.name])
+    state.memo[key] = result
+    return result
+
+  def parse(self, tokens, complete=True):
+    """
+    Parses the #TokenArray *tokens* and returns the value of the parser.
+
+    # Parameters
+    tokens (TokenArray): The tokens to parse.
+    complete (bool): Require that the parser matches all tokens.
+
+    # Raises
+    ParseError: If the tokens do not match.
+    """
+
+    state = _State(tokens)
+    parser = sequence(self, end()).map(lambda x: x[0]) if complete else self
+    result = parser._apply(state, 0)
+    if result is None:
+      raise state.error()
+    return result[0]
+
+  def map(self, func):
+    " Returns a parser that passes the value of this parser through *func*. "
+
+    return _Map(self, func)
+
+  def named(self, name):
+    """
+    Sets the #name of the parser that is reported in a #ParseError when the
+    parser fails at its first token. Returns the parser itself.
+    """
+
+    self.name = name
+    return self
+
+
+class _Map(Parser):
+
+  def __init__(self, parser, func):
+    self.parser = parser
+    self.func = func
+
+  def _match(self, state, index):
+    result = self.parser._apply(state, index)
+    if result is None:
+      return None
+    return self.func(result[0]), result[1]
+
+
+class _Token(Parser):
+
+  def __init__(self, type, string=None):
+    self.type = type
+    self.string = string
+
+  def __repr__(self):
+    if self.string is not None:
+      return '<token {0!r} {1!r}>'.format(self.type, self.string)
+    return '<token {0!r}>'.format(self.type)
+
+  def _match(self, state, index):
+    if index < state.length and state.types[index] in state.get_type_ids(self.type):
+      if self.string is None or state.tokens.string(index) == self.string:
+        return state.tokens[index], index + 1
+    state.fail(index, self.type if self.string is None else self.string)
+    return None
+
+
+class _End(Parser):
+
+  def _match(self, state, index):
+    if index == state.length:
+      return None, index
+    state.fail(index, eof)
+    return None
+
+
+class _Sequence(Parser):
+
+  def __init__(self, parsers):
+    self.parsers = parsers
+
+  def _match(self, state, index):
+    values = []
+    for parser in self.parsers:
+      result = parser._apply(state, index)
+      if result is None:
+        return None
+      values.append(result[0])
+      index = result[1]
+    return values, index
+
+
+class _Choice(Parser):
+
+  def __init__(self, parsers):
+    self.parsers = parsers
+
+  def _match(self, state, index):
+    for parser in self.parsers:
+      result = parser._apply(state, index)
+      if result is not None:
+        return result
+    return None
+
+
+class _Repeat(Parser):
+
+  def __init__(self, parser, min, max):
+    self.parser = parser
+    self.min = min
+    self.max = max
+
+  def _match(self, state, index):
+    values = []
+    while self.max is None or len(values) < self.max:
+      result = self.parser._apply(state, index)
+      if result is None:
+        break
+      values.append(result[0])
+      if result[1] == index:
+        break  # The parser matched nothing, it would match again forever.
+      index = result[1]
+    if len(values) < self.min:
+      return None
+    return values, index
+
+
+class _Optional(Parser):
+
+  def __init__(self, parser, default):
+    self.parser = parser
+    self.default = default
+
+  def _match(self, state, index):
+    result = self.parser._apply(state, index)
+    if result is None:
+      return self.default, index
+    return result
+
+
+class Forward(Parser):
+  """
+  A placeholder for a parser that is defined later with #define(), to build
+  recursive grammars.
+  """
+
+  def __init__(self):
+    self.parser = None
+
+  def define(self, parser):
+    " Sets the parser that this forward declaration stands for. "
+
+    self.parser = parser
+    return self
+
+  def _match(self, state, index):
+    if self.parser is None:
+      raise RuntimeError('Forward parser was not defined')
+    return self.parser._apply(state, index)
+
+
+def token(type, string=None):
+  """
+  Returns a parser that matches a single token of the rule name *type* (and
+  the text *string*, if specified). Its value is the #Token.
+  """
+
+  return _Token(type, string)
+
+
+def end():
+  " Returns a parser that matches the end of the tokens. Its value is #None. "
+
+  return _End()
+
+
+def sequence(*parsers):
+  " Returns a parser that matches all *parsers* in order. Its value is a list. "
+
+  return _Sequence(parsers)
+
+
+def choice(*parsers):
+  """
+  Returns a parser that matches the first of the *parsers* that matches
+  (ordered choice). Its value is the value of that parser.
+  """
+
+  return _Choice(parsers)
+
+
+def repeat(parser, min=0, max=None):
+  """
+  Returns a parser that matches *parser* at least *min* and at most *max*
+  times (unbounded if #None). Its value is a list.
+  """
+
+  return _Repeat(parser, min, max)
+
+
+def optional(parser, default=None):
+  """
+  Returns a parser that matches *parser* or nothing. Its value is the value
+  of the *parser* or *default*.
+  """
+
+  return _Optional(parser, default)
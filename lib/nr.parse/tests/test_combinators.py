@@ -0,0 +1,84 @@
+
+import string
+from nose.tools import *
+from nr import parse
+from nr.parse.combinators import *
+
+rules = [
+  parse.Keyword('(', '('),
+  parse.Keyword(')', ')'),
+  parse.Keyword(',', ','),
+  parse.Charset('number', string.digits),
+  parse.Charset('symbol', string.ascii_letters + '_'),
+  parse.Charset('ws', ' \n', skip=True),
+]
+
+
+def _tokens(text):
+  return parse.Lexer(parse.Scanner(text), rules).tokenize_all()
+
+
+def _grammar(calls=None):
+  expr = Forward()
+  args = sequence(expr, repeat(sequence(token(','), expr).map(lambda x: x[1])))\
+    .map(lambda x: [x[0]] + x[1])
+  call = sequence(token('symbol'), token('('), optional(args, []), token(')'))\
+    .map(lambda x: (x[0].value, x[2]))
+  number = token('number').map(lambda x: int(x.value))
+  symbol = token('symbol').map(lambda x: x.value)
+  if calls is not None:
+    symbol = symbol.map(lambda x: calls.append(x) or x)
+  expr.define(choice(call, number, symbol).named('expression'))
+  return repeat(expr)
+
+
+def test_combinators():
+  grammar = _grammar()
+  assert_equal(grammar.parse(_tokens('f(1, g(a), h()) 42 x')),
+    [('f', [1, ('g', ['a']), ('h', [])]), 42, 'x'])
+  assert_equal(grammar.parse(_tokens('')), [])
+  assert_equal(token('symbol', 'foo').parse(_tokens('foo')).value, 'foo')
+  assert_equal(repeat(token('number'), 1, 2).parse(_tokens('1 2 3'), complete=False)[-1].value, '2')
+
+
+def test_memoization():
+  # The symbol is tried as a call first, then parsed again as a plain
+  # symbol from the same token index; the memo makes this a lookup.
+  calls = []
+  grammar = _grammar(calls)
+  assert_equal(grammar.parse(_tokens('a b c(d)')), ['a', 'b', ('c', ['d'])])
+  assert_equal(calls, ['a', 'b', 'd'])
+
+  # Alternatives with a common nested prefix are exponential without the
+  # memoization: every level parses the inner expression twice.
+  numbers = []
+  expr = Forward()
+  nested = sequence(token('('), expr, token(')'))
+  expr.define(choice(
+    sequence(nested, token(',')),
+    nested,
+    token('number').map(lambda x: numbers.append(x) or int(x.value))))
+  depth = 25
+  assert expr.parse(_tokens('(' * depth + '1' + ')' * depth))
+  assert_equal(len(numbers), 1)
+
+
+def test_errors():
+  grammar = _grammar()
+  with assert_raises(ParseError) as cm:
+    grammar.parse(_tokens('f(1,\n  2 3)'))
+  exc = cm.exception
+  assert_equal(exc.index, 5)
+  assert_equal(exc.expected, [')', ','])
+  assert_equal(exc.token.type, 'number')
+  assert_equal(str(exc), "at 2:4: expected ')' or ',', got 'number' ('3')")
+
+  with assert_raises(ParseError) as cm:
+    grammar.parse(_tokens('f(1,'))
+  assert_equal(cm.exception.expected, ['expression'])
+  assert_equal(cm.exception.token.type, parse.eof)
+  assert_equal(str(cm.exception), "at 1:4: expected 'expression', got end of input")
+
+  with assert_raises(ParseError) as cm:
+    grammar.parse(_tokens('x )'))
+  assert_equal(cm.exception.expected, ['(', 'eof', 'expression'])
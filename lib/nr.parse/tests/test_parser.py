@@ -47,3 +47,316 @@ def test_seek():
   s.seek(-20, 'cur')
   assert_equal(s.char, 'f')
   assert_equal(s.cursor, parse.Cursor(0, 1, 0))
+
+
+def test_seek_line_index():
+  text = 'foo\n\nbar\nspam\n'
+  indexed = parse.Scanner(text, line_index=True)
+  counted = parse.Scanner(text, line_index=False)
+  for offset in [5, 0, 3, 4, len(text), 9, 8, 1, len(text) + 10, 2]:
+    indexed.seek(offset)
+    counted.seek(offset)
+    assert_equal(indexed.cursor, counted.cursor)
+    if offset <= len(text):
+      assert_equal(indexed.cursor_at(offset), counted.cursor)
+      assert_equal(counted.cursor_at(offset), counted.cursor)
+
+  indexed.restore(6)
+  assert_equal(indexed.cursor, parse.Cursor(6, 3, 1))
+  indexed.restore(parse.Cursor(0, 1, 0))
+  assert_equal(indexed.cursor, parse.Cursor(0, 1, 0))
+
+  # The index is rebuilt when the text is replaced.
+  indexed.text = 'a\nb'
+  assert_equal(indexed.cursor_at(2), parse.Cursor(2, 2, 0))
+
+
+def _token_stream(text, rules, **kwargs):
+  if isinstance(text, parse.TokenArray):
+    lexer = text
+  else:
+    scanner = text if isinstance(text, parse.Scanner) else parse.Scanner(text)
+    lexer = parse.Lexer(scanner, rules, **kwargs)
+  result = []
+  for token in lexer:
+    value = token.value
+    if hasattr(value, 'group'):
+      value = (value.re.pattern, value.group(), value.groups())
+    result.append((token.type, tuple(token.cursor), value, token.string_repr))
+  return result
+
+
+def test_compiled_lexer():
+  import re, string
+
+  class Custom(parse.Rule):
+    def tokenize(self, scanner):
+      if scanner.char == '@':
+        scanner.next()
+        return '@'
+
+  rules = [
+    parse.Keyword('newline', '\n'),
+    parse.Keyword('kw', 'Foo', case_sensitive=False),
+    parse.Regex('optional', 'x*'),
+    Custom('custom'),
+    parse.Regex('named', '(?P<q>["\'])[^"\']*(?P=q)'),
+    parse.Regex('number', '(\\d+)(\\.\\d+)?'),
+    parse.Charset('symbol', string.ascii_letters + '_-'),
+    parse.Charset('indent', ' \t', at_column=0),
+    parse.Charset('ws', ' \t', skip=True),
+    parse.Regex('comment', '#.*$', re.M, skip=True),
+  ]
+  text = 'foo xx 12.5 "str" @FOO-bar\n  # comment\n\tFoo 3 @\n'
+  expected = _token_stream(text, rules)
+  assert_equal([x[0] for x in expected], ['kw', 'optional', 'number', 'named',
+    'custom', 'kw', 'symbol', 'newline', 'indent', 'newline', 'indent', 'kw',
+    'number', 'custom', 'newline'])
+  assert_equal(_token_stream(text, rules, compiled=True), expected)
+
+  lexer = parse.Lexer(parse.Scanner(text), rules, compiled=True)
+  assert_equal(lexer.next('kw').value, 'foo')
+  assert_equal(lexer.accept('number'), None)
+  assert_equal(lexer.next('optional').string_repr, 'xx')
+  assert_equal(lexer.next('number').value.group(2), '.5')
+
+
+def test_tokenize_all():
+  import array, re, string
+
+  class Custom(parse.Rule):
+    def tokenize(self, scanner):
+      if scanner.char == '@':
+        scanner.next()
+        return ('at', '@')
+
+  rules = [
+    parse.Keyword('newline', '\n'),
+    parse.Keyword('kw', 'Foo', case_sensitive=False),
+    Custom('custom'),
+    parse.Regex('number', '(\\d+)(\\.\\d+)?'),
+    parse.Charset('symbol', string.ascii_letters + '_-'),
+    parse.Charset('ws', ' \t', skip=True),
+    parse.Regex('comment', '#.*$', re.M, skip=True),
+  ]
+  text = 'foo 12.5 @FOO-bar\n  # comment\n\tFoo 3 @\n'
+  expected = _token_stream(text, rules)
+  for compiled in (False, True):
+    lexer = parse.Lexer(parse.Scanner(text), rules, compiled=compiled)
+    tokens = lexer.tokenize_all()
+    assert_equal(lexer.token.type, parse.eof)
+    assert_equal(len(tokens), len(expected))
+    assert isinstance(tokens.starts, array.array)
+    assert_equal(_token_stream(tokens, rules), expected)
+    assert_equal(tokens.type(2), 'custom')
+    assert_equal(tokens.value(2), 'at')
+    assert_equal(tokens.string(3), 'FOO')
+    assert_equal(tokens.value(3), 'foo')
+    assert_equal(tokens[-1].type, 'newline')
+    assert_equal([t.type for t in tokens[1:3]], ['number', 'custom'])
+
+  lexer = parse.Lexer(parse.Scanner('foo ?'), rules)
+  assert_raises(parse.TokenizationError, lexer.tokenize_all)
+
+
+def _relex_rules():
+  import re, string
+  return [
+    parse.Keyword('newline', '\n'),
+    parse.Regex('string', '"[^"\\n]*"?'),
+    parse.Charset('number', string.digits),
+    parse.Charset('symbol', string.ascii_letters + string.digits + '_'),
+    parse.Charset('indent', ' ', at_column=0),
+    parse.Charset('ws', ' ', skip=True),
+    parse.Regex('comment', '#.*$', re.M, skip=True),
+  ]
+
+
+def _assert_relexed(lexer, tokens, arrays=True):
+  expected = parse.Lexer(parse.Scanner(tokens.text), lexer.rules).tokenize_all()
+  # Compare the tokens first, accessing the arrays applies pending shifts.
+  assert_equal(_token_stream(tokens, None), _token_stream(expected, None))
+  if arrays:
+    for name in ('types', 'starts', 'ends', 'linenos', 'colnos'):
+      assert_equal(getattr(tokens, name), getattr(expected, name), name)
+
+
+def test_relex():
+  import random
+  text = ''.join('{0}sym_{1} "str {1}" {2}  # comment\n'.format(
+    ' ' * (i % 3), i, i * 7) for i in range(60))
+  lexer = parse.Lexer(parse.Scanner(text), _relex_rules())
+  tokens = lexer.tokenize_all()
+
+  edits = [(0, 0, '  '), (0, 3, ''), (len(text) - 1, 0, 'x\n'), (40, 5, ''),
+    (50, 0, '"x"'), (50, 3, ''), (120, 0, '# '), (120, 2, ''), (200, 30, '1\n2\n3')]
+  rnd = random.Random(1)
+  for __ in range(25):
+    offset = rnd.randint(0, len(tokens.text))
+    removed = rnd.randint(0, min(3, len(tokens.text) - offset))
+    edits.append((offset, removed, rnd.choice(['', 'a', '1', ' ', '\n', '#', 'b c'])))
+  for i, (offset, removed, inserted) in enumerate(edits):
+    start, old_stop, new_stop = lexer.relex(tokens, offset, removed, inserted)
+    assert start <= old_stop and start <= new_stop
+    _assert_relexed(lexer, tokens, arrays=(i % 4 == 3))
+
+  assert_raises(ValueError, lexer.relex, tokens, len(tokens.text), 1, '')
+  assert_raises(parse.TokenizationError, lexer.relex, tokens, 0, 0, '?')
+
+
+def test_relex_large_file():
+  lines = ['item_{0}'.format(i) for i in range(10000)]
+  text = '\n'.join(lines) + '\n'
+  lexer = parse.Lexer(parse.Scanner(text), _relex_rules(), compiled=True)
+  tokens = lexer.tokenize_all()
+  assert_equal(len(tokens), 20000)
+
+  # Single character edits re-lex only a handful of tokens, independent of
+  # the position in the file.
+  for line in (0, 5000, 9999):
+    offset = text.index('item_{0}\n'.format(line)) + 2
+    for removed, inserted in [(0, 'x'), (1, ''), (0, ' '), (1, ''), (1, '\n'), (1, 'e')]:
+      start, old_stop, new_stop = lexer.relex(tokens, offset, removed, inserted)
+      assert old_stop - start <= 6, (line, old_stop - start)
+      assert new_stop - start <= 6, (line, new_stop - start)
+  assert_equal(tokens.text, text)
+  _assert_relexed(lexer, tokens)
+
+
+def test_dispatch():
+  import string
+  rules = [
+    parse.Keyword('kw', 'foo', case_sensitive=False),
+    parse.Regex('any', '[a-z]+[0-9]'),
+    parse.Regex('digits', '[0-9]+', starts_with=string.digits),
+    parse.Charset('symbol', string.ascii_lowercase),
+    parse.Charset('ws', ' \n', skip=True),
+    parse.Keyword('never', ''),
+  ]
+  kw, any_, digits, symbol, ws, never = rules
+  lexer = parse.Lexer(parse.Scanner('Foo fox1 bar 42'), rules)
+  assert_equal(lexer.dispatch_default, [any_])
+  assert_equal(lexer.dispatch['f'], [kw, any_, symbol])
+  assert_equal(lexer.dispatch['F'], [kw, any_])
+  assert_equal(lexer.dispatch['b'], [any_, symbol])
+  assert_equal(lexer.dispatch['4'], [any_, digits])
+  assert_equal(lexer.dispatch[' '], [any_, ws])
+  assert_equal([(t.type, t.string_repr or t.value) for t in lexer], [
+    ('kw', 'foo'), ('any', 'fox1'), ('symbol', 'bar'), ('digits', '42')])
+  assert_equal(_token_stream('Foo fox1 bar 42', rules, compiled=True),
+    _token_stream('Foo fox1 bar 42', rules))
+
+
+def test_compiled_lexer_inline_flags():
+  rules = [
+    parse.Regex('kw', '(?i)foo'),
+    parse.Regex('number', '(?x) [0-9]+  # digits'),
+    parse.Regex('name', '[a-z]+'),
+    parse.Charset('ws', ' ', skip=True),
+  ]
+  text = 'FOO bar 42 foo'
+  lexer = parse.Lexer(parse.Scanner(text), rules, compiled=True)
+  segments = lexer._get_compiled_segments(0, 'F')
+  assert_equal(segments[:2], rules[:2])
+  assert_equal(_token_stream(text, rules, compiled=True), _token_stream(text, rules))
+  assert_equal([t.type for t in parse.Lexer(parse.Scanner(text), rules, compiled=True)],
+    ['kw', 'name', 'number', 'kw'])
+
+
+def test_lexer_stats():
+  import string
+  rules = [
+    parse.Regex('float', '\\d+\\.\\d+'),
+    parse.Keyword('kw', '12'),
+    parse.Charset('number', string.digits),
+    parse.Charset('ws', ' ', skip=True),
+  ]
+  for compiled in (False, True):
+    lexer = parse.Lexer(parse.Scanner('12 3.5 42'), rules, compiled=compiled, stats=True)
+    assert_equal([t.type for t in lexer], ['kw', 'float', 'number'])
+    stats = lexer.stats.rules
+    assert_equal(stats['float'].attempts, 5)
+    assert_equal(stats['float'].hits, 1)
+    assert_equal(stats['kw'].attempts, 1)  # Only dispatched at '1'.
+    assert_equal(stats['kw'].hits, 1)
+    assert_equal(stats['number'].hits, 1)
+    assert_equal(stats['ws'].hits, 2)
+    assert stats['float'].time > 0
+    assert_equal(len(lexer.stats.report().splitlines()), 5)
+
+  lexer = parse.Lexer(parse.Scanner('3.5'), rules, stats=True)
+  assert_equal(lexer.accept('number'), None)
+  assert_equal(lexer.stats.rules['float'].restores, 1)
+  lexer.stats.reset()
+  assert_equal(lexer.stats.rules, {})
+  assert_equal(parse.Lexer(parse.Scanner(''), rules).stats, None)
+
+
+def test_charset_and_keyword():
+  s = parse.Scanner("  \n \n  foo\nBAR")
+  ws = parse.Charset('ws', ' \n')
+  assert_equal(ws.tokenize(s), '  \n \n  ')
+  assert_equal(s.cursor, parse.Cursor(7, 3, 2))
+  assert_equal(ws.tokenize(s), '')
+  assert_equal(s.cursor, parse.Cursor(7, 3, 2))
+
+  assert_equal(parse.Keyword('kw', 'fox').tokenize(s), None)
+  assert_equal(s.cursor, parse.Cursor(7, 3, 2))
+  assert_equal(parse.Keyword('kw', 'foo\n').tokenize(s), 'foo\n')
+  assert_equal(s.cursor, parse.Cursor(11, 4, 0))
+  assert_equal(parse.Keyword('kw', 'bar', case_sensitive=False).tokenize(s), 'bar')
+  assert_equal(s.cursor, parse.Cursor(14, 4, 3))
+  assert_equal(parse.Keyword('kw', 'bar').tokenize(s), None)
+
+
+def test_stream_scanner():
+  import io, mmap, re, string, tempfile
+
+  rules = [
+    parse.Keyword('newline', '\n'),
+    parse.Keyword('def', ':'),
+    parse.Charset('symbol', string.ascii_letters + string.digits + '_'),
+    parse.Charset('indent', ' ', at_column=0),
+    parse.Charset('ws', ' ', skip=True),
+    parse.Regex('comment', '#.*$', re.M, skip=True),
+  ]
+  lines = []
+  for i in range(50):
+    lines.append('# group {0} with a longer comment line'.format(i))
+    lines.append('SYMBOL_{0}: {1}'.format(i, 1000 + i))
+    lines.append('  us: Symbol {0}'.format(i) + ' ' * (i % 13))
+  text = u'\n'.join(lines) + u'\n'
+  expected = _token_stream(text, rules)
+
+  def stream(fp, **kwargs):
+    return parse.StreamScanner(fp, chunk_size=16, lookahead=8, backtrack=32, **kwargs)
+
+  assert_equal(_token_stream(stream(io.StringIO(text)), rules), expected)
+  assert_equal(_token_stream(stream(io.StringIO(text)), rules, compiled=True), expected)
+  data = text.replace(u'\n', u'\r\n').encode('utf8')
+  assert_equal(_token_stream(stream(io.BytesIO(data)), rules), expected)
+
+  with tempfile.TemporaryFile() as fp:
+    fp.write(text.encode('utf8'))
+    fp.flush()
+    mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      scanner = stream(mm)
+      assert_equal(_token_stream(scanner, rules), expected)
+      # Only the backtrack window and the last chunk are kept in memory.
+      assert len(scanner.buffer) <= 32 + 16 * 2
+    finally:
+      mm.close()
+
+  scanner = stream(io.StringIO(text))
+  assert_equal(scanner.readline(), lines[0] + '\n')
+  assert_equal(scanner.cursor, parse.Cursor(len(lines[0]) + 1, 2, 0))
+  cursor = scanner.cursor
+  assert_equal(scanner.getmatch('SYMBOL_\\d+'), 'SYMBOL_0')
+  scanner.restore(cursor)
+  assert_equal(scanner.peek(8), 'SYMBOL_0')
+  scanner.seek(200)
+  assert_equal(scanner.cursor, parse.Cursor(200, 9, 13))
+  assert_equal(len(scanner.peek(64)), 64)  # Discards the start of the input.
+  assert_raises(ValueError, scanner.restore, cursor)
+  assert_raises(ValueError, scanner.seek, 0, 'end')
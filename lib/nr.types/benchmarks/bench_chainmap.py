@@ -0,0 +1,65 @@
+"""
+Benchmarks layered configuration lookups in a #nr.types.map.ChainMap with
+and without the cached flattened view.
+
+    python benchmarks/bench_chainmap.py [--layers 8] [--keys 1000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types.map import ChainMap
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--layers', type=int, default=8)
+  parser.add_argument('--keys', type=int, default=1000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  # Every layer overrides a part of the keys of the layers below it, the
+  # last layer (the defaults) has all keys.
+  layers = []
+  for i in range(args.layers):
+    count = args.keys if i == args.layers - 1 else args.keys // (2 * (i + 1))
+    layers.append(dict(('key{0}'.format(k), i) for k in range(count)))
+  keys = ['key{0}'.format(k) for k in range(args.keys)]
+
+  def lookup(d):
+    for key in keys:
+      d[key]
+
+  def contains(d):
+    for key in keys:
+      key in d
+
+  def mutate_and_lookup(d):
+    d['key0'] = 'changed'
+    lookup(d)
+
+  cases = [
+    ('d[key]', lookup, len(keys)),
+    ('key in d', contains, len(keys)),
+    ('len(d)', len, 1),
+    ('list(d.items())', lambda d: list(d.items()), 1),
+    ('d[k] = v, then d[key]', mutate_and_lookup, len(keys)),
+  ]
+
+  print('{0} layers, {1} keys, time per operation'.format(args.layers, args.keys))
+  print('{0:<26}{1:>14}{2:>14}'.format('', 'uncached', 'cached'))
+  for label, func, ops in cases:
+    times = []
+    for cached in (False, True):
+      d = ChainMap({}, *layers, cached=cached)
+      times.append(min(timeit.repeat(lambda: func(d), repeat=args.repeat, number=1)) / ops)
+    print('{0:<26}{1:>11.3f} us{2:>11.3f} us'.format(label, times[0] * 1e6, times[1] * 1e6))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,49 @@
+"""
+Benchmarks the conversion of integer values and names to the objects of an
+#nr.types.enum.Enumeration, one by one and in bulk with `from_values()`.
+
+    python benchmarks/bench_enum.py [--count 100000] [--members 64] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types.enum import Enumeration
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--count', type=int, default=100000)
+  parser.add_argument('--members', type=int, default=64)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  members = dict(('FLAG_{0}'.format(i), 1 << i) for i in range(args.members))
+  Flags = type('Flags', (Enumeration,), dict(members, __slots__=()))
+  rnd = random.Random(42)
+  values = [rnd.choice(list(members.values())) for __ in range(args.count)]
+  names = [rnd.choice(list(members.keys())) for __ in range(args.count)]
+
+  cases = [
+    ('[Flags(v) for v in values]', lambda: [Flags(v) for v in values]),
+    ('Flags.from_values(values)', lambda: Flags.from_values(values)),
+    ('[Flags(n) for n in names]', lambda: [Flags(n) for n in names]),
+    ('Flags.from_values(names)', lambda: Flags.from_values(names)),
+    ('list(Flags)', lambda: [list(Flags) for __ in range(args.count // args.members)]),
+  ]
+
+  print('{0} conversions, {1} members, time per item'.format(args.count, args.members))
+  for label, func in cases:
+    seconds = min(timeit.repeat(func, repeat=args.repeat, number=1)) / args.count
+    print('  {0:<30}{1:>10.3f} us'.format(label, seconds * 1e6))
+  print('  size of an enumeration object: {0} bytes'.format(sys.getsizeof(Flags.FLAG_0)))
+
+
+if __name__ == '__main__':
+  main()
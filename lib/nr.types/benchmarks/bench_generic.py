@@ -0,0 +1,49 @@
+"""
+Benchmarks subscripting a generic class (`HashDict[key_hash]`) with the
+specialisation cache, compared to creating a new class every time.
+
+    python benchmarks/bench_generic.py [--number 10000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types import generic
+from nr.types.map import HashDict
+
+
+def key_hash(x):
+  return hash(x)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--number', type=int, default=10000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  def subscript():
+    return HashDict[key_hash]
+
+  def uncached():
+    generic._specializations.clear()
+    return HashDict[key_hash]
+
+  def subscript_and_construct():
+    return HashDict[key_hash]()
+
+  print('time per operation')
+  for label, func in [('HashDict[key_hash] (cached)', subscript),
+                      ('HashDict[key_hash] (uncached)', uncached),
+                      ('HashDict[key_hash]() (cached)', subscript_and_construct)]:
+    seconds = min(timeit.repeat(func, repeat=args.repeat, number=args.number)) / args.number
+    print('  {0:<32}{1:>10.3f} us'.format(label, seconds * 1e6))
+
+
+if __name__ == '__main__':
+  main()
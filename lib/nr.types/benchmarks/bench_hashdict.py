@@ -0,0 +1,97 @@
+"""
+Benchmarks #nr.types.map.CachedHashDict against #nr.types.map.HashDict with
+unhashable keys that mimic `c4d.DescID` (as used by `nr.c4d.utils.HashDict`),
+both for key objects that are used repeatedly and for fresh key objects.
+
+    python benchmarks/bench_hashdict.py [--keys 1000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types.map import HashDict, CachedHashDict
+
+
+class DescLevel(object):
+  __slots__ = ('id',)
+  def __init__(self, id):
+    self.id = id
+
+
+class DescID(object):
+  " An unhashable key with a list of levels, like `c4d.DescID`. "
+
+  __hash__ = None
+
+  def __init__(self, *ids):
+    self.levels = [DescLevel(x) for x in ids]
+
+  def __getitem__(self, index):
+    return self.levels[index]
+
+  def __eq__(self, other):
+    return [l.id for l in self.levels] == [l.id for l in other.levels]
+
+  def GetDepth(self):
+    return len(self.levels)
+
+
+def hash_descid(x):
+  levels = (x[i] for i in range(x.GetDepth()))
+  return hash(tuple(l.id for l in levels))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--keys', type=int, default=1000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  ids = [(1000 + i, i % 7) for i in range(args.keys)]
+  keys = [DescID(*x) for x in ids]
+
+  def fill(cls):
+    d = cls[hash_descid]()
+    d.hash_cache_size = 2 * args.keys
+    for key in keys:
+      d[key] = key
+    return d
+
+  def lookup(d, keys):
+    for key in keys:
+      d[key]
+
+  def contains(d, keys):
+    for key in keys:
+      key in d
+
+  def get(d, keys):
+    for key in keys:
+      d.get(key)
+
+  classes = [('HashDict', HashDict), ('CachedHashDict', CachedHashDict)]
+  print('{0} DescID-like keys, time per operation'.format(args.keys))
+  print('{0:<28}'.format('') + ''.join('{0:>18}'.format(x[0]) for x in classes))
+
+  def row(label, func):
+    times = [min(timeit.repeat(lambda: func(cls), repeat=args.repeat, number=1)) / args.keys
+      for __, cls in classes]
+    print('{0:<28}'.format(label) + ''.join('{0:>15.3f} us'.format(t * 1e6) for t in times))
+
+  dicts = dict((cls, fill(cls)) for __, cls in classes)
+  fresh = [DescID(*x) for x in ids]
+  row('insert', fill)
+  row('d[key] (same objects)', lambda cls: lookup(dicts[cls], keys))
+  row('key in d (same objects)', lambda cls: contains(dicts[cls], keys))
+  row('d.get(key) (same objects)', lambda cls: get(dicts[cls], keys))
+  row('d[key] (fresh objects)', lambda cls: lookup(dicts[cls], [DescID(*x) for x in ids]))
+  row('  creating the objects', lambda cls: [DescID(*x) for x in ids])
+
+
+if __name__ == '__main__':
+  main()
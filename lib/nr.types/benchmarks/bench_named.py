@@ -0,0 +1,64 @@
+"""
+Benchmarks the construction of #nr.types.Named objects with the generated
+`__init__()`, with and without `__named_slots__`, compared to the generic
+`Named.__init__()`, #collections.namedtuple and a plain tuple.
+
+    python benchmarks/bench_named.py [--number 100000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types import Named
+
+FIELDS = [('mail', str), ('name', str), ('age', int, 0), ('tags', list, Named.Initializer(list))]
+
+
+class Person(Named):
+  __annotations__ = FIELDS
+
+
+class SlottedPerson(Named):
+  __named_slots__ = True
+  __annotations__ = FIELDS
+
+
+class GenericPerson(Named):
+  " Uses the generic implementation of #Named.__init__(). "
+
+  __annotations__ = FIELDS
+  __init__ = Named.__init__
+
+
+PersonTuple = collections.namedtuple('PersonTuple', 'mail name age tags')
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--number', type=int, default=100000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  cases = [
+    ('tuple', lambda: ('a@b.c', 'John', 0, [])),
+    ('namedtuple', lambda: PersonTuple('a@b.c', 'John', 0, [])),
+    ('Named (generic)', lambda: GenericPerson('a@b.c', 'John')),
+    ('Named (generated)', lambda: Person('a@b.c', 'John')),
+    ('Named (slots)', lambda: SlottedPerson('a@b.c', 'John')),
+    ('Named (keywords)', lambda: Person(mail='a@b.c', name='John', age=1)),
+  ]
+
+  print('time per object')
+  for label, func in cases:
+    seconds = min(timeit.repeat(func, repeat=args.repeat, number=args.number)) / args.number
+    print('  {0:<20}{1:>10.3f} us'.format(label, seconds * 1e6))
+
+
+if __name__ == '__main__':
+  main()
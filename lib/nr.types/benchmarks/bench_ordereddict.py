@@ -0,0 +1,118 @@
+"""
+Benchmarks the fallback #nr.types._ordereddict.OrderedDict for growing
+numbers of keys, compared to #collections.OrderedDict and to the previous
+implementation that stored the items in a plain list (which is only run up
+to `--list-max` keys since its operations take linear time).
+
+    python benchmarks/bench_ordereddict.py [--sizes 100,1000,10000,100000]
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types._ordereddict import OrderedDict
+
+
+class ListOrderedDict(object):
+  " The operations of the previous, list based implementation. "
+
+  def __init__(self):
+    self.items = []
+
+  def __contains__(self, key):
+    for item in self.items:
+      if item[0] == key:
+        return True
+    return False
+
+  def __getitem__(self, key):
+    for item in self.items:
+      if item[0] == key:
+        return item[1]
+    raise KeyError(key)
+
+  def __setitem__(self, key, value):
+    for item in self.items:
+      if item[0] == key:
+        item[1] = value
+        return
+    self.items.append([key, value])
+
+  def __delitem__(self, key):
+    for index, item in enumerate(self.items):
+      if item[0] == key:
+        break
+    else:
+      raise KeyError(key)
+    del self.items[index]
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--sizes', default='100,1000,10000,100000')
+  parser.add_argument('--list-max', type=int, default=10000)
+  parser.add_argument('--lookups', type=int, default=1000)
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args(argv)
+
+  classes = [('list', ListOrderedDict), ('linked', OrderedDict),
+    ('collections', collections.OrderedDict)]
+  operations = ['insert', 'lookup', 'contains', 'delete']
+
+  print('time per operation')
+  print('{0:>8} {1:<10}'.format('keys', '') + ''.join(
+    '{0:>16}'.format(name) for name, __ in classes))
+  for size in map(int, args.sizes.split(',')):
+    keys = ['key{0}'.format(i) for i in range(size)]
+    probe = keys[::max(1, size // args.lookups)]
+
+    def fill(cls):
+      d = cls()
+      for key in keys:
+        d[key] = key
+      return d
+
+    def lookup(d):
+      for key in probe:
+        d[key]
+
+    def contains(d):
+      for key in probe:
+        key in d
+
+    def delete(cls):
+      # Only the deletions are timed, not filling the dictionary.
+      times = []
+      for __ in range(args.repeat):
+        d = fill(cls)
+        start = timeit.default_timer()
+        for key in probe:
+          del d[key]
+        times.append(timeit.default_timer() - start)
+      return min(times) / len(probe)
+
+    results = {}
+    for name, cls in classes:
+      if cls is ListOrderedDict and size > args.list_max:
+        continue
+      d = fill(cls)
+      measure = lambda func, ops: min(timeit.repeat(func, repeat=args.repeat, number=1)) / ops
+      results[name, 'insert'] = measure(lambda: fill(cls), size)
+      results[name, 'lookup'] = measure(lambda: lookup(d), len(probe))
+      results[name, 'contains'] = measure(lambda: contains(d), len(probe))
+      results[name, 'delete'] = delete(cls)
+
+    for op in operations:
+      print('{0:>8} {1:<10}'.format(size if op == 'insert' else '', op) + ''.join(
+        '{0:>13.3f} us'.format(results[name, op] * 1e6) if (name, op) in results
+        else '{0:>16}'.format('-') for name, __ in classes))
+
+
+if __name__ == '__main__':
+  main()
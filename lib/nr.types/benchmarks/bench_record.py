@@ -0,0 +1,78 @@
+"""
+Benchmarks the construction and member access of #nr.types.Record classes
+with the methods that are generated per class, compared to the generic
+implementations of the #Record base class and to #collections.namedtuple.
+
+    python benchmarks/bench_record.py [--number 100000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types import Record
+
+Token = Record.new('Token', 'type cursor value string_repr')
+TokenTuple = collections.namedtuple('TokenTuple', 'type cursor value string_repr')
+
+
+class GenericToken(Record):
+  " Uses the generic implementations of the #Record base class. "
+
+  __slots__ = ['type', 'cursor', 'value', 'string_repr']
+  __init__ = Record.__init__
+  __iter__ = Record.__iter__
+  __getitem__ = Record.__getitem__
+  __eq__ = Record.__eq__
+  __getattribute__ = Record.__getattribute__
+  __setattr__ = Record.__setattr__
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--number', type=int, default=100000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  def measure(stmt, cls):
+    instance = cls('symbol', 42, 'foo', None)
+    other = cls('symbol', 42, 'foo', None)
+    scope = {'cls': cls, 'x': instance, 'y': other}
+    return min(timeit.repeat(stmt, globals=scope, repeat=args.repeat,
+      number=args.number)) / args.number
+
+  cases = [
+    ('construct (positional)', "cls('symbol', 42, 'foo', None)"),
+    ('construct (keywords)', "cls(type='symbol', cursor=42, value='foo', string_repr=None)"),
+    ('attribute access', 'x.value'),
+    ('x[2]', 'x[2]'),
+    ("x['value']", "x['value']"),
+    ('tuple(x)', 'tuple(x)'),
+    ('x == y', 'x == y'),
+  ]
+  classes = [('generic', GenericToken), ('generated', Token), ('namedtuple', TokenTuple)]
+
+  print('{0:<24}'.format('') + ''.join('{0:>14}'.format(x[0]) for x in classes))
+  for label, stmt in cases:
+    times = []
+    for __, cls in classes:
+      if cls is TokenTuple and "['value']" in stmt:
+        times.append(None)
+      else:
+        times.append(measure(stmt, cls))
+    print('{0:<24}'.format(label) + ''.join(
+      '{0:>11.3f} us'.format(t * 1e6) if t is not None else '{0:>14}'.format('-')
+      for t in times))
+
+  generic, generated = measure(cases[0][1], GenericToken), measure(cases[0][1], Token)
+  print('construction speedup: {0:.1f}x ({1:.0f} records/s)'.format(
+    generic / generated, 1.0 / generated))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,78 @@
+"""
+Benchmarks the construction of #nr.types.Sumtype objects and dispatching on
+their constructor with `is_*()` checks, #Sumtype.match() and a function
+created by #Sumtype.matcher().
+
+    python benchmarks/bench_sumtype.py [--count 100000] [--repeat 5]
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from nr.types import Sumtype
+
+
+class Result(Sumtype):
+  __slots__ = ()
+  Loading = Sumtype.Constructor('progress')
+  Error = Sumtype.Constructor('message')
+  Ok = Sumtype.Constructor('filename', 'load')
+
+  @Sumtype.MemberOf([Loading])
+  def alert(self):
+    return 'Progress: ' + str(self.progress)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--count', type=int, default=100000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  objects = []
+  for i in range(args.count):
+    if i % 3 == 0:
+      objects.append(Result.Loading(i))
+    elif i % 3 == 1:
+      objects.append(Result.Error('error'))
+    else:
+      objects.append(Result.Ok('file', True))
+
+  def construct():
+    for i in range(args.count):
+      Result.Ok('file', i)
+
+  def is_checks():
+    for obj in objects:
+      if obj.is_loading():
+        obj.progress
+      elif obj.is_error():
+        obj.message
+      else:
+        obj.filename
+
+  handlers = dict(Loading=lambda p: p, Error=lambda m: m, Ok=lambda f, l: f)
+  def match():
+    for obj in objects:
+      obj.match(**handlers)
+
+  dispatch = Result.matcher(**handlers)
+  def matcher():
+    for obj in objects:
+      dispatch(obj)
+
+  print('{0} objects, time per object'.format(args.count))
+  for label, func in [('construct', construct), ('is_*() checks', is_checks),
+                      ('match()', match), ('matcher()', matcher)]:
+    seconds = min(timeit.repeat(func, repeat=args.repeat, number=1)) / args.count
+    print('  {0:<20}{1:>10.3f} us'.format(label, seconds * 1e6))
+  print('  size of an object: {0} bytes'.format(sys.getsizeof(objects[2])))
+
+
+if __name__ == '__main__':
+  main()
@@ -20,93 +20,144 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import functools
+
+# Indices of the fields of a node in the linked list of an #OrderedDict.
+PREV, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+
 class OrderedDict(object):
   """
-  This class implements a dictionary that can treat non-hashable
-  datatypes as keys. It is implemented as a list of key/value pairs,
-  thus it is very slow compared to a traditional hash-based dictionary.
+  This class implements a dictionary that remembers the order in which keys
+  were inserted and that can treat non-hashable datatypes as keys. Items
+  are stored in a doubly-linked list of `[prev, next, key, value]` nodes,
+  indexed by a dictionary for hashable keys. Non-hashable keys are compared
+  by equality in a separate list of nodes.
 
   Access times are:
 
-  ==== ======= =====
-  Best Average Worst
-  ==== ======= =====
-  O(1) O(n)    O(n)
-  ==== ======= =====
+  ================= ==== ======= =====
+  Keys              Best Average Worst
+  ================= ==== ======= =====
+  Hashable          O(1) O(1)    O(n)
+  Non-hashable      O(1) O(n)    O(n)
+  ================= ==== ======= =====
   """
 
-  def __init__(self, iterable=None):
+  def __init__(self, iterable=None, **kwargs):
     super(OrderedDict, self).__init__()
-    if isinstance(iterable, OrderedDict):
-      self.__items = iterable.__items[:]
-    elif iterable is not None:
-      iterable = dict(iterable)
-      self.__items = iterable.items()
-    else:
-      self.__items = []
+    self.__root = root = []
+    root[:] = [root, root, None, None]
+    self.__index = {}
+    self.__unhashable = []
+    self.update(iterable, **kwargs)
 
   __hash__ = None
 
+  def __find(self, key):
+    " Returns the node for the *key* or #None. "
+
+    try:
+      return self.__index.get(key)
+    except TypeError:
+      for node in self.__unhashable:
+        if node[KEY] == key:
+          return node
+      return None
+
+  def __unlink(self, node):
+    prev, next = node[PREV], node[NEXT]
+    prev[NEXT] = next
+    next[PREV] = prev
+    try:
+      del self.__index[node[KEY]]
+    except TypeError:
+      self.__unhashable.remove(node)
+
+  def __nodes(self, reverse=False):
+    root = self.__root
+    direction = PREV if reverse else NEXT
+    node = root[direction]
+    while node is not root:
+      # Allow the current node to be removed during the iteration.
+      next = node[direction]
+      yield node
+      node = next
+
   def __contains__(self, key):
-    for item in self.__items:
-      if item[0] == key:
-        return True
-    return False
+    return self.__find(key) is not None
 
   def __eq__(self, other):
     if other is self:
       return True
-    return other == self.asdict()
+    if isinstance(other, OrderedDict):
+      return self.items() == other.items()
+    try:
+      if len(self) != len(other):
+        return False
+      for key, value in self.iteritems():
+        if key not in other or other[key] != value:
+          return False
+    except TypeError:
+      return False
+    return True
 
   def __ne__(self, other):
     return not self == other
 
   def __len__(self):
-    return len(self.__items)
+    return len(self.__index) + len(self.__unhashable)
 
   def __str__(self):
-    items = ('{0!r}: {1!r}'.format(k, v) for k, v in self.__items)
+    items = ('{0!r}: {1!r}'.format(k, v) for k, v in self.iteritems())
     return '{' + ', '.join(items) + '}'
 
   __repr__ = __str__
 
   def __iter__(self):
-    for item in self.__items:
-      yield item[0]
+    for node in self.__nodes():
+      yield node[KEY]
+
+  def __reversed__(self):
+    for node in self.__nodes(reverse=True):
+      yield node[KEY]
 
   def __getitem__(self, key):
-    for item in self.__items:
-      if item[0] == key:
-        return item[1]
-    raise KeyError(key)
+    node = self.__find(key)
+    if node is None:
+      raise KeyError(key)
+    return node[VALUE]
 
   def __setitem__(self, key, value):
-    for item in self.__items:
-      if item[0] == key:
-        item[1] = value
-        return
-    self.__items.append([key, value])
+    node = self.__find(key)
+    if node is not None:
+      node[VALUE] = value
+      return
+    root = self.__root
+    last = root[PREV]
+    node = [last, root, key, value]
+    try:
+      self.__index[key] = node
+    except TypeError:
+      self.__unhashable.append(node)
+    last[NEXT] = root[PREV] = node
 
   def __delitem__(self, key):
-    for index, item in enumerate(self.__items):
-      if item[0] == key:
-        break
-    else:
+    node = self.__find(key)
+    if node is None:
       raise KeyError(key)
-
-    del self.__items[index]
+    self.__unlink(node)
 
   def iterkeys(self):
-    for item in self.__items:
-      yield item[0]
+    return iter(self)
 
   def itervalues(self):
-    for item in self.__items:
-      yield item[1]
+    for node in self.__nodes():
+      yield node[VALUE]
 
   def iteritems(self):
-    for item in self.__items:
-      yield (item[0], item[1])
+    for node in self.__nodes():
+      yield (node[KEY], node[VALUE])
 
   def keys(self):
     return list(self.iterkeys())
@@ -118,56 +169,82 @@ class OrderedDict(object):
     return list(self.iteritems())
 
   def get(self, key, default=None):
-    try:
-      return self[key]
-    except KeyError:
+    node = self.__find(key)
+    if node is None:
       return default
+    return node[VALUE]
 
   def pop(self, key, default=NotImplementedError):
-    for item in self.__items:
-      if item[0] == key:
-        break
-    else:
+    node = self.__find(key)
+    if node is None:
       if default is NotImplementedError:
         raise KeyError(key)
       return default
-
-    return key[1]
+    self.__unlink(node)
+    return node[VALUE]
 
   def popitem(self, last=True):
-    if last:
-      return tuple(self.__items.pop())
-    else:
-      return tuple(self.__items.pop(0))
+    if not self:
+      raise KeyError('dictionary is empty')
+    node = self.__root[PREV if last else NEXT]
+    self.__unlink(node)
+    return (node[KEY], node[VALUE])
 
   def setdefault(self, key, value=None):
-    for item in self.__items:
-      if item[0] == key:
-        return item[1]
-    self.__items.append([key, value])
+    node = self.__find(key)
+    if node is not None:
+      return node[VALUE]
+    self[key] = value
     return value
 
   def update(self, __data__=None, **kwargs):
     if __data__ is not None:
-      data = dict(data)
-      for key, value in data.iteritems():
+      if hasattr(__data__, 'iteritems'):
+        items = __data__.iteritems()
+      elif hasattr(__data__, 'keys'):
+        items = ((key, __data__[key]) for key in __data__.keys())
+      else:
+        items = __data__
+      for key, value in items:
         self[key] = value
-    for key, value in kwargs.iteritems():
+    for key, value in kwargs.items():
       self[key] = value
 
   def clear(self):
-    self.__items[:] = []
+    root = self.__root
+    # Break the reference cycles between the nodes.
+    for node in self.__nodes():
+      del node[:]
+    root[:] = [root, root, None, None]
+    self.__index.clear()
+    self.__unhashable[:] = []
 
   def copy(self):
     return OrderedDict(self)
 
   has_key = __contains__
 
-  def update(self, mapping):
-    for key, value in mapping.iteritems():
-      self[key] = value
-
   def sort(self, cmp=None, key=None, reverse=False):
+    """
+    Sorts the items in the dictionary. The *key* function receives a
+    `(key, value)` tuple and defaults to sorting by the keys.
+    """
+
     if key is None:
       key = lambda x: x[0]
-    self.__items.sort(key=key)
+    sort_key = lambda node: key((node[KEY], node[VALUE]))
+    nodes = list(self.__nodes())
+    if cmp is None:
+      nodes.sort(key=sort_key, reverse=reverse)
+    elif hasattr(functools, 'cmp_to_key'):
+      compare = lambda a, b: cmp(sort_key(a), sort_key(b))
+      nodes.sort(key=functools.cmp_to_key(compare), reverse=reverse)
+    else:
+      nodes.sort(cmp=lambda a, b: cmp(sort_key(a), sort_key(b)), reverse=reverse)
+    root = prev = self.__root
+    for node in nodes:
+      node[PREV] = prev
+      prev[NEXT] = node
+      prev = node
+    prev[NEXT] = root
+    root[PREV] = prev
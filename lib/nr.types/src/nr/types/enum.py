@@ -175,21 +175,30 @@ class _EnumerationMeta(type):
 
   This fallback is not taken into account when attempting to create a new
   #Enumeration object by a string.
+
+  For fast lookups, the metaclass builds a dictionary that maps the values
+  (`_values`) and the names (`_members`) to the enumeration objects and a
+  tuple of the value-sorted enumeration objects (`_sorted`). Declare
+  `__slots__ = ()` on the class to create the objects without a `__dict__`.
   """
 
   _values = None
+  _members = None
+  _sorted = None
   __fallback__ = None
 
   def __new__(cls, name, bases, data):
-
     # Unpack all Data objects and create a dictionary of
     # values that will be converted to instances of the
     # enumeration class later.
     enum_values = {}
     collections = {}
     for key, value in data.items():
+      if key == '__slots__':
+        continue
+
       # Unpack Data objects into the class.
-      if isinstance(value, Data):
+      elif isinstance(value, Data):
         data[key] = value.unpack()
 
       # Integers will be enumeration values.
@@ -211,6 +220,7 @@ class _EnumerationMeta(type):
     # that will map the integral values to the instances.
     class_ = type.__new__(cls, name, bases, data)
     class_._values = {}
+    class_._members = {}
 
     # Iterate over all entries in the data entries and
     # convert integral values to instances of the enumeration
@@ -230,8 +240,10 @@ class _EnumerationMeta(type):
         obj.name = '-invalid-'
       else:
         class_._values[value] = obj
+        class_._members[key] = obj
       setattr(class_, key, obj)
 
+    class_._sorted = tuple(sorted(six.itervalues(class_._values), key=lambda x: x.value))
 
     # Convert the collections.
     for key, value in six.iteritems(collections):
@@ -243,10 +255,10 @@ class _EnumerationMeta(type):
   def __iter__(self):
     " Iterator over value-sorted enumeration values. "
 
-    return iter(self.__values__())
+    return iter(self._sorted)
 
   def __values__(self):
-    return sorted(six.itervalues(self._values), key=lambda x: x.value)
+    return list(self._sorted)
 
   def __getattr__(self, name):
     if self.__bases__ == (object,) and name == 'Data':
@@ -265,6 +277,8 @@ class Enumeration(six.with_metaclass(_EnumerationMeta)):
   corresponds to its value.
   """
 
+  __slots__ = ('name', 'value')
+
   def __new__(cls, value, _allow_fallback=True):
     """
     Creates a new instance of the Enumeration. *value* must be the integral
@@ -292,14 +306,10 @@ class Enumeration(six.with_metaclass(_EnumerationMeta)):
     # Or by name?
     elif isinstance(value, six.string_types):
       try:
-        new_value = getattr(cls, value)
-        if type(new_value) != cls:
-          raise AttributeError
-      except AttributeError:
+        value = cls._members[value]
+      except KeyError:
         raise NoSuchEnumerationValue(cls.__name__, value)
 
-      value = new_value
-
     # At this point, value must be an object of the Enumeration
     # class, otherwise an invalid value was passed.
     if type(value) == cls:
@@ -339,6 +349,34 @@ class Enumeration(six.with_metaclass(_EnumerationMeta)):
     return False
   __bool__ = __nonzero__ # Py3
 
+  @Data
+  @classmethod
+  def from_values(cls, values, _allow_fallback=True):
+    """
+    Converts an iterable of integer values (or names or enumeration objects)
+    to a list of enumeration objects, like calling the class for every item,
+    but faster.
+
+    # Raises
+    NoSuchEnumerationValue: If a value does not match an enumeration object
+      and the class has no `__fallback__`.
+    """
+
+    # Only integers and strings are looked up directly, everything else
+    # (and values that do not match) is resolved by the constructor.
+    by_value, by_name = cls._values.get, cls._members.get
+    integer_types, string_types = six.integer_types, six.string_types
+    result = []
+    for value in values:
+      if isinstance(value, integer_types):
+        obj = by_value(value)
+      elif isinstance(value, string_types):
+        obj = by_name(value)
+      else:
+        obj = None
+      result.append(cls(value, _allow_fallback) if obj is None else obj)
+    return result
+
   # ctypes support
 
   @property
@@ -42,8 +42,32 @@ class HashDict(nr.generic.Generic['hash_key']):
 """
 
 import types
+import weakref
 from six.moves import range
 
+# Caches the classes created by subscripting generic classes, so that the
+# same arguments return the same class. Entries disappear with the classes.
+_specializations = weakref.WeakValueDictionary()
+
+
+def _cache_key(base, args):
+  """
+  Returns the key for the #_specializations cache. Arguments are compared
+  by value (and type, so `1` and `True` are different), unhashable arguments
+  are compared by identity. The identity can not be reused by another object
+  while the cached class is alive since it references its arguments.
+  """
+
+  key = [base]
+  for arg in args:
+    try:
+      hash(arg)
+    except TypeError:
+      key.append(('id', id(arg)))
+    else:
+      key.append((type(arg), arg))
+  return tuple(key)
+
 
 class GenericMeta(type):
   """
@@ -123,13 +147,21 @@ class GenericMeta(type):
         assert arg_default is not NotImplemented
         arg_value = arg_default
       bind_data.append(arg_value)
+    # The key uses the bound arguments, so that passing a default argument
+    # explicitly returns the same class.
+    key = _cache_key(cls, bind_data)
+    result = _specializations.get(key)
+    if result is not None:
+      return result
     type_name = '{}[{}]'.format(cls.__name__, ', '.join(repr(x) for x in bind_data))
     data = {
       '__module__': cls.__module__,
       '__generic_bind__': bind_data,
       '__generic_base__': cls
     }
-    return type(type_name, (cls,), data)
+    result = type(type_name, (cls,), data)
+    _specializations[key] = result
+    return result
 
 
 class _GenericHelperMeta(type):
@@ -137,8 +169,13 @@ class _GenericHelperMeta(type):
   def __getitem__(self, args):
     if not isinstance(args, tuple):
       args = (args,)
-    data = {'__generic_args__': list(args)}
-    return GenericMeta('Generic[{0}]'.format(args), (object,), data)
+    key = _cache_key(self, args)
+    result = _specializations.get(key)
+    if result is None:
+      data = {'__generic_args__': list(args)}
+      result = GenericMeta('Generic[{0}]'.format(args), (object,), data)
+      _specializations[key] = result
+    return result
 
 
 Generic = _GenericHelperMeta('Generic', (object,), {})
@@ -20,7 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-__all__ = ['OrderedDict', 'ObjectAsMap', 'MapAsObject', 'ChainMap', 'HashDict']
+__all__ = ['OrderedDict', 'ObjectAsMap', 'MapAsObject', 'ChainMap', 'HashDict',
+           'CachedHashDict']
 
 import six
 from . import generic
@@ -144,17 +145,76 @@ class ChainMap(object):
   A dictionary that wraps a list of dictionaries. The dictionaries passed
   into the #ChainMap will not be mutated. Setting and deleting values will
   happen on the first dictionary passed.
+
+  With *cached* enabled, the #ChainMap keeps a flattened view of the
+  dictionaries, making lookups O(1) regardless of the number of wrapped
+  dictionaries. The view is built once and updated by the mutating methods
+  of the #ChainMap. Changes made to the wrapped dictionaries directly are
+  only picked up after a call to #invalidate(), unless the wrapped
+  dictionary has a #version counter (like a #ChainMap does). The view is
+  iterated in the same order as an uncached #ChainMap.
+
+  # Attributes
+  version (int): A counter that is incremented by every mutation through
+    the #ChainMap and by #invalidate().
   """
 
-  def __init__(self, *dicts):
+  def __init__(self, *dicts, **kwargs):
+    cached = kwargs.pop('cached', False)
+    if kwargs:
+      raise TypeError('unexpected keyword argument {!r}'.format(next(iter(kwargs))))
     if not dicts:
       raise ValueError('need at least one argument')
     self._major = dicts[0]
     self._dicts = list(dicts)
     self._deleted = set()
     self._in_repr = False
+    self._cached = cached
+    self._cache = None
+    self._versioned = [d for d in dicts if hasattr(d, 'version')]
+    self._cache_versions = None
+    self.version = 0
+
+  def _view(self):
+    """
+    Returns the flattened view of the dictionaries, or #None if the
+    #ChainMap is not cached.
+    """
+
+    if not self._cached:
+      return None
+    if self._versioned:
+      versions = [d.version for d in self._versioned]
+      if versions != self._cache_versions:
+        self._cache = None
+        self._cache_versions = versions
+    if self._cache is None:
+      self._cache = dict(self._iter_items())
+    return self._cache
+
+  def invalidate(self):
+    """
+    Discards the flattened view of a cached #ChainMap. Must be called after
+    the wrapped dictionaries have been modified directly.
+    """
+
+    self._cache = None
+    self.version += 1
+
+  def _changed(self, key, value=NotImplemented):
+    # Updates the flattened view after a mutation of *key* instead of
+    # discarding it. A *value* of NotImplemented means the key was deleted.
+    self.version += 1
+    if self._cache is not None:
+      if value is NotImplemented:
+        self._cache.pop(key, None)
+      else:
+        self._cache[key] = value
 
   def __contains__(self, key):
+    view = self._view()
+    if view is not None:
+      return key in view
     if key not in self._deleted:
       for d in self._dicts:
         if key in d:
@@ -162,6 +222,9 @@ class ChainMap(object):
     return False
 
   def __getitem__(self, key):
+    view = self._view()
+    if view is not None:
+      return view[key]
     if key not in self._deleted:
       for d in self._dicts:
         try: return d[key]
@@ -169,19 +232,30 @@ class ChainMap(object):
     raise KeyError(key)
 
   def __setitem__(self, key, value):
+    # A key that is new to the first dictionary moves to the end of its keys
+    # in the iteration order, which the view can not reflect in place.
+    in_place = key in self._major
     self._major[key] = value
     self._deleted.discard(key)
+    if in_place:
+      self._changed(key, value)
+    else:
+      self.invalidate()
 
   def __delitem__(self, key):
     if key not in self:
       raise KeyError(key)
     self._major.pop(key, None)
     self._deleted.add(key)
+    self._changed(key)
 
   def __iter__(self):
     return six.iterkeys(self)
 
   def __len__(self):
+    view = self._view()
+    if view is not None:
+      return len(view)
     return sum(1 for x in self.keys())
 
   def __repr__(self):
@@ -200,32 +274,45 @@ class ChainMap(object):
   def __ne__(self, other):
     return not (self == other)
 
+  def get(self, key, default=None):
+    try:
+      return self[key]
+    except KeyError:
+      return default
+
   def pop(self, key, default=NotImplemented):
     if key not in self:
       if default is NotImplemented:
         raise KeyError(key)
       return default
+    value = self[key]
     self._major.pop(key, None)
     self._deleted.add(key)
+    self._changed(key)
+    return value
 
   def popitem(self):
     if self._major:
       key, value = self._major.popitem()
       self._deleted.add(key)
+      self._changed(key)
       return key, value
     for d in self._dicts:
       for key in six.iterkeys(d):
         if key not in self._deleted:
           self._deleted.add(key)
+          self._changed(key)
           return key, d[key]
     raise KeyError('popitem(): dictionary is empty')
 
   def clear(self):
     self._major.clear()
-    self._deleted.update(six.iterkeys(self))
+    self._deleted.update(list(self._iter_keys()))
+    self._cache = None
+    self.version += 1
 
   def copy(self):
-    return type(self)(*self._dicts[1:])
+    return type(self)(*self._dicts[1:], cached=self._cached)
 
   def setdefault(self, key, value=None):
     try:
@@ -249,29 +336,35 @@ class ChainMap(object):
       for k, v in six.iteritems(Fv):
         self[k] = v
 
-  def keys(self):
-    seen = set()
-    for d in self._dicts:
-      for key in six.iterkeys(d):
-        if key not in seen and key not in self._deleted:
-          yield key
-          seen.add(key)
+  def _iter_keys(self):
+    for key, value in self._iter_items():
+      yield key
 
-  def values(self):
+  def _iter_items(self):
     seen = set()
     for d in self._dicts:
       for key, value in six.iteritems(d):
         if key not in seen and key not in self._deleted:
-          yield value
+          yield key, value
           seen.add(key)
 
+  def keys(self):
+    view = self._view()
+    if view is not None:
+      return iter(view)
+    return self._iter_keys()
+
+  def values(self):
+    view = self._view()
+    if view is not None:
+      return six.itervalues(view)
+    return (value for key, value in self._iter_items())
+
   def items(self):
-    seen = set()
-    for d in self._dicts:
-      for key, value in six.iteritems(d):
-        if key not in seen and key not in self._deleted:
-          yield key, value
-          seen.add(key)
+    view = self._view()
+    if view is not None:
+      return six.iteritems(view)
+    return self._iter_items()
 
   if six.PY2:
     iterkeys = keys
@@ -337,6 +430,9 @@ class HashDict(generic.Generic['key_hash']):
   def __iter__(self):
     return self.iterkeys()
 
+  def __len__(self):
+    return len(self._dict)
+
   def __contains__(self, key):
     return self.KeyWrapper(key, self.key_hash) in self._dict
 
@@ -350,7 +446,7 @@ class HashDict(generic.Generic['key_hash']):
     return self._dict.values()
 
   def iteritems(self):
-    for key, value in self._dict.iteritems():
+    for key, value in six.iteritems(self._dict):
       yield key.key, value
 
   def iterkeys(self):
@@ -358,7 +454,7 @@ class HashDict(generic.Generic['key_hash']):
       yield key.key
 
   def itervalues(self):
-    return self._dict.itervalues()
+    return six.itervalues(self._dict)
 
   def get(self, key, *args):
     key = self.KeyWrapper(key, self.key_hash)
@@ -367,3 +463,157 @@ class HashDict(generic.Generic['key_hash']):
   def setdefault(self, key, value):
     key = self.KeyWrapper(key, self.key_hash)
     return self._dict.setdefault(key, value)
+
+
+class _Bucket(list):
+  " A list of the `[key, value]` entries with the same hash in a #CachedHashDict. "
+
+  __slots__ = ()
+
+
+class CachedHashDict(HashDict):
+  """
+  A variant of the #HashDict that caches the hash of every key object by its
+  identity and stores its entries in a dictionary keyed directly by the hash
+  (with a #_Bucket for keys of which the hashes collide). Accessing the
+  dictionary with a key object that was used before does neither call the
+  hash function again nor allocate a #HashDict.KeyWrapper.
+
+  The hash cache keeps a reference to the key objects, thus the identity of
+  a cached key can not be reused by another object. It is cleared when it
+  grows beyond #hash_cache_size entries. If a key object is modified in a way
+  that changes its hash, #invalidate_hash() must be called before it is used
+  with the dictionary again.
+
+  # Attributes
+  hash_cache_size (int): The maximum number of hashes that are cached.
+  """
+
+  hash_cache_size = 1024
+
+  def __init__(self):
+    generic.assert_initialized(self)
+    self._entries = {}
+    self._hashes = {}
+    self._len = 0
+
+  def __repr__(self):
+    return '{' + ', '.join('{0!r}: {1!r}'.format(k, v) for k, v in self.iteritems()) + '}'
+
+  def _hash(self, key):
+    try:
+      return self._hashes[id(key)][1]
+    except KeyError:
+      pass
+    hash_value = self.key_hash(key)
+    if len(self._hashes) >= self.hash_cache_size:
+      self._hashes.clear()
+    self._hashes[id(key)] = (key, hash_value)
+    return hash_value
+
+  def _find(self, entry, key):
+    " Returns the `[key, value]` entry for *key* from a hash table *entry*. "
+
+    if entry.__class__ is not _Bucket:
+      if entry[0] is key or entry[0] == key:
+        return entry
+      return None
+    for item in entry:
+      if item[0] is key or item[0] == key:
+        return item
+    return None
+
+  def invalidate_hash(self, key=None):
+    """
+    Removes the cached hash of the *key* object, or all cached hashes if
+    *key* is #None.
+    """
+
+    if key is None:
+      self._hashes.clear()
+    else:
+      self._hashes.pop(id(key), None)
+
+  def __getitem__(self, key):
+    entry = self._entries.get(self._hash(key))
+    if entry is not None:
+      entry = self._find(entry, key)
+      if entry is not None:
+        return entry[1]
+    raise KeyError(key)
+
+  def __setitem__(self, key, value):
+    hash_value = self._hash(key)
+    entry = self._entries.get(hash_value)
+    if entry is None:
+      self._entries[hash_value] = [key, value]
+    else:
+      item = self._find(entry, key)
+      if item is not None:
+        item[1] = value
+        return
+      if entry.__class__ is _Bucket:
+        entry.append([key, value])
+      else:
+        self._entries[hash_value] = _Bucket([entry, [key, value]])
+    self._len += 1
+
+  def __delitem__(self, key):
+    hash_value = self._hash(key)
+    entry = self._entries.get(hash_value)
+    item = None if entry is None else self._find(entry, key)
+    if item is None:
+      raise KeyError(key)
+    if item is entry:
+      del self._entries[hash_value]
+    else:
+      entry.remove(item)
+      if len(entry) == 1:
+        self._entries[hash_value] = entry[0]
+    self._len -= 1
+
+  def __len__(self):
+    return self._len
+
+  def __contains__(self, key):
+    entry = self._entries.get(self._hash(key))
+    return entry is not None and self._find(entry, key) is not None
+
+  def clear(self):
+    self._entries.clear()
+    self._hashes.clear()
+    self._len = 0
+
+  def values(self):
+    return list(self.itervalues())
+
+  def iteritems(self):
+    for entry in six.itervalues(self._entries):
+      if entry.__class__ is _Bucket:
+        for key, value in entry:
+          yield key, value
+      else:
+        yield entry[0], entry[1]
+
+  def iterkeys(self):
+    for key, value in self.iteritems():
+      yield key
+
+  def itervalues(self):
+    for key, value in self.iteritems():
+      yield value
+
+  def get(self, key, default=None):
+    entry = self._entries.get(self._hash(key))
+    if entry is not None:
+      entry = self._find(entry, key)
+      if entry is not None:
+        return entry[1]
+    return default
+
+  def setdefault(self, key, value):
+    try:
+      return self[key]
+    except KeyError:
+      self[key] = value
+      return value
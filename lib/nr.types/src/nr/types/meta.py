@@ -20,6 +20,27 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import keyword
+import re
+import six
+
+_identifier_re = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def is_identifier(name):
+  """
+  Returns #True if *name* can be used as a variable or parameter name in
+  generated source code, ie. if it is a valid identifier but not a keyword.
+  """
+
+  if not isinstance(name, six.string_types):
+    return False
+  if hasattr(name, 'isidentifier'):
+    valid = name.isidentifier()
+  else:
+    valid = _identifier_re.match(name) is not None
+  return valid and not keyword.iskeyword(name) and name != 'None'
+
 def get_staticmethod_func(cm):
   """
   Returns the function wrapped by the #staticmethod *cm*.
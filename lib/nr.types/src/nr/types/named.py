@@ -21,23 +21,107 @@
 # SOFTWARE.
 
 from .map import OrderedDict
+from .meta import is_identifier
 import six
+import types
+
+_missing = object()
+
+
+def _make_init(cls, defaults, checked=False):
+  """
+  Generates an `__init__()` method for the #Named class *cls*. *defaults*
+  maps the names of the fields that have a default value to the value or
+  an #Initializer.
+
+  If *checked* is #True, the method falls back to the generic
+  #Named.__init__() if it is called for an object of a different class
+  (eg. through `super()` from a subclass that implements its own
+  `__init__()`), with unexpected arguments or with missing arguments.
+  """
+
+  scope = {'__named_missing': _missing, '__named_cls': cls, '__named_defaults': {},
+    '__named_fallback': _fallback_init}
+  keys = list(cls.__annotations__)
+  params, conditions, checks, body, seen_default = [], [], [], [], False
+  for key in keys:
+    default = defaults.get(key, _missing)
+    if isinstance(default, Initializer):
+      scope['__named_defaults'][key] = default.func
+      params.append('{0}=__named_missing'.format(key))
+      body.append('  __named_self.{0} = __named_defaults[{0!r}]() if {0} is __named_missing else {0}\n'.format(key))
+      seen_default = True
+      continue
+    if default is not _missing:
+      scope['__named_defaults'][key] = default
+      if checked:
+        params.append('{0}=__named_missing'.format(key))
+        body.append('  __named_self.{0} = __named_defaults[{0!r}] if {0} is __named_missing else {0}\n'.format(key))
+        continue
+      params.append('{0}=__named_defaults[{0!r}]'.format(key))
+      seen_default = True
+    elif checked:
+      params.append('{0}=__named_missing'.format(key))
+      conditions.append('{0} is __named_missing'.format(key))
+    elif seen_default:
+      # Python does not allow a parameter without a default value after one
+      # with a default value, but a Named class does.
+      params.append('{0}=__named_missing'.format(key))
+      checks.append('  if {0} is __named_missing:\n    raise TypeError({1!r})\n'.format(
+        key, '{0}() missing argument "{1}"'.format(cls.__name__, key)))
+    else:
+      params.append(key)
+    body.append('  __named_self.{0} = {0}\n'.format(key))
+
+  if checked:
+    params.append('*__named_args, **__named_kwargs')
+    conditions.append('__named_args or __named_kwargs')
+    conditions.append('__named_self.__class__ is not __named_cls')
+    checks.append('  if {0}:\n'
+      '    return __named_fallback(__named_self, {1!r}, ({2}), __named_args, __named_kwargs)\n'
+      .format(' or '.join(conditions), tuple(keys), ''.join(k + ', ' for k in keys)))
+  source = 'def __init__(__named_self{0}):\n{1}  pass\n'.format(
+    ''.join(', ' + x for x in params), ''.join(checks + body))
+  six.exec_(source, scope)
+  func = scope['__init__']
+  func.__named_generated__ = True
+  func.__named_checked__ = checked
+  func.__qualname__ = getattr(cls, '__qualname__', cls.__name__) + '.__init__'
+  return func
+
+
+def _fallback_init(self, keys, values, args, kwargs):
+  # All values have been bound by position if there are more arguments.
+  if args:
+    return Named.__init__(self, *(values + args), **kwargs)
+  for key, value in zip(keys, values):
+    if value is not _missing:
+      kwargs[key] = value
+  return Named.__init__(self, **kwargs)
 
 
 class _NamedMeta(type):
   """
-  Metaclass for the #Named class.
+  Metaclass for the #Named class. It generates an `__init__()` method that
+  is specialised for the annotated fields of every subclass (unless it, or
+  a base other than #Named, implements `__init__()`). If the class sets
+  `__named_slots__ = True`, the fields are stored in `__slots__` and their
+  default values are moved to the `__named_defaults__` dictionary.
+
+  The generated `__init__()` binds the default values of the fields. It is
+  generated again when a field is assigned to or deleted from the class,
+  but not if the `__named_defaults__` dictionary is modified directly.
   """
 
-  def __init__(self, name, bases, data):
+  def __new__(cls, name, bases, data):
     # Inherit the annotations of the base classes, in the correct order.
-    annotations = getattr(self, '__annotations__', {})
+    annotations = data.get('__annotations__', {})
     if isinstance(annotations, (list, tuple)):
+      annotations = list(annotations)
       for i, item in enumerate(annotations):
         if len(item) == 3:
-          setattr(self, item[0], item[2])
-          item = item[:2]
-          annotations[i] = item
+          data[item[0]] = item[2]
+          annotations[i] = item[:2]
       annotations = OrderedDict(annotations)
     new_annotations = OrderedDict()
     for base in bases:
@@ -48,8 +132,113 @@ class _NamedMeta(type):
         if key not in annotations:
           new_annotations[key] = value
     new_annotations.update(annotations)
-    self.__annotations__ = new_annotations
+    data['__annotations__'] = new_annotations
+
+    if data.get('__named_slots__', any(getattr(b, '__named_slots__', False) for b in bases)):
+      defaults = {}
+      for base in reversed(bases):
+        defaults.update(getattr(base, '__named_defaults__', {}))
+      inherited_slots = set()
+      for base in bases:
+        for klass in base.__mro__:
+          inherited_slots.update(vars(klass).get('__slots__', ()))
+      for key in new_annotations:
+        if key in data:
+          defaults[key] = data.pop(key)
+        elif key not in defaults:
+          for base in bases:
+            value = getattr(base, key, _missing)
+            if value is not _missing and not isinstance(value, types.MemberDescriptorType):
+              defaults[key] = value
+              break
+      data['__named_defaults__'] = defaults
+      data['__slots__'] = tuple(k for k in new_annotations if k not in inherited_slots)
+
+    return super(_NamedMeta, cls).__new__(cls, name, bases, data)
+
+  def __init__(self, name, bases, data):
     super(_NamedMeta, self).__init__(name, bases, data)
+    if self._generates_init():
+      self._generate_init()
+    else:
+      # The __init__() generated for a base class may now be called for
+      # objects of this class, with fields that it was not generated for.
+      for base in self.__mro__[1:]:
+        func = vars(base).get('__init__')
+        if getattr(func, '__named_generated__', False) and not func.__named_checked__:
+          base._generate_init(checked=True)
+
+  def _generate_init(self, checked=False):
+    if '__named_defaults__' in vars(self):
+      defaults = self.__named_defaults__
+    else:
+      defaults = {}
+      for key in self.__annotations__:
+        value = getattr(self, key, _missing)
+        if value is not _missing:
+          defaults[key] = value
+    self.__init__ = _make_init(self, defaults, checked)
+
+  def _regenerate_inits(self):
+    # Called when the default value of a field changes, the generated
+    # __init__() methods bind the default values.
+    classes = [self]
+    while classes:
+      cls = classes.pop()
+      func = vars(cls).get('__init__')
+      if getattr(func, '__named_generated__', False):
+        cls._generate_init(func.__named_checked__)
+      classes.extend(type.__subclasses__(cls))
+
+  def _set_slot_default(self, name, value):
+    # The fields of a class with __named_slots__ are member descriptors,
+    # their default values are stored in __named_defaults__ instead. The
+    # subclasses that inherited the old default value get the new one.
+    old = self.__named_defaults__.get(name, _missing)
+    classes = [self]
+    while classes:
+      cls = classes.pop()
+      defaults = vars(cls).get('__named_defaults__')
+      if defaults is None or defaults.get(name, _missing) is not old:
+        continue
+      if value is _missing:
+        del defaults[name]
+      else:
+        defaults[name] = value
+      classes.extend(type.__subclasses__(cls))
+
+  def __setattr__(self, name, value):
+    if name in self.__annotations__ and '__named_defaults__' in vars(self):
+      self._set_slot_default(name, value)
+    else:
+      super(_NamedMeta, self).__setattr__(name, value)
+    if name in self.__annotations__:
+      self._regenerate_inits()
+
+  def __delattr__(self, name):
+    if name in self.__annotations__ and '__named_defaults__' in vars(self):
+      if name not in self.__named_defaults__:
+        raise AttributeError(name)
+      self._set_slot_default(name, _missing)
+    else:
+      super(_NamedMeta, self).__delattr__(name)
+    if name in self.__annotations__:
+      self._regenerate_inits()
+
+  def _generates_init(self):
+    # Only replace an __init__() that is inherited from the #Named base
+    # class or that has been generated for a parent class. Fields that are
+    # not valid identifiers (eg. keywords) can not be parameters, the
+    # inherited __init__() falls back to the generic implementation.
+    if '__init__' in vars(self):
+      return False
+    if not all(is_identifier(k) for k in self.__annotations__):
+      return False
+    for base in self.__mro__[1:]:
+      if '__init__' in vars(base):
+        func = vars(base)['__init__']
+        return base is Named or getattr(func, '__named_generated__', False)
+    return False
 
   def __getattr__(self, name):
     if self.__bases__ == (object,) and name == 'Initializer':
@@ -84,37 +273,50 @@ class Named(six.with_metaclass(_NamedMeta)):
     name: str = Named.Initializer(random_name)
     age: int = 0
   ```
+
+  Set `__named_slots__ = True` on the class to store the fields in
+  `__slots__` instead of the instance dictionary.
   """
 
+  __slots__ = ()
+
   def __init__(self, *args, **kwargs):
     annotations = getattr(self, '__annotations__', {})
     if len(args) > len(annotations):
       raise TypeError('{}() expected {} positional arguments, got {}'
         .format(type(self).__name__, len(annotations), len(args)))
     if isinstance(annotations, (list, tuple)):
-      annotations = OrderedDict(annoations)
+      annotations = OrderedDict(annotations)
 
     for arg, (key, ant) in zip(args, annotations.items()):
-      setattr(self, key, arg)
       if key in kwargs:
         raise TypeError('{}() duplicate value for argument "{}"'
           .format(type(self).__name__, key))
+      kwargs[key] = arg
+
+    for key in kwargs.keys():
+      if key not in annotations:
+        raise TypeError('{}() unexpected keyword argument "{}"'
+          .format(type(self).__name__, key))
+
+    # Look up all default values before any #Initializer is called.
+    defaults = {}
+    for key in annotations:
+      if key not in kwargs:
+        value = getattr(self, key, _missing)
+        if value is _missing:
+          value = getattr(self, '__named_defaults__', {}).get(key, _missing)
+          if value is _missing:
+            raise TypeError('{}() missing argument "{}"'
+              .format(type(self).__name__, key))
+        defaults[key] = value
 
-    for key, ant in annotations.items():
+    for key in annotations:
       if key in kwargs:
-        setattr(self, key, kwargs.pop(key))
+        setattr(self, key, kwargs[key])
       else:
-        try:
-          value = getattr(self, key)
-        except AttributeError:
-          raise TypeError('{}() missing argument "{}"'
-            .format(type(self).__name__, key))
-        if isinstance(value, Initializer):
-          setattr(self, key, value.func())
-
-    for key in kwargs.keys():
-      raise TypeError('{}() unexpected keyword argument "{}"'
-        .format(type(self).__name__, key))
+        value = defaults[key]
+        setattr(self, key, value.func() if isinstance(value, Initializer) else value)
 
   def __repr__(self):
     members = ', '.join('{}={!r}'.format(k, getattr(self, k)) for k in self.__annotations__)
@@ -20,7 +20,149 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-class Record(object):
+from .meta import is_identifier
+import six
+
+
+def _compile_function(name, source, scope):
+  """
+  Compiles the *source* code of a function *name* in the namespace *scope*
+  and returns the function. Used to generate specialised methods for the
+  members of a class, like #collections.namedtuple does.
+  """
+
+  six.exec_(source, scope)
+  func = scope[name]
+  func.__record_generated__ = True
+  return func
+
+
+def _raise_invalid_key(index_or_key):
+  if isinstance(index_or_key, six.integer_types):
+    raise IndexError('record index out of range')
+  elif isinstance(index_or_key, six.string_types):
+    raise KeyError(index_or_key)
+  raise TypeError('expected int or str')
+
+
+class _RecordMeta(type):
+  """
+  Metaclass for the #Record class. For every subclass that defines
+  `__slots__`, it generates an `__init__()`, `__iter__()`, `__getitem__()`,
+  `__setitem__()` and `__eq__()` method that are specialised for the slots
+  (unless they are implemented explicitly in the class or one of its bases,
+  or a slot is not a valid identifier), and removes the overhead of the `_get_<name>()`/`_set_<name>()` hooks
+  from attribute access if the class does not implement any of them.
+  """
+
+  def __init__(cls, name, bases, data):
+    super(_RecordMeta, cls).__init__(name, bases, data)
+    slots = getattr(cls, '__slots__', None)
+    if slots is None:
+      return
+    if isinstance(slots, six.string_types):
+      slots = (slots,)
+    fields = tuple(slots)
+    cls.__slot_index__ = dict((key, index) for index, key in enumerate(fields))
+
+    # Hooks are detected when the class is created, adding a _get_<name>()
+    # or _set_<name>() method to the class later will not be recognized.
+    for method, prefix in (('__getattribute__', '_get_'), ('__setattr__', '_set_')):
+      if cls._generates(method):
+        hooked = any(callable(getattr(cls, prefix + key, None)) for key in fields)
+        setattr(cls, method, vars(Record if hooked else object)[method])
+
+    # Slots that are not valid identifiers (eg. keywords) can not be used in
+    # the generated source code, the generic methods of #Record are used.
+    generic = () if all(is_identifier(k) for k in fields) else \
+      ('__init__', '__iter__', '__eq__')
+    for method in ('__init__', '__iter__', '__getitem__', '__setitem__', '__eq__'):
+      if cls._generates(method):
+        if method in generic:
+          func = vars(Record)[method]
+        else:
+          func = getattr(cls, '_generate' + method[1:-2])(fields)
+        setattr(cls, method, func)
+
+  def _generates(cls, method):
+    # Only replace methods that are inherited from the #Record base class
+    # or that have been generated for a parent record.
+    for base in cls.__mro__:
+      if method in vars(base):
+        func = vars(base)[method]
+        if func is vars(Record).get(method) or getattr(func, '__record_generated__', False):
+          return True
+        return base is not object and func is vars(object).get(method)
+    return False
+
+  def _generate_init(cls, fields):
+    defaults = getattr(cls, '__defaults__', None) or {}
+    scope = {'_defaults': defaults, '_missing': object()}
+    params, body, seen_default = [], [], False
+    for key in fields:
+      if key in defaults:
+        params.append('{0}=_defaults[{0!r}]'.format(key))
+        seen_default = True
+      elif seen_default:
+        # Python does not allow a parameter without a default value after
+        # one with a default value, but a Record does.
+        params.append('{0}=_missing'.format(key))
+        body.append('  if {0} is _missing:\n'
+                    '    raise TypeError("missing argument {0!r}")\n'.format(key))
+      else:
+        params.append(key)
+      body.append('  __record_self.{0} = {0}\n'.format(key))
+    source = 'def __init__(__record_self{0}):\n{1}  pass\n'.format(
+      ''.join(', ' + x for x in params), ''.join(body))
+    return _compile_function('__init__', source, scope)
+
+  def _generate_iter(cls, fields):
+    values = ''.join('self.{0}, '.format(key) for key in fields)
+    source = 'def __iter__(self):\n  return iter(({0}))\n'.format(values)
+    return _compile_function('__iter__', source, {})
+
+  def _generate_getitem(cls, fields):
+    source = (
+      'def __getitem__(self, index_or_key):\n'
+      '  try:\n'
+      '    name = _names[index_or_key]\n'
+      '  except (KeyError, TypeError):\n'
+      '    _raise_invalid_key(index_or_key)\n'
+      '  return _getattr(self, name)\n')
+    return _compile_function('__getitem__', source, cls._item_scope(fields))
+
+  def _generate_setitem(cls, fields):
+    source = (
+      'def __setitem__(self, index_or_key, value):\n'
+      '  try:\n'
+      '    name = _names[index_or_key]\n'
+      '  except (KeyError, TypeError):\n'
+      '    _raise_invalid_key(index_or_key)\n'
+      '  _setattr(self, name, value)\n')
+    return _compile_function('__setitem__', source, cls._item_scope(fields))
+
+  def _item_scope(cls, fields):
+    # Maps the slot names as well as positive and negative indices to the
+    # slot names.
+    names = dict((key, key) for key in fields)
+    names.update((i, key) for i, key in enumerate(fields))
+    names.update((i - len(fields), key) for i, key in enumerate(fields))
+    return {'_names': names, '_getattr': getattr, '_setattr': setattr,
+      '_raise_invalid_key': _raise_invalid_key}
+
+  def _generate_eq(cls, fields):
+    body = ''.join('    if self.{0} != other.{0}: return False\n'.format(key)
+      for key in fields)
+    source = (
+      'def __eq__(self, other):\n'
+      '  try:\n{0}'
+      '  except AttributeError:\n'
+      '    return False\n'
+      '  return True\n').format(body or '    pass\n')
+    return _compile_function('__eq__', source, {})
+
+
+class Record(six.with_metaclass(_RecordMeta)):
   """
   This class can be considered a new base for all classes that implement
   the `__slots__` interface. It provides convenient methods to treat the
@@ -37,6 +179,11 @@ class Record(object):
   data = MyRecord('the-foo', 42, ham="spam")
   assert data.egg = 'yummy'
   ```
+
+  The `__init__()`, `__iter__()`, `__getitem__()`, `__setitem__()` and
+  `__eq__()` methods are generated for every subclass when it is created.
+  Getters and setters (`_get_<name>()`, `_set_<name>()`) must be defined in
+  the class body, they are not recognized if they are added later.
   """
 
   def __init__(self, *args, **kwargs):
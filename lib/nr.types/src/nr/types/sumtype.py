@@ -26,13 +26,38 @@ Provides simple sumtype declarations.
 from six.moves import zip
 from six import iteritems, with_metaclass
 
+from .meta import is_identifier
 import re
-import types
 import six
 
 __all__ = ['Constructor', 'MemberOf', 'Sumtype', 'AddIsMethods']
 
 
+def _make_methods(args):
+  """
+  Generates an `__init__()` method that accepts the *args* of a #Constructor
+  and assigns them to the slots of the same name, and an `__iter__()` method
+  that iterates over the values of the slots. If one of the *args* is not a
+  valid identifier (eg. a keyword), only a generic `__init__()` is returned.
+  """
+
+  if not all(is_identifier(x) for x in args):
+    def __init__(self, *values):
+      for key, value in zip(args, values):
+        setattr(self, key, value)
+    return {'__init__': __init__}
+
+  source = (
+    'def __init__(self{0}):\n{1}  pass\n'
+    'def __iter__(self):\n  return iter(({2}))\n').format(
+      ''.join(', ' + x for x in args),
+      ''.join('  self.{0} = {0}\n'.format(x) for x in args),
+      ''.join('self.{0}, '.format(x) for x in args))
+  scope = {}
+  six.exec_(source, scope)
+  return {'__init__': scope['__init__'], '__iter__': scope['__iter__']}
+
+
 class Constructor(object):
   """
   Represents a constructor for a sumtype.
@@ -41,28 +66,41 @@ class Constructor(object):
   def __init__(self, *args):
     self.name = None
     self.type = None
+    self.cls = None
     self.args = args
     self.members = {}
 
   def bind(self, type, name):
+    """
+    Returns a copy of the constructor that is bound to the sumtype *type*
+    under the specified *name*. This creates the #cls of which the objects
+    are created by the constructor. It is a slotted subclass of *type* with
+    the constructor's members and an `__init__()` for its arguments.
+    """
+
     obj = Constructor(*self.args)
     obj.type = type
     obj.name = name
     obj.members = self.members.copy()
+    conflicts = [k for k in self.args if k in obj.members]
+    if conflicts:
+      raise TypeError('{}.{}: member {!r} conflicts with a constructor argument'
+        .format(type.__name__, name, conflicts[0]))
+    data = _make_methods(self.args)
+    data.update(obj.members)
+    data['__slots__'] = self.args
+    data['__constructor__'] = obj
+    data['__module__'] = type.__module__
+    obj.cls = _TypeMeta('{0}.{1}'.format(type.__name__, name), (type,), data)
     return obj
 
-  def accept_args(self, *args):
-    if self.type is None or self.name is None:
+  def __call__(self, *args):
+    if self.cls is None:
       raise RuntimeError('unbound Constructor')
     if len(args) != len(self.args):
       raise TypeError('{}.{}() expected {} arguments, got {}'.format(
         self.type.__name__, self.name, len(self.args), len(args)))
-    return dict(zip(self.args, args))
-
-  def __call__(self, *args):
-    if self.type is None or self.name is None:
-      raise RuntimeError('unbound Constructor')
-    return self.type(self, self.accept_args(*args))
+    return self.cls(*args)
 
 
 class MemberOf(object):
@@ -87,6 +125,7 @@ class MemberOf(object):
   def __call__(self, value):
     if not self.name:
       self.name = value.__name__
+    self.value = value
     for c in self.constructors:
       c.members[self.name] = value
     return self
@@ -99,6 +138,10 @@ class MemberOf(object):
 class _TypeMeta(type):
 
   def __new__(cls, name, bases, attrs):
+    # The classes generated for the constructors are created as they are.
+    if '__constructor__' in attrs:
+      return type.__new__(cls, name, bases, attrs)
+
     subtype = type.__new__(cls, name, bases, attrs)
 
     # Collect all new constructors.
@@ -110,6 +153,7 @@ class _TypeMeta(type):
     # Update constructors from MemberOf declarations.
     for key, value in list(iteritems(vars(subtype))):
       if isinstance(value, MemberOf):
+        value.update_constructors(value.name or key)
         delattr(subtype, key)
 
     # Bind constructors.
@@ -143,26 +187,80 @@ class Sumtype(with_metaclass(_TypeMeta)):
 
   assert not hasattr(Result, 'Constructor')
   ```
+
+  The values of an object are stored in the slots of the class that is
+  created for its constructor. Declare `__slots__ = ()` on the sumtype to
+  store nothing else, otherwise its objects have a `__dict__` as usual.
   """
 
   __addins__ = []
   __constructors__ = {}
-
-  def __init__(self, constructor, attrs):
-    assert isinstance(constructor, Constructor), type(constructor)
-    assert isinstance(attrs, dict), type(attrs)
-    self.__constructor__ = constructor
-    for key, value in iteritems(constructor.members):
-      if isinstance(value, types.FunctionType):
-        value = value.__get__(self, constructor.type)
-      setattr(self, key, value)
-    for key in constructor.args:
-      if key not in attrs:
-        raise ValueError('missing key in attrs: {!r}'.format(key))
-    for key, value in iteritems(attrs):
-      if key not in constructor.args:
-        raise ValueError('unexpected key in attrs: {!r}'.format(key))
-      setattr(self, key, value)
+  __slots__ = ()
+
+  @classmethod
+  def matcher(cls, **handlers):
+    """
+    Returns a function that accepts an object of the sumtype and calls the
+    handler with the name of its constructor, passing the values of the
+    object as positional arguments. A handler with the name `_` is used for
+    all constructors that have no handler and is called with the object.
+
+    The handlers are looked up in a table that is created once, thus using
+    the returned function is faster than calling #match() repeatedly.
+
+    # Raises
+    TypeError: If a handler does not match a constructor or if there is
+      no handler for a constructor and no `_` handler.
+    """
+
+    default = handlers.pop('_', None)
+    table = {}
+    for name, handler in iteritems(handlers):
+      if name not in cls.__constructors__:
+        raise TypeError('{} has no constructor {!r}'.format(cls.__name__, name))
+      table[getattr(cls, name).cls] = handler
+    missing = [k for k in cls.__constructors__ if k not in handlers]
+    if missing and default is None:
+      raise TypeError('{}.matcher() missing handlers for {}'.format(
+        cls.__name__, ', '.join(sorted(missing))))
+
+    def dispatch(obj):
+      try:
+        handler = table[type(obj)]
+      except KeyError:
+        if default is None:
+          raise TypeError('expected {}, got {}'.format(cls.__name__, type(obj).__name__))
+        return default(obj)
+      return handler(*obj)
+
+    return dispatch
+
+  def match(self, **handlers):
+    """
+    Calls the handler with the name of the object's constructor, passing the
+    values of the object as positional arguments, or the `_` handler with
+    the object itself. See also #matcher().
+
+    # Raises
+    TypeError: If there is no matching handler.
+    """
+
+    try:
+      handler = handlers[self.__constructor__.name]
+    except KeyError:
+      default = handlers.get('_')
+      if default is None:
+        raise TypeError('no handler for {}.{}'.format(
+          self.__constructor__.type.__name__, self.__constructor__.name))
+      return default(self)
+    return handler(*self)
+
+  def __reduce__(self):
+    # The class of the object can not be pickled by reference, the object
+    # is recreated with its constructor instead.
+    constructor = self.__constructor__
+    state = getattr(self, '__dict__', None) or None
+    return (_construct, (constructor.type, constructor.name, tuple(self)), state)
 
   def __getitem__(self, index):
     if hasattr(index, '__index__'):
@@ -182,10 +280,14 @@ class Sumtype(with_metaclass(_TypeMeta)):
     return len(self.__constructor__.args)
 
   def __repr__(self):
-    return '{}.{}({})'.format(type(self).__name__, self.__constructor__.name,
+    return '{}.{}({})'.format(self.__constructor__.type.__name__, self.__constructor__.name,
       ', '.join('{}={!r}'.format(k, getattr(self, k)) for k in self.__constructor__.args))
 
 
+def _construct(type, name, args):
+  return getattr(type, name)(*args)
+
+
 class AddIsMethods(object):
 
   @staticmethod
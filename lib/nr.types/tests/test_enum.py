@@ -1,6 +1,7 @@
 
 from nose.tools import *
 from nr.types.enum import Enumeration
+import weakref
 
 def test_enum():
   assert hasattr(Enumeration, 'Data')
@@ -18,3 +19,41 @@ def test_enum():
   assert_equals(Color.Blue, Color(1))
   assert_equals(set([Color.Red, Color.Green, Color.Blue]), set(Color))
   assert_equals(set([Color.Red, Color.Green, Color.Blue]), set(Color.__values__()))
+
+def test_lookup_and_from_values():
+  class Color(Enumeration):
+    __slots__ = ()
+    Red = 0
+    Green = 2
+    Blue = 1
+    Rgb = [0, 2, 1]
+
+  assert_is(Color('Green'), Color.Green)
+  assert_raises(ValueError, lambda: Color('Rgb'))
+  assert_raises(ValueError, lambda: Color('from_values'))
+  assert_equals(list(Color), [Color.Red, Color.Blue, Color.Green])
+  assert_equals(Color.Rgb, [Color.Red, Color.Green, Color.Blue])
+  assert_raises(AttributeError, lambda: setattr(Color.Red, 'foo', 1))
+
+  values = Color.from_values(iter([2, 'Blue', Color.Red, 0]))
+  assert_equals(values, [Color.Green, Color.Blue, Color.Red, Color.Red])
+  assert_raises(ValueError, lambda: Color.from_values([0, 5]))
+
+  class Flags(Enumeration):
+    A = 1
+    B = 2
+    __fallback__ = 0
+  assert_equals([x.name for x in Flags.from_values([2, 3])], ['B', '-invalid-'])
+
+  # Like calling the class, only integers are looked up by value.
+  assert_equals(Color.from_values([True]), [Color.Blue])
+  assert_raises(TypeError, lambda: Color.from_values([1.0]))
+  assert_raises(TypeError, lambda: Color.from_values([[1]]))
+
+def test_instance_dict_without_slots():
+  class Color(Enumeration):
+    Red = 0
+
+  Color.Red.comment = 'not slotted'
+  assert_equals(Color.Red.comment, 'not slotted')
+  assert_is(weakref.ref(Color.Red)(), Color.Red)
@@ -0,0 +1,59 @@
+# Copyright (c) 2018  Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from nr.types import generic
+from nr.types.map import HashDict
+from nose.tools import *
+import gc
+
+
+def test_specialization_identity():
+  assert_is(HashDict[len], HashDict[len])
+  assert_is(HashDict[len][id], HashDict[id])
+  assert_is_not(HashDict[len], HashDict[id])
+  assert_is(generic.Generic['a', 'b'], generic.Generic['a', 'b'])
+  assert_true(isinstance(HashDict[len](), HashDict[len]))
+
+
+def test_specialization_unhashable_args():
+  class Pair(generic.Generic['first', 'second']):
+    pass
+  arg = []
+  assert_is(Pair[arg, 1], Pair[arg, 1])
+  assert_is_not(Pair[arg, 1], Pair[[], 1])
+  assert_is_not(Pair[arg, 1], Pair[arg, True])
+  assert_equals(Pair[arg, 2].second, 2)
+
+
+def test_specialization_defaults():
+  class Pair(generic.Generic[('first', 0), ('second', 0)]):
+    pass
+  assert_is(Pair[1], Pair[1, 0])
+  assert_is(Pair[1][0, 0], Pair[0])
+  assert_is_not(Pair[1], Pair[1, False])
+  assert_raises(TypeError, lambda: Pair[1, 2, 3])
+
+
+def test_specialization_weak():
+  def key_hash(x):
+    return 0
+  cls_id = id(HashDict[key_hash])
+  gc.collect()
+  assert_false(any(id(cls) == cls_id for cls in generic._specializations.values()))
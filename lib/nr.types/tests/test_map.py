@@ -21,14 +21,55 @@
 # SOFTWARE.
 
 from nose.tools import *
-from nr.types.map import ChainMap, MapAsObject
+from nr.types.map import ChainMap, MapAsObject, HashDict, CachedHashDict
 
 
 def test_ChainDict():
+  _test_chain_map(cached=False)
+
+
+def test_ChainDict_cached():
+  _test_chain_map(cached=True)
+
+  a = {'foo': 42}
+  d = ChainMap({}, a, cached=True)
+  assert_equals(d['foo'], 42)
+  a['foo'] = 'changed'
+  assert_equals(d['foo'], 42)
+  d.invalidate()
+  assert_equals(d['foo'], 'changed')
+
+  # Changes to a wrapped ChainMap are detected by its version counter.
+  inner = ChainMap({}, {'foo': 1})
+  outer = ChainMap({}, inner, cached=True)
+  assert_equals(outer['foo'], 1)
+  inner['foo'] = 2
+  assert_equals(outer['foo'], 2)
+  assert_equals(outer.pop('foo'), 2)
+  assert_false('foo' in outer)
+  assert_equals(len(outer), 0)
+
+
+def test_ChainDict_cached_order():
+  # The cached view iterates in the same order as an uncached ChainMap.
+  def run(cached):
+    d = ChainMap({'a': 1}, {'b': 2, 'c': 3}, cached=cached)
+    orders = [list(d.items())]
+    for op in [lambda: d.__setitem__('c', 4), lambda: d.__setitem__('a', 5),
+               lambda: d.__setitem__('d', 6), lambda: d.pop('b'),
+               lambda: d.__setitem__('b', 7), lambda: d.__delitem__('a'),
+               lambda: d.__setitem__('a', 8)]:
+      op()
+      orders.append(list(d.items()))
+    return orders
+  assert_equals(run(True), run(False))
+
+
+def _test_chain_map(cached):
   a = {'foo': 42}
   b = {'bar': 'spam'}
   c = {}
-  d = ChainMap({}, a, b, c)
+  d = ChainMap({}, a, b, c, cached=cached)
 
   assert_equals(str(d), 'ChainMap({})'.format({'foo': 42, 'bar': 'spam'}))
   assert_equals(d['foo'], a['foo'])
@@ -67,3 +108,52 @@ def test_ObjectFromMapping():
   assert_equals(o.b, 'foo')
   assert_equals(o.c, 'egg')
   assert_equals(dir(o), ['a', 'b', 'c'])
+
+
+def _test_hash_dict(cls):
+  # All lists of the same length collide, but are compared by value.
+  d = cls[len]()
+  a, b = [1, 2], [3, 4]
+  d[a] = 'a'
+  d[b] = 'b'
+  d[[5]] = 'c'
+  assert_equals(len(d), 3)
+  assert_equals(d[[1, 2]], 'a')
+  assert_equals(d[b], 'b')
+  assert_equals(d.get([3, 5]), None)
+  assert_true([5] in d)
+  assert_false([6] in d)
+  assert_equals(sorted(d.items()), [([1, 2], 'a'), ([3, 4], 'b'), ([5], 'c')])
+  d[[3, 4]] = 'B'
+  assert_equals(d[b], 'B')
+  del d[a]
+  assert_raises(KeyError, lambda: d[a])
+  assert_equals(sorted(d.values()), ['B', 'c'])
+  assert_equals(d.setdefault([9, 9], 'x'), 'x')
+  assert_equals(len(d), 3)
+
+
+def test_HashDict():
+  _test_hash_dict(HashDict)
+
+
+def test_CachedHashDict():
+  _test_hash_dict(CachedHashDict)
+
+  calls = []
+  def key_hash(key):
+    calls.append(key)
+    return sum(key)
+  d = CachedHashDict[key_hash]()
+  key = [1, 2]
+  d[key] = 'foo'
+  assert_equals(d[key], 'foo')
+  assert_true(key in d)
+  assert_equals(len(calls), 1)
+
+  probe = [0]
+  assert_raises(KeyError, lambda: d[probe])
+  probe[:] = [1, 2]
+  assert_raises(KeyError, lambda: d[probe])  # The stale hash is cached.
+  d.invalidate_hash(probe)
+  assert_equals(d[probe], 'foo')
@@ -8,3 +8,128 @@ def test_has_initializer_member():
   class Person(Named):
     pass
   assert not hasattr(Person, 'Initializer')
+
+
+def test_generated_init():
+  counter = []
+  def next_id():
+    counter.append(None)
+    return len(counter)
+
+  class Person(Named):
+    __annotations__ = [
+      ('mail', str),
+      ('id', int, Named.Initializer(next_id)),
+      ('age', int, 0),
+      ('name', str),
+    ]
+
+  p = Person('a@b.c', name='John')
+  assert_equals(p.asdict(), {'mail': 'a@b.c', 'id': 1, 'age': 0, 'name': 'John'})
+  assert_equals(Person('x', 42, 3, 'y').asdict(), {'mail': 'x', 'id': 42, 'age': 3, 'name': 'y'})
+  assert_equals(Person('x', name='y').id, 2)
+  assert_raises(TypeError, lambda: Person('x'))
+  assert_raises(TypeError, lambda: Person('x', 1, 2, 3, 4))
+  assert_raises(TypeError, lambda: Person('x', name='y', foo=1))
+
+  class Employee(Person):
+    __annotations__ = [('company', str, 'ACME')]
+  assert_equals(list(Employee('x', name='y')), ['x', 3, 0, 'y', 'ACME'])
+
+
+def test_slots():
+  class Point(Named):
+    __named_slots__ = True
+    __annotations__ = [('x', int), ('y', int, 0)]
+
+  class Point3(Point):
+    __annotations__ = [('z', int, 1)]
+
+  p = Point3(1)
+  assert_equals(list(p), [1, 0, 1])
+  assert_equals(repr(p), 'Point3(x=1, y=0, z=1)')
+  assert_false(hasattr(p, '__dict__'))
+  assert_raises(AttributeError, lambda: setattr(p, 'w', 1))
+
+
+def test_explicit_init():
+  class Pair(Named):
+    __annotations__ = [('a', int), ('b', int)]
+    def __init__(self, a):
+      super(Pair, self).__init__(a, a)
+
+  class Sub(Pair):
+    pass
+
+  assert_equals(list(Sub(2)), [2, 2])
+
+
+def test_explicit_init_in_subclass():
+  class A(Named):
+    __annotations__ = [('x', int)]
+
+  class B(A):
+    __annotations__ = [('y', int, 5)]
+    def __init__(self, *args, **kwargs):
+      super(B, self).__init__(*args, **kwargs)
+
+  assert_equals(B(1, 2).asdict(), {'x': 1, 'y': 2})
+  assert_equals(B(x=1).asdict(), {'x': 1, 'y': 5})
+  assert_equals(A(3).asdict(), {'x': 3})
+  assert_raises(TypeError, lambda: B())
+
+  class C(Named):
+    __named_slots__ = True
+    __annotations__ = [('x', int), ('y', int, 0)]
+
+  class D(C):
+    __annotations__ = [('z', int, 1)]
+    def __init__(self, x, **kwargs):
+      super(D, self).__init__(x, **kwargs)
+
+  assert_equals(list(D(1, z=2)), [1, 0, 2])
+
+
+def test_generated_init_errors_and_defaults():
+  class Person(Named):
+    __annotations__ = [('name', str), ('age', int, 0)]
+
+  with assert_raises(TypeError) as cm:
+    Person()
+  assert_in('Person', str(cm.exception))
+  if hasattr(Person, '__qualname__'):
+    assert_true(Person.__init__.__qualname__.endswith('Person.__init__'))
+
+  class Employee(Person):
+    __annotations__ = [('company', str, 'ACME')]
+
+  Person.age = 10
+  assert_equals(Person('John').age, 10)
+  assert_equals(Employee('John').age, 10)
+  Person.age = Named.Initializer(lambda: 20)
+  assert_equals(Employee('John').age, 20)
+  del Person.age
+  assert_raises(TypeError, lambda: Employee('John'))
+  assert_equals(Employee('John', 1).age, 1)
+
+  class Point(Named):
+    __named_slots__ = True
+    __annotations__ = [('x', int, 0)]
+
+  class Point3(Point):
+    __annotations__ = [('z', int, 0)]
+
+  Point.x = 1
+  assert_equals(list(Point3()), [1, 0])
+  p = Point()
+  p.x = 2
+  assert_equals(p.x, 2)
+
+
+def test_keyword_fields():
+  class Import(Named):
+    __annotations__ = [('from', str), ('name', str, None)]
+
+  obj = Import(**{'from': 'os'})
+  assert_equals(obj.asdict(), {'from': 'os', 'name': None})
+  assert_equals(list(Import('os', 'path')), ['os', 'path'])
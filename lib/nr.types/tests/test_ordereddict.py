@@ -0,0 +1,77 @@
+# Copyright (c) 2018  Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from nr.types._ordereddict import OrderedDict
+from nose.tools import *
+
+
+def test_order():
+  d = OrderedDict([('b', 1), ('a', 2)], c=3)
+  d['d'] = 4
+  d['b'] = 5
+  assert_equals(d.items(), [('b', 5), ('a', 2), ('c', 3), ('d', 4)])
+  assert_equals(list(reversed(d)), ['d', 'c', 'a', 'b'])
+  del d['a']
+  assert_equals(d.keys(), ['b', 'c', 'd'])
+  assert_equals(d.pop('c'), 3)
+  assert_equals(d.pop('c', None), None)
+  assert_raises(KeyError, lambda: d.pop('c'))
+  assert_equals(d.popitem(), ('d', 4))
+  assert_equals(d.popitem(last=False), ('b', 5))
+  assert_equals(len(d), 0)
+  assert_raises(KeyError, d.popitem)
+
+  d.update({'x': 1})
+  d.update([('y', 2)], z=3)
+  assert_equals(d.setdefault('x', 9), 1)
+  assert_equals(d.setdefault('w', 9), 9)
+  assert_equals(d.copy(), d)
+  assert_equals(d, {'x': 1, 'y': 2, 'z': 3, 'w': 9})
+  assert_not_equal(d, OrderedDict([('y', 2), ('x', 1), ('z', 3), ('w', 9)]))
+  d.clear()
+  assert_equals(d.items(), [])
+  d['a'] = 1
+  assert_equals(d.items(), [('a', 1)])
+
+
+def test_unhashable_keys():
+  d = OrderedDict()
+  d[[1]] = 'a'
+  d['b'] = 'b'
+  d[[2]] = 'c'
+  assert_true([1] in d)
+  assert_equals(d[[2]], 'c')
+  assert_equals(d.get([3]), None)
+  del d[[1]]
+  assert_equals(d.items(), [('b', 'b'), ([2], 'c')])
+  assert_equals(len(d), 2)
+
+
+def test_sort():
+  d = OrderedDict([('c', 1), ('a', 3), ('b', 2)])
+  d.sort()
+  assert_equals(d.keys(), ['a', 'b', 'c'])
+  d.sort(key=lambda x: x[1])
+  assert_equals(d.keys(), ['c', 'b', 'a'])
+  d.sort(reverse=True)
+  assert_equals(d.keys(), ['c', 'b', 'a'])
+  d['d'] = 0
+  assert_equals(d.keys(), ['c', 'b', 'a', 'd'])
+  assert_equals(d.popitem(last=False), ('c', 1))
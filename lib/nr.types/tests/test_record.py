@@ -38,3 +38,58 @@ def _test_record(MyRecord):
   assert_equals(data.bar, 42)
   assert_equals(data.ham, 'spam')
   assert_equals(data.egg, 'yummy')
+
+def test_generated_methods():
+  MyRecord = Record.new('MyRecord', 'foo bar', ham='spam')
+  data = MyRecord(1, bar=2)
+  assert_equals(list(data), [1, 2, 'spam'])
+  assert_equals(data[0], 1)
+  assert_equals(data[-1], 'spam')
+  assert_equals(data['bar'], 2)
+  data[1] = 3
+  data['ham'] = 'eggs'
+  assert_equals(data._asdict(), {'foo': 1, 'bar': 3, 'ham': 'eggs'})
+  assert_equals(data, MyRecord(1, 3, 'eggs'))
+  assert_not_equal(data, MyRecord(1, 3, 'spam'))
+  assert_raises(IndexError, lambda: data[3])
+  assert_raises(KeyError, lambda: data['egg'])
+  assert_raises(TypeError, lambda: data[None])
+  assert_raises(TypeError, lambda: MyRecord(1))
+  assert_raises(TypeError, lambda: MyRecord(1, 2, 3, 4))
+  assert_raises(TypeError, lambda: MyRecord(1, 2, egg=3))
+
+def test_default_before_required():
+  class MyRecord(Record):
+    __slots__ = ['foo', 'bar']
+    __defaults__ = {'foo': 42}
+  assert_equals(list(MyRecord(bar=1)), [42, 1])
+  assert_raises(TypeError, lambda: MyRecord(1))
+
+def test_hooks_and_explicit_methods():
+  class Base(Record):
+    __slots__ = ['foo', 'bar']
+    def __iter__(self):
+      return iter([self.bar, self.foo])
+  class Hooked(Base):
+    __slots__ = ['foo', 'bar']
+    def _get_foo(self):
+      return 'hooked'
+    def _set_bar(self, value):
+      object.__setattr__(self, 'bar', value * 2)
+  data = Hooked(1, 2)
+  assert_equals(data.foo, 'hooked')
+  assert_equals(data['bar'], 4)
+  assert_equals(list(data), [4, 'hooked'])
+
+def test_keyword_fields():
+  X = Record.new('X', ['class', 'x'])
+  data = X(1, 2)
+  assert_equals(repr(data), 'X(class=1, x=2)')
+  assert_equals(list(data), [1, 2])
+  assert_equals(data['class'], 1)
+  assert_equals(data, X(**{'class': 1, 'x': 2}))
+
+  class Y(X):
+    __slots__ = ('a', 'b')
+  assert_true(Y.__init__.__record_generated__)
+  assert_equals(list(Y(1, b=2)), [1, 2])
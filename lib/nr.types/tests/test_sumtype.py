@@ -1,6 +1,8 @@
 
 from nose.tools import *
 from nr.types import Sumtype
+import pickle
+import weakref
 
 
 def test_sumtypes():
@@ -29,3 +31,87 @@ def test_sumtypes():
   assert not hasattr(x, 'static_error_member')
   assert_equals(x.alert(), 'Progress: 0.5')
   assert_equals(x.progress, 0.5)
+
+
+def test_constructor_classes_and_match():
+
+  class Shape(Sumtype):
+    __slots__ = ()
+    Circle = Sumtype.Constructor('radius')
+    Rect = Sumtype.Constructor('width', 'height')
+    Empty = Sumtype.Constructor()
+
+    @Sumtype.MemberOf([Circle, Rect])
+    def scaled(self, factor):
+      return type(self)(*(x * factor for x in self))
+
+    kind = Sumtype.MemberOf([Empty], 'nothing')
+
+  c = Shape.Circle(2)
+  r = Shape.Rect(3, 4)
+  e = Shape.Empty()
+  assert_true(isinstance(c, Shape))
+  assert_is(type(c), Shape.Circle.cls)
+  assert_equals(repr(r), 'Shape.Rect(width=3, height=4)')
+  assert_equals(list(r.scaled(2)), [6, 8])
+  assert_equals(e.kind, 'nothing')
+  assert_false(hasattr(c, 'kind'))
+  assert_raises(AttributeError, lambda: setattr(c, 'foo', 1))
+  assert_raises(TypeError, lambda: Shape.Rect(1))
+
+  area = Shape.matcher(Circle=lambda r: 3 * r * r, Rect=lambda w, h: w * h, _=lambda x: 0)
+  assert_equals([area(c), area(r), area(e)], [12, 12, 0])
+  assert_raises(TypeError, lambda: Shape.matcher(Circle=lambda r: r))
+  assert_raises(TypeError, lambda: Shape.matcher(Square=lambda r: r, _=None))
+  assert_equals(r.match(Rect=lambda w, h: w + h), 7)
+  assert_equals(c.match(Rect=lambda w, h: w + h, _=lambda x: x.radius), 2)
+  assert_raises(TypeError, lambda: c.match(Rect=lambda w, h: w + h))
+
+
+def test_match_default_and_instance_attributes():
+
+  class Option(Sumtype):
+    Some = Sumtype.Constructor('value')
+    Empty = Sumtype.Constructor()
+
+  x = Option.Some(42)
+  x.comment = 'not slotted'
+  assert_equals(x.comment, 'not slotted')
+  assert_is(weakref.ref(x)(), x)
+
+  # A KeyError raised by the default handler is not mistaken for a missing handler.
+  def default(obj):
+    raise KeyError('from handler')
+  with assert_raises(KeyError):
+    Option.Empty().match(Some=lambda v: v, _=default)
+
+
+class Result(Sumtype):
+  Ok = Sumtype.Constructor('value')
+  Error = Sumtype.Constructor('message', 'code')
+
+
+def test_pickle():
+  for obj in [Result.Ok(3), Result.Error('failed', 2)]:
+    copy = pickle.loads(pickle.dumps(obj))
+    assert_is(type(copy), type(obj))
+    assert_equals(list(copy), list(obj))
+  obj = Result.Ok([1])
+  obj.comment = 'extra'
+  assert_equals(pickle.loads(pickle.dumps(obj)).comment, 'extra')
+
+
+def test_keyword_arguments_and_conflicting_members():
+
+  class Token(Sumtype):
+    Name = Sumtype.Constructor('class', 'value')
+
+  x = Token.Name('a', 'b')
+  assert_equals(getattr(x, 'class'), 'a')
+  assert_equals(list(x), ['a', 'b'])
+  assert_equals(repr(x), "Token.Name(class='a', value='b')")
+
+  with assert_raises(TypeError):
+    class Option(Sumtype):
+      Some = Sumtype.Constructor('value')
+      value = Sumtype.MemberOf([Some], 42)
@@ -0,0 +1,186 @@
+"""
+Benchmarks for the #localimport context manager at a realistic scale.
+
+Generates a temporary site with plain modules, packages, namespace packages
+that are spread over multiple directories and eggs (with and without a
+module index) and measures the cost of the individual operations:
+
+    python benchmarks/bench_localimport.py [--modules 2000] [--repeat 20]
+
+Every timing is reported per operation, so a regression in the context
+switch path (`__enter__()`/`__exit__()`) is visible independent of the
+size of the generated site.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from localimport import localimport, EGG_INDEX_NAME, EGG_INDEX_VERSION
+
+NAMESPACE_INIT = "__path__ = __import__('pkgutil').extend_path(__path__, __name__)\n"
+
+
+def generate_site(root, num_modules, num_namespaces, num_eggs, prefix):
+  """
+  Generates a site in the directory *root* and returns a list of all
+  module names that can be imported from it. Modules are distributed
+  evenly over plain modules, regular packages, namespace package portions
+  in the directory and namespace package portions in eggs.
+  """
+
+  modules = []
+  os.makedirs(root)
+
+  # Plain top-level modules.
+  for i in range(num_modules // 4):
+    name = '{0}mod_{1}'.format(prefix, i)
+    with open(os.path.join(root, name + '.py'), 'w') as fp:
+      fp.write('value = {0}\n'.format(i))
+    modules.append(name)
+
+  # Regular packages with ten submodules each.
+  for i in range(max(1, num_modules // 40)):
+    name = '{0}pkg_{1}'.format(prefix, i)
+    pkgdir = os.path.join(root, name)
+    os.makedirs(pkgdir)
+    with open(os.path.join(pkgdir, '__init__.py'), 'w') as fp:
+      fp.write('')
+    modules.append(name)
+    for j in range(10):
+      with open(os.path.join(pkgdir, 'sub_{0}.py'.format(j)), 'w') as fp:
+        fp.write('value = {0}\n'.format(j))
+      modules.append('{0}.sub_{1}'.format(name, j))
+
+  # Namespace packages, one portion in the directory and one in every egg.
+  per_portion = max(1, num_modules // (4 * max(1, num_namespaces) * (num_eggs + 1)))
+  egg_members = [{} for __ in range(num_eggs)]
+  for i in range(num_namespaces):
+    name = '{0}ns_{1}'.format(prefix, i)
+    nsdir = os.path.join(root, name)
+    os.makedirs(nsdir)
+    with open(os.path.join(nsdir, '__init__.py'), 'w') as fp:
+      fp.write(NAMESPACE_INIT)
+    modules.append(name)
+    for j in range(per_portion):
+      with open(os.path.join(nsdir, 'dir_{0}.py'.format(j)), 'w') as fp:
+        fp.write('value = {0}\n'.format(j))
+      modules.append('{0}.dir_{1}'.format(name, j))
+    for k, members in enumerate(egg_members):
+      members[name + '/__init__.py'] = NAMESPACE_INIT
+      for j in range(per_portion):
+        members['{0}/egg{1}_{2}.py'.format(name, k, j)] = 'value = {0}\n'.format(j)
+        modules.append('{0}.egg{1}_{2}'.format(name, k, j))
+
+  # Eggs, every second one with a module index.
+  for k, members in enumerate(egg_members):
+    for j in range(per_portion):
+      members['{0}egg{1}_mod_{2}.py'.format(prefix, k, j)] = 'value = {0}\n'.format(j)
+      modules.append('{0}egg{1}_mod_{2}'.format(prefix, k, j))
+    with zipfile.ZipFile(os.path.join(root, 'site_{0}.egg'.format(k)), 'w') as egg:
+      for arcname, content in sorted(members.items()):
+        egg.writestr(arcname, content)
+      if k % 2 == 0:
+        index = {}
+        for arcname in members:
+          parts = arcname[:-3].split('/')
+          ispkg = parts[-1] == '__init__'
+          if ispkg:
+            parts.pop()
+          index['.'.join(parts)] = [arcname, ispkg]
+        egg.writestr(EGG_INDEX_NAME, json.dumps(
+          {'version': EGG_INDEX_VERSION, 'modules': index}))
+
+  return modules
+
+
+def measure(func, repeat, number=1):
+  """
+  Returns the best time per call of *func* in seconds.
+  """
+
+  return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def purge_modules(names):
+  for name in names:
+    sys.modules.pop(name, None)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__,
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--modules', type=int, default=2000,
+    help='approximate number of modules to generate (default: 2000)')
+  parser.add_argument('--namespaces', type=int, default=10,
+    help='number of namespace packages (default: 10)')
+  parser.add_argument('--eggs', type=int, default=4,
+    help='number of eggs (default: 4)')
+  parser.add_argument('--repeat', type=int, default=20,
+    help='number of repetitions, the best one is reported (default: 20)')
+  parser.add_argument('--json', action='store_true',
+    help='print the results as JSON (in seconds per operation)')
+  args = parser.parse_args(argv)
+
+  tempdir = tempfile.mkdtemp(prefix='bench_localimport_')
+  try:
+    site = os.path.join(tempdir, 'site')
+    modules = generate_site(site, args.modules, args.namespaces, args.eggs, 'bench_')
+    results = []
+
+    def report(label, seconds, ops=1):
+      results.append((label, seconds / ops))
+
+    report('constructor', measure(lambda: localimport(site), args.repeat))
+
+    def first_enter():
+      with localimport(site, do_autodisable=False):
+        pass
+    enter_time = measure(first_enter, args.repeat)
+    report('first enter/exit', enter_time)
+
+    importer = localimport(site, do_autodisable=False)
+    with importer:
+      for name in modules:
+        __import__(name)
+
+    def reenter():
+      with importer:
+        pass
+    number = 10
+    report('repeated enter/exit ({0} modules)'.format(len(modules)),
+      measure(reenter, args.repeat, number))
+
+    def autodisable():
+      with localimport(site, do_autodisable=False) as imp:
+        imp.autodisable()
+    report('autodisable', measure(autodisable, args.repeat) - enter_time)
+
+    def import_all():
+      with localimport(site, do_autodisable=False):
+        for name in modules:
+          __import__(name)
+    report('import (per module)', measure(import_all, max(1, args.repeat // 4)), len(modules))
+    purge_modules(modules)
+
+    if args.json:
+      print(json.dumps(dict(results), indent=2, sort_keys=True))
+    else:
+      print('localimport benchmark ({0} modules, {1} namespaces, {2} eggs)'.format(
+        len(modules), args.namespaces, args.eggs))
+      for label, seconds in results:
+        print('  {0:<44} {1:>12.3f} us'.format(label, seconds * 1e6))
+  finally:
+    shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+  main()
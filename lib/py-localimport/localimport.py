@@ -21,15 +21,21 @@
 # SOFTWARE.
 
 __author__ = 'Niklas Rosenstein <rosensteinniklas@gmail.com>'
-__version__ = '1.7.3'
+__version__ = '1.8.0'
 
 import copy
 import glob
+import json
 import os
 import pkgutil
 import sys
 import traceback
 import zipfile
+import zipimport
+
+#: The name of the module index that `c4ddev pypkg` writes into eggs.
+EGG_INDEX_NAME = 'localimport-index.json'
+EGG_INDEX_VERSION = 1
 
 if sys.version_info[0] == 2:
   # FIXME: pyminifier introduces an additional, badly indented 'pass'
@@ -159,6 +165,126 @@ def extend_path(pth, name):
   return [os.path.normpath(x) for x in mod_path]
 
 
+def read_egg_index(filename):
+  '''
+  Reads the module index from the egg at *filename*. Returns a dictionary
+  that maps module names to tuples of (*arcname*, *ispkg*), or #None if
+  *filename* is not a zip file or contains no (supported) module index.
+  '''
+
+  if not os.path.isfile(filename):
+    return None
+  try:
+    with zipfile.ZipFile(filename, 'r') as egg:
+      data = json.loads(egg.read(EGG_INDEX_NAME).decode('utf8'))
+    if not isinstance(data, dict) or data.get('version') != EGG_INDEX_VERSION:
+      return None
+    return dict((k, (v[0], bool(v[1]))) for k, v in iteritems(data['modules']))
+  except (KeyError, ValueError, TypeError, IndexError, AttributeError,
+          IOError, OSError, zipfile.BadZipfile):
+    return None
+
+
+def iter_toplevel_names(path_name):
+  '''
+  Yields the names of the top-level modules and packages that could be
+  imported from the directory *path_name*, without checking whether they
+  are actually valid modules.
+  '''
+
+  if not os.path.isdir(path_name):
+    return
+  for name in os.listdir(path_name):
+    base, ext = os.path.splitext(name)
+    if ext in ('.py', '.pyc', '.pyo', '.pyd', '.so'):
+      yield base.partition('.')[0]
+    elif not ext:
+      yield name
+
+
+class EggIndexFinder(object):
+  '''
+  A meta path finder that resolves imports from eggs that contain a module
+  index (see #read_egg_index()) with a single dictionary lookup instead of
+  letting #zipimport scan every egg on the path. The actual loading is still
+  delegated to a #zipimport.zipimporter.
+
+  Modules are resolved in the order of the *path* list that is passed to the
+  constructor. Top-level names that can also be found in a plain directory
+  that appears before the egg are left to the default import machinery, as
+  are submodules whose egg is not in the parent package's `__path__`.
+  '''
+
+  def __init__(self, path):
+    self.eggs = {}
+    self.index = {}
+    self._importers = {}
+    for path_name in path:
+      if os.path.isdir(path_name):
+        for name in iter_toplevel_names(path_name):
+          self.index.setdefault(name, None)
+        continue
+      modules = read_egg_index(path_name)
+      if modules is None:
+        continue
+      self.eggs[path_name] = modules
+      for name, (arcname, ispkg) in iteritems(modules):
+        self.index.setdefault(name, (path_name, ispkg))
+
+  def __bool__(self):
+    return bool(self.eggs)
+
+  __nonzero__ = __bool__
+
+  def _lookup(self, fullname, path):
+    entry = self.index.get(fullname)
+    if entry is None:
+      return None
+    egg, ispkg = entry
+    parent, _, name = fullname.rpartition('.')
+    prefix = parent.replace('.', '/')
+    if path is not None:
+      pkgdir = os.path.normpath(os.path.join(egg, *parent.split('.')))
+      if pkgdir not in set(os.path.normpath(x) for x in path):
+        return None
+    key = (egg, prefix)
+    try:
+      return self._importers[key]
+    except KeyError:
+      importer = zipimport.zipimporter(os.path.join(egg, *prefix.split('/')) if prefix else egg)
+      self._importers[key] = importer
+      return importer
+
+  def find_spec(self, fullname, path=None, target=None):
+    importer = self._lookup(fullname, path)
+    if importer is None:
+      return None
+    if not hasattr(importer, 'find_spec'):
+      # zipimporter.find_spec() is only available since Python 3.10.
+      from importlib.util import spec_from_loader
+      loader = importer.find_module(fullname)
+      if loader is None:
+        return None
+      return spec_from_loader(fullname, loader)
+    return importer.find_spec(fullname, target)
+
+  def find_module(self, fullname, path=None):
+    importer = self._lookup(fullname, path)
+    if importer is None:
+      return None
+    return importer.find_module(fullname)
+
+  def iter_modules(self, egg):
+    '''
+    Yields tuples of (*name*, *ispkg*) for the top-level modules in the
+    index of the specified *egg*.
+    '''
+
+    for name, (arcname, ispkg) in iteritems(self.eggs[egg]):
+      if '.' not in name:
+        yield name, ispkg
+
+
 class localimport(object):
 
   _py3k = sys.version_info[0] >= 3
@@ -201,6 +327,10 @@ class localimport(object):
           seen.add(fn)
           eval_pth(fn, path_name, dest=self.path, imports=self.pth_imports)
 
+    self.egg_finder = EggIndexFinder(self.path)
+    if self.egg_finder:
+      self.meta_path.append(self.egg_finder)
+
   def __enter__(self):
     # pkg_resources comes with setuptools.
     try:
@@ -338,7 +468,19 @@ class localimport(object):
     mod.__path__ = pkgutil.extend_path(mod.__path__, package_name)
 
   def discover(self):
-    return pkgutil.iter_modules(self.path)
+    seen = set()
+    module_info = getattr(pkgutil, 'ModuleInfo', lambda *args: args)
+    for path_name in self.path:
+      if path_name in self.egg_finder.eggs:
+        for name, ispkg in self.egg_finder.iter_modules(path_name):
+          if name not in seen:
+            seen.add(name)
+            yield module_info(self.egg_finder, name, ispkg)
+      else:
+        for info in pkgutil.iter_modules([path_name]):
+          if info[1] not in seen:
+            seen.add(info[1])
+            yield info
 
   def disable(self, module):
     if not isinstance(module, self._string_types):
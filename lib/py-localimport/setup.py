@@ -30,7 +30,7 @@ def restify():
 
 setup(
   name="localimport",
-  version="1.7.3",
+  version="1.8.0",
   description="Isolated import of Python Modules",
   long_description=restify(),
   author="Niklas Rosenstein",
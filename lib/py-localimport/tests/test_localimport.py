@@ -1,8 +1,14 @@
 
 from nose.tools import *
-from localimport import localimport
+from localimport import localimport, read_egg_index, EGG_INDEX_NAME, EggIndexFinder
+import localimport as localimport_module
+import json
 import os
+import shutil
 import sys
+import tempfile
+import zipfile
+import zipimport
 
 modules_dir = os.path.join(os.path.dirname(__file__), 'modules')
 
@@ -60,3 +66,78 @@ def test_discover():
     assert_equals(sorted(x.name for x in _imp.discover()), ['another_module', 'some_module', 'test_localimport'])
   with localimport('modules') as _imp:
     assert_equals(sorted(x.name for x in _imp.discover()), ['another_module', 'some_module'])
+
+
+def test_egg_index():
+  tempdir = tempfile.mkdtemp()
+  try:
+    egg_file = os.path.join(tempdir, 'indexed.egg')
+    with zipfile.ZipFile(egg_file, 'w') as egg:
+      egg.writestr('indexed_pkg/__init__.py', 'value = 42\n')
+      egg.writestr('indexed_pkg/sub.py', 'value = "sub"\n')
+      egg.writestr(EGG_INDEX_NAME, json.dumps({'version': 1, 'modules': {
+        'indexed_pkg': ['indexed_pkg/__init__.py', True],
+        'indexed_pkg.sub': ['indexed_pkg/sub.py', False]}}))
+    with localimport('.', parent_dir=tempdir) as _imp:
+      assert isinstance(_imp.meta_path[0], EggIndexFinder)
+      assert_equals(sorted(x[1] for x in _imp.discover()), ['indexed_pkg'])
+      import indexed_pkg.sub
+      assert_equals(indexed_pkg.value, 42)
+      assert_equals(indexed_pkg.sub.value, 'sub')
+    assert 'indexed_pkg' not in sys.modules
+    assert 'indexed_pkg.sub' not in sys.modules
+  finally:
+    shutil.rmtree(tempdir)
+
+
+def write_indexed_egg(egg_file, index=None):
+  with zipfile.ZipFile(egg_file, 'w') as egg:
+    egg.writestr('indexed_pkg/__init__.py', 'value = 42\n')
+    egg.writestr('indexed_pkg/sub.py', 'value = "sub"\n')
+    if index is None:
+      index = {'version': 1, 'modules': {
+        'indexed_pkg': ['indexed_pkg/__init__.py', True],
+        'indexed_pkg.sub': ['indexed_pkg/sub.py', False]}}
+    egg.writestr(EGG_INDEX_NAME, json.dumps(index))
+
+
+def test_egg_index_without_zipimporter_find_spec():
+  # zipimporter.find_spec() is not available before Python 3.10.
+  if not hasattr(zipimport.zipimporter, 'find_module'):
+    return
+
+  old_zipimporter = zipimport.zipimporter
+
+  class zipimporter(old_zipimporter):
+    def __getattribute__(self, name):
+      if name == 'find_spec':
+        raise AttributeError(name)
+      return old_zipimporter.__getattribute__(self, name)
+
+  tempdir = tempfile.mkdtemp()
+  localimport_module.zipimport.zipimporter = zipimporter
+  try:
+    write_indexed_egg(os.path.join(tempdir, 'indexed.egg'))
+    with localimport('.', parent_dir=tempdir) as _imp:
+      import indexed_pkg.sub
+      assert_equals(indexed_pkg.value, 42)
+      assert_equals(indexed_pkg.sub.value, 'sub')
+  finally:
+    localimport_module.zipimport.zipimporter = old_zipimporter
+    shutil.rmtree(tempdir)
+
+
+def test_malformed_egg_index():
+  tempdir = tempfile.mkdtemp()
+  try:
+    egg_file = os.path.join(tempdir, 'indexed.egg')
+    for modules in [None, ['indexed_pkg'], {'indexed_pkg': 42}]:
+      write_indexed_egg(egg_file, {'version': 1, 'modules': modules})
+      assert read_egg_index(egg_file) is None
+    write_indexed_egg(egg_file, {'version': 1})
+    assert read_egg_index(egg_file) is None
+    with localimport('.', parent_dir=tempdir) as _imp:
+      import indexed_pkg.sub
+      assert_equals(indexed_pkg.sub.value, 'sub')
+  finally:
+    shutil.rmtree(tempdir)
@@ -0,0 +1,314 @@
+
+from __future__ import print_function
+
+import collections
+import hashlib
+import os
+import socket
+import threading
+import time
+
+from c4ddev import scripting_server
+from c4ddev.scripting_server import (BENCHMARK_PHASES, Client, CodeCache,
+  ServerThread, SocketFile, SourceObject, benchmark, parse_request, percentile,
+  socketpair)
+
+
+def start_server(password=None):
+  queue = collections.deque()
+  lock = threading.Lock()
+  thread = ServerThread(queue, lock, '127.0.0.1', 0, password)
+  thread.start()
+  return thread, queue
+
+
+def send(addr, source, filename='test.py', password=None):
+  sock = socket.create_connection(addr, timeout=30)
+  try:
+    data = source.encode('utf8')
+    headers = ['Content-length: {0}'.format(len(data)), 'Encoding: utf8',
+               'Filename: ' + filename, 'Origin: test']
+    if password is not None:
+      headers.append('Password: ' + hashlib.md5(password.encode('utf8')).hexdigest())
+    sock.sendall(('\n'.join(headers) + '\n\n').encode('utf8') + data)
+    response = b''
+    while True:
+      chunk = sock.recv(1024)
+      if not chunk: break
+      response += chunk
+    return response.decode('ascii')
+  finally:
+    sock.close()
+
+
+def test_concurrent_clients():
+  thread, queue = start_server()
+  try:
+    # A client that connects and sends an incomplete request must not
+    # block the other clients.
+    stalled = socket.create_connection(thread.address)
+    stalled.sendall(b'Content-length: 100\n\nprint(')
+
+    results = []
+    def sender(i):
+      results.append(send(thread.address, 'x = {0}'.format(i), 'f{0}.py'.format(i)))
+
+    senders = [threading.Thread(target=sender, args=(i,)) for i in range(50)]
+    for t in senders: t.start()
+    for t in senders: t.join(30)
+    assert not any(t.is_alive() for t in senders)
+    assert results == ['status: ok'] * 50
+    assert sorted(s.filename for s in queue) == sorted('f{0}.py'.format(i) for i in range(50))
+    for source in queue:
+      scope = {}
+      source.execute(scope)
+      assert source.filename == 'f{0}.py'.format(scope['x'])
+    stalled.close()
+  finally:
+    thread.running = False
+    thread.join()
+
+
+def test_invalid_requests():
+  thread, queue = start_server('alpine')
+  try:
+    assert send(thread.address, 'pass', password='foo') == 'status: invalid-password'
+    assert send(thread.address, 'pass', password='alpine') == 'status: ok'
+    sock = socket.create_connection(thread.address)
+    sock.sendall(b'Password: ' + hashlib.md5(b'alpine').hexdigest().encode('ascii') + b'\n\n')
+    assert sock.recv(1024) == b'status: invalid-request'
+    sock.close()
+    assert len(queue) == 1
+  finally:
+    thread.running = False
+    thread.join()
+
+
+def test_shutdown_wakes_up():
+  # The event loop waits without a timeout, it only exits if it is woken up.
+  thread, queue = start_server()
+  time.sleep(0.05)
+  thread.running = False
+  thread.join(30)
+  assert not thread.is_alive()
+
+
+def test_socket_file_lines_and_exact_reads():
+  a, b = socketpair()
+  writer = SocketFile(a, encoding='utf8')
+  reader = SocketFile(b)
+  writer.write('Content-length: 5\nFoo: bar\n\nhelloworld')
+  writer.close()
+  assert reader.readline() == b'Content-length: 5\n'
+  assert reader.readline() == b'Foo: bar\n'
+  assert reader.readline() == b'\n'
+  assert reader.read(5) == b'hello'
+  assert reader.read(10) == b'world'
+  assert reader.readline() == b''
+  reader.close()
+
+
+def test_socket_file_large_payload():
+  size = 16 * 1024 * 1024
+  payload = os.urandom(size)
+  a, b = socketpair()
+  def writer():
+    SocketFile(a).write(b'header\n' + payload)
+    a.close()
+  thread = threading.Thread(target=writer)
+  thread.start()
+  reader = SocketFile(b)
+  assert reader.readline() == b'header\n'
+  assert reader.read(size) == payload
+  assert reader.read(1) == b''
+  thread.join()
+  b.close()
+
+
+def test_large_payload():
+  thread, queue = start_server()
+  try:
+    source = 'x = 1\n' + '# ' + 'a' * (8 * 1024 * 1024) + '\n'
+    assert send(thread.address, source) == 'status: ok'
+    assert queue[0].source == source
+  finally:
+    thread.running = False
+    thread.join()
+
+  # The same with the blocking parse_request().
+  a, b = socketpair()
+  sender = threading.Thread(target=lambda: SocketFile(a).write(
+    'Content-length: {0}\n\n'.format(len(source)).encode('ascii') + source.encode('ascii')))
+  sender.start()
+  obj = parse_request(b, ('127.0.0.1', 0), None)
+  sender.join()
+  assert obj.source == source.encode('ascii')
+  assert a.recv(100) == b'status: ok'
+  a.close()
+  b.close()
+
+
+def test_shared_code_is_in_sync():
+  # The Sublime Script Sender can not import c4ddev, it contains a copy
+  # of the SocketFile class.
+  def shared_code(filename):
+    with open(filename) as fp:
+      code = fp.read()
+    code = code[code.index('class SocketFile'):]
+    return code[:code.index('# ~~~')]
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  assert shared_code(os.path.join(root, 'lib', 'c4ddev', 'scripting_server.py')) == \
+    shared_code(os.path.join(root, 'extras', 'sublime-script-sender', 'send_python_code.py'))
+
+
+def test_keep_alive_pipelining():
+  thread, queue = start_server('alpine')
+  try:
+    with Client('127.0.0.1', thread.address[1], 'alpine', 'test') as client:
+      scripts = [('x = {0}'.format(i), 'f{0}.py'.format(i)) for i in range(500)]
+      assert client.send_many(scripts, window=100) == ['ok'] * 500
+      assert client.send(b'x = 500', 'f500.py') == 'ok'
+      assert client.send(b'\xff', 'f501.py') == 'ok'
+    assert [s.filename for s in queue] == ['f{0}.py'.format(i) for i in range(502)]
+    assert queue[0].origin == 'test'
+    assert queue[0].source == 'x = 0'
+    assert queue[500].source == b'x = 500'
+
+    # The password is checked for the first request of the connection.
+    with Client('127.0.0.1', thread.address[1], 'foo') as client:
+      assert client.send_many([('pass', 'a.py'), ('pass', 'b.py')]) == ['invalid-password']
+    assert len(queue) == 502
+
+    # An encoding error does not close the connection.
+    sock = socket.create_connection(thread.address)
+    sock.sendall(b'Connection: keep-alive\nContent-length: 1\nEncoding: utf8\n'
+                 b'Password: ' + hashlib.md5(b'alpine').hexdigest().encode('ascii') + b'\n\n\xff'
+                 b'Content-length: 4\nEncoding: utf8\n\npass')
+    reader = SocketFile(sock)
+    assert reader.readline() == b'status: encoding-error\n'
+    assert reader.readline() == b'status: ok\n'
+    sock.close()
+  finally:
+    thread.running = False
+    thread.join()
+
+
+def test_code_cache():
+  cache = CodeCache(maxsize=2)
+  a = cache.compile('x = 1', 'a.py')
+  assert cache.compile('x = 1', 'a.py') is a
+  assert cache.compile(b'x = 1', 'a.py') is not a
+  assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+
+  # Changing the source or the filename compiles the code again.
+  assert cache.compile('x = 2', 'a.py') is not a
+  assert cache.compile('x = 1', 'b.py').co_filename == 'b.py'
+  assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)
+
+  # The least recently used code object is evicted.
+  b = cache.compile('x = 1', 'b.py')
+  cache.compile('x = 2', 'a.py')
+  cache.compile('x = 3', 'a.py')
+  assert cache.compile('x = 1', 'b.py') is not b
+  assert (cache.hits, cache.misses, len(cache)) == (3, 6, 2)
+
+  cache.clear()
+  assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+
+
+def test_source_object_uses_code_cache():
+  cache = CodeCache()
+  source = SourceObject(('127.0.0.1', 0), 'test.py', 'y = x + 1', 'test')
+  for i in range(3):
+    scope = {'x': i}
+    source.execute(scope, cache)
+    assert scope['y'] == i + 1
+    assert scope['__file__'] == 'test.py'
+  assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_percentile():
+  values = list(range(1, 101))
+  assert percentile(values, 50) == 50
+  assert percentile(values, 99) == 99
+  assert percentile(values, 100) == 100
+  assert percentile(values, 0) == 1
+  assert percentile([], 50) is None
+
+
+def test_benchmark():
+  thread, queue = start_server('alpine')
+  try:
+    result = benchmark(thread.address, 'alpine', clients=3, requests=10, size=100)
+    assert result['requests'] == 30 and not result['errors']
+    assert [len(result[p]) for p in BENCHMARK_PHASES] == [3, 3, 30, 30, 30]
+    assert sorted(len(s.source) for s in queue) == [0] * 3 + [100] * 30
+
+    result = benchmark(thread.address, 'alpine', clients=2, requests=5, keep_alive=False)
+    assert [len(result[p]) for p in BENCHMARK_PHASES] == [10, 0, 10, 10, 10]
+
+    result = benchmark(thread.address, 'foo', clients=2, requests=5)
+    assert result['requests'] == 0
+    assert [str(exc) for exc in result['errors']] == ['invalid-password'] * 2
+  finally:
+    thread.running = False
+    thread.join()
+
+
+def test_half_closed_client_gets_all_statuses():
+  thread, queue = start_server()
+  try:
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(thread.address)
+    while not thread._connections:
+      time.sleep(0.01)
+    for conn in list(thread._connections):
+      conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    count = 20000
+    request = b'Content-length: 4\n\npass'
+    sock.sendall(b'Connection: keep-alive\n' + request * count)
+    sock.shutdown(socket.SHUT_WR)
+    # Don't read before the server received the end of the stream, while
+    # it still has statuses to send that do not fit into the socket buffers.
+    while len(queue) < count:
+      time.sleep(0.01)
+    time.sleep(0.1)
+    data = b''
+    while True:
+      chunk = sock.recv(65536)
+      if not chunk: break
+      data += chunk
+    sock.close()
+    assert data == b'status: ok\n' * count
+  finally:
+    thread.running = False
+    thread.join()
+
+
+def test_failing_connection_does_not_stop_server():
+  thread, queue = start_server()
+  try:
+    # The codec exists, but it can not decode bytes to text.
+    sock = socket.create_connection(thread.address, timeout=30)
+    sock.sendall(b'Content-length: 4\nEncoding: rot13\n\npass')
+    assert sock.recv(1024) == b'status: encoding-error'
+    sock.close()
+
+    def make_source(*args):
+      raise RuntimeError('make_source() failed')
+    original, scripting_server.make_source = scripting_server.make_source, make_source
+    try:
+      sock = socket.create_connection(thread.address, timeout=30)
+      sock.sendall(b'Content-length: 4\n\npass')
+      assert sock.recv(1024) == b''
+      sock.close()
+    finally:
+      scripting_server.make_source = original
+
+    assert thread.is_alive()
+    assert send(thread.address, 'pass') == 'status: ok'
+    assert len(queue) == 1
+  finally:
+    thread.running = False
+    thread.join()
@@ -0,0 +1,120 @@
+
+from __future__ import print_function
+
+import importlib
+import sys
+import types
+
+import pytest
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+from c4ddev.scripting_server import Client
+
+
+class MainThread(object):
+  """
+  Simulates the Cinema 4D main thread: special events are delivered to the
+  #CoreMessage() of the message plugins, the timer sends #MSG_TIMEREVENT
+  to them after the interval returned by #GetTimer().
+  """
+
+  MSG_TIMEREVENT = -1
+  EVMSG_CHANGE = 604
+
+  def __init__(self):
+    self.events = queue.Queue()
+    self.plugins = []
+    self.deliver_special_events = True
+
+  def SpecialEventAdd(self, id):
+    if self.deliver_special_events:
+      self.events.put(id)
+
+  def iterate(self, plugin):
+    try:
+      kind = self.events.get(timeout=plugin.GetTimer() / 1000.0)
+    except queue.Empty:
+      kind = self.MSG_TIMEREVENT
+    plugin.CoreMessage(kind, None)
+    return kind
+
+  def make_module(self):
+    c4d = types.ModuleType('c4d')
+    c4d.plugins = types.ModuleType('c4d.plugins')
+    c4d.plugins.MessageData = object
+    c4d.plugins.CommandData = object
+    c4d.plugins.RegisterMessagePlugin = lambda id, name, info, plugin: self.plugins.append(plugin)
+    c4d.plugins.RegisterCommandPlugin = lambda id, name, info, icon, help, plugin: True
+    c4d.documents = types.ModuleType('c4d.documents')
+    c4d.documents.GetActiveDocument = lambda: types.SimpleNamespace(
+      GetActiveObject=lambda: None, GetActiveMaterial=lambda: None)
+    c4d.SpecialEventAdd = self.SpecialEventAdd
+    c4d.MSG_TIMEREVENT = self.MSG_TIMEREVENT
+    c4d.EVMSG_CHANGE = self.EVMSG_CHANGE
+    c4d.PLUGINFLAG_HIDEPLUGINMENU = 0
+    c4d.C4DPL_ENDACTIVITY = 1
+    c4d.C4DPL_RELOADPYTHONPLUGINS = 2
+    return c4d
+
+
+@pytest.fixture
+def main_thread(monkeypatch):
+  main_thread = MainThread()
+  monkeypatch.setitem(sys.modules, 'c4d', main_thread.make_module())
+  monkeypatch.delitem(sys.modules, 'c4ddev.plugins.scripting_server', raising=False)
+  main_thread.module = importlib.import_module('c4ddev.plugins.scripting_server')
+  return main_thread
+
+
+@pytest.fixture
+def server(main_thread):
+  server = main_thread.module.Server('127.0.0.1', 0, 'alpine')
+  server.start()
+  yield server
+  server.stop()
+
+
+def send(server, code):
+  with Client('127.0.0.1', server.thread.address[1], 'alpine') as client:
+    assert client.send(code) == 'ok'
+
+
+def test_special_event_wakes_up_main_thread(main_thread, server):
+  server.timer = server.MAX_TIMER
+  for i in range(5):
+    send(server, 'import c4d; c4d.executed = {0}'.format(i))
+    # The script is executed on the special event, not on a timer message.
+    assert main_thread.iterate(server) == server.PLUGIN_ID
+    assert sys.modules['c4d'].executed == i
+  assert server.latency.count == 5
+  assert 0 <= server.latency.max <= server.latency.total
+  assert server.timer == server.MAX_TIMER
+
+
+def test_timer_fallback(main_thread, server):
+  main_thread.deliver_special_events = False
+  server.MIN_TIMER = server.timer = 10
+  server.MAX_TIMER = 80
+  assert main_thread.iterate(server) == main_thread.MSG_TIMEREVENT
+  assert server.timer == 2 * server.MIN_TIMER
+  while server.timer < server.MAX_TIMER:
+    main_thread.iterate(server)
+  assert server.timer == server.MAX_TIMER
+
+  # Other core messages execute queued scripts but do not change the timer.
+  server.CoreMessage(main_thread.EVMSG_CHANGE, None)
+  assert server.timer == server.MAX_TIMER
+  send(server, 'import c4d; c4d.executed = "change"')
+  server.CoreMessage(main_thread.EVMSG_CHANGE, None)
+  assert sys.modules['c4d'].executed == 'change'
+  assert server.timer == server.MAX_TIMER
+
+  send(server, 'import c4d; c4d.executed = True')
+  assert main_thread.iterate(server) == main_thread.MSG_TIMEREVENT
+  assert sys.modules['c4d'].executed
+  assert server.timer == server.MIN_TIMER
+  assert server.latency.count == 2